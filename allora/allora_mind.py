@@ -1,19 +1,36 @@
+import logging
 import requests
+import random
+import threading
 import time
 from utils.helpers import round_price
 from strategy.custom_strategy import custom_strategy
 from utils.constants import ALLORA_API_BASE_URL
-from database.db_manager import DatabaseManager
+from database.db_manager import get_database
 from strategy.deepseek_reviewer import DeepSeekReviewer
+from allora.inference_fetcher import AsyncInferenceFetcher
+from allora.inference_cache import InferenceCache
+from allora.scheduler import TradeScheduler
+from allora.decision_pipeline import DecisionPipeline
+from utils import metrics
+
+logger = logging.getLogger(__name__)
 
 
 class AlloraMind:
-    def __init__(self, manager, allora_upshot_key, deepseek_api_key, threshold=0.03):
+    def __init__(self, manager, allora_upshot_key, deepseek_api_key, threshold=0.03, inference_cache=None, db=None,
+                 max_open_positions=None, max_new_trades_per_cycle=None, reviewer=None, fetcher=None):
         """
         Initializes the AlloraMind with a given OrderManager and strategy parameters.
 
         :param manager: Instance of OrderManager to interact with orders.
         :param threshold: The percentage threshold for generating signals.
+        :param inference_cache: Optional shared InferenceCache; one is created when omitted.
+        :param db: Optional DatabaseManager; defaults to the process-wide instance.
+        :param max_open_positions: Optional cap on concurrently open positions.
+        :param max_new_trades_per_cycle: Optional cap on trades opened per cycle.
+        :param reviewer: Optional shared DeepSeekReviewer (verdicts are cached across users).
+        :param fetcher: Optional shared AsyncInferenceFetcher.
         """
         self.manager = manager
         self.threshold = threshold
@@ -21,8 +38,14 @@ class AlloraMind:
         self.topic_ids = {}
         self.timeout = 5
         self.base_url = ALLORA_API_BASE_URL
-        self.db = DatabaseManager()
-        self.deepseek_reviewer = DeepSeekReviewer(deepseek_api_key)
+        self.fetcher = fetcher or AsyncInferenceFetcher(allora_upshot_key, self.base_url, timeout=self.timeout)
+        self.inference_cache = inference_cache or InferenceCache()
+        self.db = db or get_database()
+        self.deepseek_reviewer = reviewer or DeepSeekReviewer(deepseek_api_key)
+        self.pipeline = DecisionPipeline(self.deepseek_reviewer, max_open_positions=max_open_positions,
+                                         max_new_trades_per_cycle=max_new_trades_per_cycle)
+        self._close_lock = threading.Lock()
+        self._closing = {}
 
     def set_topic_ids(self, topic_ids):
         """
@@ -32,6 +55,14 @@ class AlloraMind:
         self.topic_ids = topic_ids
 
     def get_inference_ai_model(self, topic_id):
+        prediction, _ = self._fetch_inference(topic_id)
+        return prediction
+
+    def _fetch_inference(self, topic_id):
+        """
+        Blocking fetch of one topic.
+        :return: (prediction, raw_response), or (None, None) once retries are exhausted.
+        """
         url = f'{self.base_url}ethereum-11155111?allora_topic_id={topic_id}'
         headers = {
             'accept': 'application/json',
@@ -41,18 +72,41 @@ class AlloraMind:
         max_retries = 3
         for attempt in range(max_retries):
             try:
-                response = requests.get(url, headers=headers)
-                response.raise_for_status()
-                data = response.json()
+                with metrics.timed("allora_request_seconds", client="sync"):
+                    response = requests.get(url, headers=headers, timeout=self.timeout)
+                    response.raise_for_status()
+                    data = response.json()
                 network_inference_normalized = float(data['data']['inference_data']['network_inference_normalized'])
-                return network_inference_normalized
+                return network_inference_normalized, data
             except requests.exceptions.RequestException as e:
-                print(f"Attempt {attempt + 1} failed: {e}")
+                logger.warning("Topic %s attempt %d failed: %s", topic_id, attempt + 1, e)
                 if attempt < max_retries - 1:
-                    time.sleep(2)
+                    metrics.inc("allora_retries", client="sync")
+                    time.sleep(random.uniform(0, 2 ** attempt))
                 else:
-                    print("Max retries reached, could not fetch data.")
-                    return None
+                    metrics.inc("allora_failures", client="sync")
+                    logger.error("Max retries reached for topic %s, could not fetch data", topic_id)
+                    return None, None
+
+    def prefetch_inferences(self):
+        """
+        Concurrently fetches the topics whose epoch has rolled over since the last fetch.
+        Topics still inside their epoch are served from the inference cache.
+        """
+        stale = self.inference_cache.stale_topics(self.topic_ids)
+        if not stale:
+            return {}
+        results = self.fetcher.fetch_raw_sync(stale)
+        for token, (prediction, raw) in results.items():
+            self.inference_cache.put(stale[token], prediction, raw)
+        return {token: prediction for token, (prediction, _) in results.items()}
+
+    def get_prediction(self, token, topic_id):
+        """
+        Returns the prediction for the topic's current epoch, fetching it at most once
+        even when open_trade and monitor_positions ask for it concurrently.
+        """
+        return self.inference_cache.get_or_fetch(topic_id, lambda: self._fetch_inference(topic_id))
 
     def generate_signal(self, token):
         """
@@ -65,7 +119,7 @@ class AlloraMind:
             self.log_analysis(token, "SKIP", None, None, reason="No topic ID configured")
             return "HOLD", None, None, None
 
-        prediction = self.get_inference_ai_model(topic_id)
+        prediction = self.get_prediction(token, topic_id)
         if prediction is None:
             self.log_analysis(token, "SKIP", None, None, reason="No prediction available")
             return "HOLD", None, None, None
@@ -90,17 +144,27 @@ class AlloraMind:
     def open_trade(self):
         """
         Opens a trade based on Allora and optional custom strategies.
+        Candidates go through the DecisionPipeline: cheap gates (open position, signal,
+        strategy consensus, risk limits) first, then one batched DeepSeek review for the
+        survivors only.
         """
-        tokens = list(self.topic_ids.keys())
-        for token in tokens:
-            # Get open positions using the new format
-            open_positions = self.manager.list_open_positions()
-            
-            # Check if token is already in an open position
-            if token in open_positions:
-                print(f"Already an open position for {token}, skipping...")
-                continue
+        # Position state is fetched once per cycle and kept current by our own orders
+        tokens = [token for token in self.topic_ids if self._without_position(token)]
+        self.trade_candidates(self.build_candidates(tokens))
+
+    def _without_position(self, token):
+        if not self.pipeline.record('open_position', not self.manager.has_open_position(token)):
+            logger.debug("Already an open position for %s, skipping", token)
+            return False
+        return True
 
+    def build_candidates(self, tokens):
+        """
+        Allora signal, custom strategy verdict and review payload for each token.
+        Does not depend on account state, so several accounts can share one result.
+        """
+        candidates = []
+        for token in tokens:
             allora_signal, allora_diff, current_price, prediction = self.generate_signal(token)
 
             # Pass more information to custom strategy
@@ -120,51 +184,115 @@ class AlloraMind:
                 'direction': allora_signal,
                 'market_condition': 'ANALYSIS'
             }
-            review = self.deepseek_reviewer.review_trade(trade_data)
-            
-            if review and review['approval'] and review['confidence'] > 70:
-                # Continue with existing trade execution logic
-                if custom_signal == "BUY" and allora_signal == "BUY":
-                    signal = "BUY"
-                elif custom_signal == "SELL" and allora_signal == "SELL":
-                    signal = "SELL"
-                elif not custom_signal and allora_signal in ["BUY", "SELL"]:
-                    signal = allora_signal
-                else:
-                    print(f"No trading opportunity for {token}, signal: HOLD")
-                    continue
+            candidates.append({
+                'token': token,
+                'allora_signal': allora_signal,
+                'allora_diff': allora_diff,
+                'current_price': current_price,
+                'prediction': prediction,
+                'custom_signal': custom_signal,
+                'trade_data': trade_data
+            })
+        return candidates
 
-                # If there's no signal, skip the token
-                if signal == "HOLD":
-                    continue
+    def trade_candidates(self, candidates, check_positions=False):
+        """
+        Runs candidates through this account's pipeline and opens the approved trades.
+
+        :param check_positions: Apply the open-position gate here (for candidates built
+                                for several accounts); limited to this mind's topics.
+        """
+        if check_positions:
+            candidates = [candidate for candidate in candidates
+                          if candidate['token'] in self.topic_ids and self._without_position(candidate['token'])]
+        open_position_count = len(self.manager.get_open_positions())
+
+        # Every approved entry of the cycle goes out in one bulk order request
+        orders = []
+        for candidate, signal, review in self.pipeline.run(candidates, open_position_count):
+            order = self.approved_order(candidate, signal, review)
+            if order is not None:
+                orders.append(order)
+        if orders:
+            for result in self.manager.create_trade_orders(orders):
+                logger.info("Order result: %s", result)
+
+    def approved_order(self, candidate, signal, review):
+        """
+        :return: (token, is_buy) for an approved trade, None if DeepSeek rejected it.
+        """
+        token = candidate['token']
+        allora_diff = candidate['allora_diff']
+        current_price = candidate['current_price']
+        prediction = candidate['prediction']
+        if not (review.get('approval') and review.get('confidence', 0) > 70):
+            logger.info("Trade rejected by DeepSeek AI for %s: confidence %s%%, risk score %s/10, reasoning: %s",
+                        token, review.get('confidence'), review.get('risk_score'), review.get('reasoning'))
+            return None
+
+        # Calculate profit target and stop-loss automatically
+        target_profit = abs(allora_diff) * 100  # Convert to percentage based on Allora's diff
+        stop_loss = target_profit * 0.5  # Stop-loss is 50% of the profit target
+        logger.info("Generating %s order for %s with %.2f%% difference, current price %s, predicted price %s, "
+                    "profit target %.2f%%, stop loss %.2f%%", signal, token, allora_diff * 100, current_price,
+                    prediction, target_profit, stop_loss)
+        return token, signal == "BUY"
 
-                # Calculate profit target and stop-loss automatically
-                target_profit = abs(allora_diff) * 100  # Convert to percentage based on Allora's diff
-                stop_loss = target_profit * 0.5  # Stop-loss is 50% of the profit target
-                print(f"Profit Target: {target_profit}% and Stop Loss: {stop_loss}%")
-
-                # Generate the order based on the signal
-                if signal == "BUY":
-                    print(f"Generating BUY order for {token} with {allora_diff:.2%} difference "
-                          f"and Current Price: {current_price} Predicted Price: {prediction}")
-                    res = self.manager.create_trade_order(token, is_buy=True,
-                                                          profit_target=target_profit,
-                                                          loss_target=stop_loss)
-                    print(res)
-                elif signal == "SELL":
-                    print(f"Generating SELL order for {token} with {allora_diff:.2%} difference"
-                          f" and Current Price: {current_price} Predicted Price: {prediction}")
-                    print(f" token:{token}, profit targit: {target_profit} and Loss: {stop_loss}")
-                    res = self.manager.create_trade_order(token, is_buy=False,
-                                                          profit_target=target_profit,
-                                                          loss_target=stop_loss)
-                    print(res)
-            else:
-                print(f"Trade rejected by DeepSeek AI:")
-                print(f"Confidence: {review['confidence']}%")
-                print(f"Reasoning: {review['reasoning']}")
-                print(f"Risk Score: {review['risk_score']}/10")
-                return
+    CLOSE_BUFFER = 0.01  # 1% buffer for closing positions
+
+    def should_close(self, side, current_price, prediction):
+        """
+        For SHORT positions (side B), close when prediction > current_price by buffer.
+        For LONG positions (side A), close when prediction < current_price by buffer.
+        :return: (should_close, prediction difference as a fraction of the current price)
+        """
+        pred_diff_percent = (prediction - current_price) / current_price
+        should_close = (side == "B" and pred_diff_percent > self.CLOSE_BUFFER) or \
+                       (side == "A" and pred_diff_percent < -self.CLOSE_BUFFER)
+        return should_close, pred_diff_percent
+
+    def evaluate_position(self, position, current_price, prediction, verbose=True, close=True):
+        """
+        Closes a position when the prediction has moved past the close buffer against it.
+        :param close: If False the close is only claimed, and the caller sends it (batched).
+        :return: True if the position should be (or was) closed.
+        """
+        token = position["coin"]
+        entry_price = float(position["entryPrice"])
+        side = "A" if float(position["szi"]) > 0 else "B"
+        current_price = float(current_price)
+        prediction = float(prediction)
+        pnl_percent = ((current_price - entry_price) / entry_price) * 100 * (1 if side == "A" else -1)
+        should_close, pred_diff_percent = self.should_close(side, current_price, prediction)
+
+        if should_close:
+            if not self._begin_close(token):
+                return False
+            logger.info("Closing %s position for %s: entry $%.2f, current $%.2f (%+.2f%%), prediction $%.2f "
+                        "(%+.2f%%), prediction %s current price by >1%%", 'LONG' if side == 'A' else 'SHORT',
+                        token, entry_price, current_price, pnl_percent, prediction, pred_diff_percent * 100,
+                        'above' if side == 'B' else 'below')
+            if close:
+                self.manager.market_close(token)
+            return True
+
+        if verbose:
+            logger.info("Holding %s position for %s: entry $%.2f, current $%.2f (%+.2f%%), prediction $%.2f "
+                        "(%+.2f%%)", 'LONG' if side == 'A' else 'SHORT', token, entry_price, current_price,
+                        pnl_percent, prediction, pred_diff_percent * 100)
+        return False
+
+    def _begin_close(self, token, cooldown=30):
+        """
+        Guards against closing the same position twice from the slow loop and price ticks
+        before the fill has been reflected in our position state.
+        """
+        now = time.monotonic()
+        with self._close_lock:
+            if now - self._closing.get(token, float('-inf')) < cooldown:
+                return False
+            self._closing[token] = now
+            return True
 
     def monitor_positions(self):
         """
@@ -173,70 +301,89 @@ class AlloraMind:
         """
         open_positions = self.manager.get_open_positions()
         if not open_positions:
-            print("No open positions to track.")
+            logger.debug("No open positions to track")
             return
 
-        CLOSE_BUFFER = 0.01  # 1% buffer for closing positions
-
+        to_close = []
         for position in open_positions:
             token = position["coin"]
-            entry_price = float(position["entryPrice"])
-            side = "A" if float(position["szi"]) > 0 else "B"
 
             topic_id = self.topic_ids.get(token)
             if not topic_id:
-                print(f"No topic ID configured for token: {token}")
+                logger.warning("No topic ID configured for token %s", token)
                 continue
 
-            prediction = self.get_inference_ai_model(topic_id)
+            prediction = self.get_prediction(token, topic_id)
             current_price = self.manager.get_current_price(token)
             
             if prediction is None or current_price is None:
-                print(f"Data unavailable for {token}. Skipping...")
+                logger.warning("Data unavailable for %s, skipping", token)
                 continue
 
-            current_price = float(current_price)
-            prediction = float(prediction)
-            pnl_percent = ((current_price - entry_price) / entry_price) * 100 * (1 if side == "A" else -1)
-            
-            # Calculate prediction difference as percentage
-            pred_diff_percent = (prediction - current_price) / current_price
-
-            # For SHORT positions (side B), close when prediction > current_price by buffer
-            # For LONG positions (side A), close when prediction < current_price by buffer
-            should_close = (side == "B" and pred_diff_percent > CLOSE_BUFFER) or \
-                          (side == "A" and pred_diff_percent < -CLOSE_BUFFER)
-
-            if should_close:
-                print(f"Closing {'LONG' if side == 'A' else 'SHORT'} position for {token}:")
-                print(f"  Side: {side}")
-                print(f"  Entry: ${entry_price:,.2f}")
-                print(f"  Current: ${current_price:,.2f} ({pnl_percent:+.2f}%)")
-                print(f"  Prediction: ${prediction:,.2f}")
-                print(f"  Prediction Difference: {pred_diff_percent:+.2%}")
-                print(f"  Reason: {'Prediction above current price by >1%' if side == 'B' else 'Prediction below current price by >1%'}")
-                self.manager.market_close(token)
-            else:
-                print(f"Holding position for {token}:")
-                print(f"  Side: {side}")
-                print(f"  Entry: ${entry_price:,.2f}")
-                print(f"  Current: ${current_price:,.2f} ({pnl_percent:+.2f}%)")
-                print(f"  Prediction: ${prediction:,.2f}")
-                print(f"  Prediction Difference: {pred_diff_percent:+.2%}")
+            if self.evaluate_position(position, current_price, prediction, close=False):
+                to_close.append(token)
+
+        self._close_positions(to_close)
+
+    def _close_positions(self, tokens):
+        """
+        Sends all closes decided in one pass as a single bulk order request.
+        """
+        if not tokens:
+            return
+        for result in self.manager.market_close_many(tokens):
+            logger.info("Close result: %s", result)
+
+    def check_exits(self, mids=None):
+        """
+        Fast exit path run on price updates: re-evaluates every open position against the
+        prediction already cached for its topic. Never calls the Allora API.
+
+        :param mids: Optional {coin: price} from the tick that triggered the check.
+        """
+        with metrics.timed("exit_check_seconds"):
+            to_close = []
+            for position in self.manager.get_open_positions():
+                token = position["coin"]
+                topic_id = self.topic_ids.get(token)
+                if not topic_id:
+                    continue
+                prediction = self.inference_cache.peek(topic_id)
+                current_price = mids.get(token) if mids else self.manager.get_current_price(token)
+                if prediction is None or current_price is None:
+                    continue
+                if self.evaluate_position(position, current_price, prediction, verbose=False, close=False):
+                    to_close.append(token)
+            self._close_positions(to_close)
+
+    def run_cycle(self):
+        """
+        Slow path: refresh market data and inferences, open trades and monitor positions.
+        """
+        logger.info("Running trading and position monitoring")
+        with metrics.timed("cycle_seconds"):
+            with metrics.timed("cycle_stage_seconds", stage="refresh"):
+                self.manager.refresh_market_data()
+            with metrics.timed("cycle_stage_seconds", stage="prefetch"):
+                self.prefetch_inferences()
+            with metrics.timed("cycle_stage_seconds", stage="open_trade"):
+                self.open_trade()
+            with metrics.timed("cycle_stage_seconds", stage="monitor"):
+                self.monitor_positions()
+        logger.info("Market data cache: %s, inference cache: %s, leverage updates: %s",
+                    self.manager.market_data.stats(), self.inference_cache.stats(),
+                    self.manager.leverage_cache.stats())
+        logger.info("Decision pipeline: %s", self.pipeline.report())
 
-    def start_allora_trade_bot(self, interval=180):
+    def start_allora_trade_bot(self, interval=180, poll_interval=None):
         """
         Starts the trading and monitoring process at regular intervals.
+        Exits are also re-checked on every streamed price update (see TradeScheduler).
         :param interval: Time in seconds between checks (default: 180 seconds).
-        :param profit_target: Profit target percentage for trades.
-        :param loss_target: Loss target percentage for trades.
+        :param poll_interval: Optional seconds between REST price polls for exit checks
+                              when no market stream is live.
         """
-        while True:
-            print("Running trading and position monitoring...")
-            self.open_trade()
-            self.monitor_positions()
-            print(f"Sleeping for {interval} seconds...")
-            time.sleep(interval)
+        TradeScheduler(self, interval, poll_interval=poll_interval).run()
 
     def log_analysis(self, token, signal_type, current_price, prediction, difference=None, reason=None):
         """Silent logging to database without affecting console output"""
@@ -254,4 +401,4 @@ class AlloraMind:
             }
             self.db.log_trade(trade_data)
         except Exception as e:
-            print(f"Database logging error: {str(e)}")  # Only error gets printed
+            logger.error("Database logging error: %s", e)
@@ -0,0 +1,116 @@
+import logging
+from utils import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class DecisionPipeline:
+    # Cheap deterministic gates, in the order they run
+    GATES = ('open_position', 'signal', 'consensus', 'risk_limits')
+
+    def __init__(self, reviewer, max_open_positions=None, max_new_trades_per_cycle=None):
+        """
+        Staged trade decisions: cheap gates first, the LLM reviewer only for survivors.
+
+        - open_position: a position in the token is already open
+        - signal: Allora returned HOLD (below threshold or missing data)
+        - consensus: the custom strategy disagrees with Allora
+        - risk_limits: no position slots left this cycle
+        - review: survivors go to the reviewer as one batched request
+
+        Every stage counts candidates in/passed/dropped so the reviews (and LLM time) each
+        gate saves can be reported.
+
+        :param reviewer: DeepSeekReviewer used for the final stage.
+        :param max_open_positions: Optional cap on concurrently open positions.
+        :param max_new_trades_per_cycle: Optional cap on trades opened per cycle.
+        """
+        self.reviewer = reviewer
+        self.max_open_positions = max_open_positions
+        self.max_new_trades_per_cycle = max_new_trades_per_cycle
+        self.stats = {stage: {'in': 0, 'passed': 0, 'dropped': 0} for stage in self.GATES + ('review',)}
+
+    def record(self, stage, passed):
+        counters = self.stats[stage]
+        counters['in'] += 1
+        counters['passed' if passed else 'dropped'] += 1
+        metrics.inc("pipeline_candidates", stage=stage, outcome='passed' if passed else 'dropped')
+        return passed
+
+    @staticmethod
+    def resolve_signal(allora_signal, custom_signal):
+        """
+        Final trade direction, or None when Allora and the custom strategy do not agree.
+        A custom strategy without an opinion (None) defers to Allora.
+        """
+        if allora_signal not in ("BUY", "SELL"):
+            return None
+        if custom_signal and custom_signal != allora_signal:
+            return None
+        return allora_signal
+
+    def slots_available(self, open_position_count):
+        """
+        Trades this pipeline may still open this cycle, or None without risk limits.
+        """
+        slots = []
+        if self.max_open_positions is not None:
+            slots.append(self.max_open_positions - open_position_count)
+        if self.max_new_trades_per_cycle is not None:
+            slots.append(self.max_new_trades_per_cycle)
+        return max(0, min(slots)) if slots else None
+
+    def run(self, candidates, open_position_count=0):
+        """
+        Runs the signal, consensus and risk gates, then reviews the survivors in one batch.
+
+        :param candidates: Dicts with token, allora_signal, allora_diff, current_price,
+                           prediction, custom_signal and trade_data.
+        :param open_position_count: Positions already open before this cycle.
+        :return: List of (candidate, signal, review) for every reviewed candidate.
+        """
+        survivors = []
+        for candidate in candidates:
+            if not self.record('signal', candidate['allora_signal'] in ("BUY", "SELL")):
+                continue
+            signal = self.resolve_signal(candidate['allora_signal'], candidate['custom_signal'])
+            if not self.record('consensus', signal is not None):
+                logger.debug("No trading opportunity for %s, signal: HOLD", candidate['token'])
+                continue
+            survivors.append((candidate, signal))
+
+        # Strongest predicted moves get the available position slots first
+        slots = self.slots_available(open_position_count)
+        if slots is not None:
+            survivors.sort(key=lambda item: abs(item[0]['allora_diff']), reverse=True)
+        admitted = []
+        for candidate, signal in survivors:
+            if self.record('risk_limits', slots is None or len(admitted) < slots):
+                admitted.append((candidate, signal))
+
+        with metrics.timed("cycle_stage_seconds", stage="review"):
+            reviews = self.reviewer.review_trades([candidate['trade_data'] for candidate, _ in admitted])
+        results = []
+        for (candidate, signal), review in zip(admitted, reviews):
+            self.record('review', bool(review.get('approval')) and review.get('confidence', 0) > 70)
+            results.append((candidate, signal, review))
+        return results
+
+    def report(self):
+        """
+        Per-stage counters plus the estimated LLM time saved by each gate's drops.
+        """
+        trades = self.reviewer.llm_trades
+        seconds_per_review = self.reviewer.llm_seconds / trades if trades else 0.0
+        report = {}
+        for stage, counters in self.stats.items():
+            report[stage] = dict(counters)
+            if stage in self.GATES:
+                report[stage]['llm_seconds_saved'] = round(counters['dropped'] * seconds_per_review, 3)
+        report['llm'] = {
+            'calls': self.reviewer.llm_calls,
+            'trades_reviewed': trades,
+            'seconds': round(self.reviewer.llm_seconds, 3),
+            'cache_hits': self.reviewer.cache.hits
+        }
+        return report
@@ -0,0 +1,145 @@
+import threading
+import time
+from utils import metrics
+
+
+class InferenceCache:
+    def __init__(self, epoch_seconds=300, min_refresh_seconds=30, topic_epochs=None):
+        """
+        Epoch-aware cache of Allora inferences keyed by topic ID.
+
+        Allora only publishes a new network inference when a topic's epoch ends, so an entry
+        stays valid until the next expected epoch boundary after the inference timestamp.
+
+        :param epoch_seconds: Default epoch length for topics without an explicit value.
+        :param min_refresh_seconds: Minimum wait before refetching when the API is behind
+                                    its own epoch (the next boundary is already in the past).
+        :param topic_epochs: Optional dictionary mapping topic IDs to their epoch length.
+        """
+        self.epoch_seconds = epoch_seconds
+        self.min_refresh_seconds = min_refresh_seconds
+        self.topic_epochs = dict(topic_epochs or {})
+        self.hits = 0
+        self.misses = 0
+        self._entries = {}
+        self._lock = threading.Lock()
+        self._topic_locks = {}
+
+    @staticmethod
+    def _inference_timestamp(raw):
+        """
+        Extracts the inference timestamp (unix seconds) from a raw Allora response, if present.
+        """
+        try:
+            timestamp = float(raw['data']['inference_data']['timestamp'])
+        except (KeyError, TypeError, ValueError):
+            return None
+        # Some responses carry milliseconds
+        return timestamp / 1000 if timestamp > 1e12 else timestamp
+
+    def _next_refresh_at(self, topic_id, fetched_at, inference_ts):
+        epoch = self.topic_epochs.get(topic_id, self.epoch_seconds)
+        if inference_ts is None:
+            return fetched_at + epoch
+        next_epoch = inference_ts + epoch
+        if next_epoch <= fetched_at:
+            return fetched_at + self.min_refresh_seconds
+        return next_epoch
+
+    def _topic_lock(self, topic_id):
+        with self._lock:
+            lock = self._topic_locks.get(topic_id)
+            if lock is None:
+                lock = self._topic_locks[topic_id] = threading.Lock()
+            return lock
+
+    def put(self, topic_id, prediction, raw=None):
+        """
+        Stores a fetched prediction together with its fetch time and inference timestamp.
+        A failed fetch (prediction None) is stored as a negative entry for min_refresh_seconds,
+        so the topic is tried at most once per cycle; peek() keeps the last good prediction.
+        """
+        fetched_at = time.time()
+        if prediction is None:
+            with self._lock:
+                previous = self._entries.get(topic_id)
+                self._entries[topic_id] = {
+                    'prediction': None,
+                    'last_prediction': previous['last_prediction'] if previous else None,
+                    'fetched_at': fetched_at,
+                    'inference_timestamp': None,
+                    'refresh_at': fetched_at + self.min_refresh_seconds
+                }
+            return
+        inference_ts = self._inference_timestamp(raw)
+        entry = {
+            'prediction': prediction,
+            'last_prediction': prediction,
+            'fetched_at': fetched_at,
+            'inference_timestamp': inference_ts,
+            'refresh_at': self._next_refresh_at(topic_id, fetched_at, inference_ts)
+        }
+        with self._lock:
+            self._entries[topic_id] = entry
+
+    def _lookup(self, topic_id):
+        """
+        :return: (fresh, prediction); fresh with a None prediction is a recent failed fetch.
+        """
+        with self._lock:
+            entry = self._entries.get(topic_id)
+            if entry is not None and time.time() < entry['refresh_at']:
+                if entry['prediction'] is None:
+                    metrics.inc("inference_cache_requests", result="negative")
+                    return True, None
+                self.hits += 1
+                metrics.inc("inference_cache_requests", result="hit")
+                return True, entry['prediction']
+            self.misses += 1
+            metrics.inc("inference_cache_requests", result="miss")
+            return False, None
+
+    def get(self, topic_id):
+        """
+        Returns the cached prediction if the topic's next epoch has not started yet, else None.
+        """
+        return self._lookup(topic_id)[1]
+
+    def peek(self, topic_id):
+        """
+        Returns the last known prediction regardless of freshness, without touching the counters.
+        """
+        with self._lock:
+            entry = self._entries.get(topic_id)
+            return entry['last_prediction'] if entry else None
+
+    def stale_topics(self, topic_ids):
+        """
+        Filters a {token: topic_id} mapping down to the topics that need a refetch.
+        """
+        now = time.time()
+        with self._lock:
+            return {token: topic_id for token, topic_id in topic_ids.items()
+                    if topic_id not in self._entries or now >= self._entries[topic_id]['refresh_at']}
+
+    def get_or_fetch(self, topic_id, fetch):
+        """
+        Returns the cached prediction or calls fetch() once for concurrent callers of the same topic.
+        A recent failed fetch returns None without calling fetch() again.
+
+        :param fetch: Callable returning (prediction, raw_response).
+        """
+        fresh, prediction = self._lookup(topic_id)
+        if fresh:
+            return prediction
+        with self._topic_lock(topic_id):
+            # Another caller may have fetched while we waited for the lock
+            fresh, prediction = self._lookup(topic_id)
+            if fresh:
+                return prediction
+            prediction, raw = fetch()
+            self.put(topic_id, prediction, raw)
+            return prediction
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses}
@@ -0,0 +1,101 @@
+import asyncio
+import logging
+import random
+import aiohttp
+from utils import metrics
+from utils.constants import ALLORA_API_BASE_URL
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncInferenceFetcher:
+    def __init__(self, allora_upshot_key, base_url=ALLORA_API_BASE_URL, timeout=5, max_retries=3,
+                 max_concurrency=10, backoff_base=0.5, backoff_max=8.0):
+        """
+        Fetches Allora inferences for many topics concurrently over one pooled HTTP session.
+
+        :param allora_upshot_key: Allora (Upshot) API key.
+        :param timeout: Per-request timeout in seconds.
+        :param max_retries: Attempts per topic before giving up.
+        :param max_concurrency: Maximum number of requests in flight at once.
+        :param backoff_base: First retry delay in seconds, doubled on every attempt.
+        :param backoff_max: Upper bound for a single retry delay.
+        """
+        self.allora_upshot_key = allora_upshot_key
+        self.base_url = base_url
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.max_concurrency = max_concurrency
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+    def _url(self, topic_id):
+        return f'{self.base_url}ethereum-11155111?allora_topic_id={topic_id}'
+
+    def _backoff(self, attempt):
+        # Full jitter: sleep anywhere between 0 and the capped exponential delay
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    async def _fetch_one(self, session, semaphore, topic_id):
+        """
+        Returns (prediction, raw_response) for a topic, or (None, None) once retries are exhausted.
+        """
+        for attempt in range(self.max_retries):
+            try:
+                async with semaphore:
+                    with metrics.timed("allora_request_seconds", client="async"):
+                        async with session.get(self._url(topic_id)) as response:
+                            response.raise_for_status()
+                            data = await response.json(content_type=None)
+                prediction = float(data['data']['inference_data']['network_inference_normalized'])
+                return prediction, data
+            except (aiohttp.ClientError, asyncio.TimeoutError, KeyError, TypeError, ValueError) as e:
+                logger.warning("Topic %s attempt %d failed: %s", topic_id, attempt + 1, e)
+                if attempt < self.max_retries - 1:
+                    metrics.inc("allora_retries", client="async")
+                    await asyncio.sleep(self._backoff(attempt))
+        metrics.inc("allora_failures", client="async")
+        logger.error("Max retries reached for topic %s, could not fetch data", topic_id)
+        return None, None
+
+    async def fetch_raw(self, topic_ids):
+        """
+        Fetches every topic concurrently.
+
+        :param topic_ids: Dictionary mapping tokens to topic IDs.
+        :return: Dictionary mapping tokens to (prediction, raw_response) tuples.
+        """
+        if not topic_ids:
+            return {}
+        headers = {
+            'accept': 'application/json',
+            'x-api-key': self.allora_upshot_key
+        }
+        timeout = aiohttp.ClientTimeout(total=self.timeout)
+        connector = aiohttp.TCPConnector(limit=self.max_concurrency)
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        async with aiohttp.ClientSession(headers=headers, timeout=timeout, connector=connector) as session:
+            tokens = list(topic_ids.keys())
+            results = await asyncio.gather(
+                *(self._fetch_one(session, semaphore, topic_ids[token]) for token in tokens)
+            )
+        return dict(zip(tokens, results))
+
+    async def fetch_all(self, topic_ids):
+        """
+        Returns {token: prediction} for every topic; failed topics map to None.
+        """
+        raw = await self.fetch_raw(topic_ids)
+        return {token: prediction for token, (prediction, _) in raw.items()}
+
+    def fetch_raw_sync(self, topic_ids):
+        """
+        Blocking wrapper around fetch_raw for the synchronous trading loop.
+        """
+        return asyncio.run(self.fetch_raw(topic_ids))
+
+    def fetch_all_sync(self, topic_ids):
+        """
+        Blocking wrapper around fetch_all for the synchronous trading loop.
+        """
+        return asyncio.run(self.fetch_all(topic_ids))
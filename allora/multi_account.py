@@ -0,0 +1,118 @@
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from allora.decision_pipeline import DecisionPipeline
+from allora.scheduler import TradeScheduler
+from utils import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class MultiAccountRunner:
+    def __init__(self, signal_mind, minds, names=None, max_workers=None, poll_interval=None):
+        """
+        Trades several accounts or vaults from one process and one market-data feed.
+
+        - Every AlloraMind shares the same MarketDataCache, InferenceCache, fetcher and
+          DeepSeekReviewer, so prices, predictions and reviews are fetched once per cycle
+        - Signals and the custom strategy run once per cycle on signal_mind, which covers
+          every account's topics and never trades; the candidates are handed to every account
+        - Each account keeps its own OrderManager, open-position gate and risk limits; its
+          order and exit work is dispatched to a thread pool
+
+        :param signal_mind: AlloraMind built on the shared caches with the union of all topics.
+        :param minds: One AlloraMind per account, all built on the shared caches.
+        :param names: Optional account names used in log lines.
+        :param max_workers: Thread pool size (default: one thread per account).
+        :param poll_interval: Optional REST poll interval for the per-account exit fast path.
+        """
+        if not minds:
+            raise ValueError("MultiAccountRunner needs at least one account")
+        self.signal_mind = signal_mind
+        self.minds = minds
+        self.names = names or [mind.manager.vault_address for mind in minds]
+        self.poll_interval = poll_interval
+        self.executor = ThreadPoolExecutor(max_workers=max_workers or len(minds), thread_name_prefix="account")
+        self._stop = threading.Event()
+        self._schedulers = []
+
+    @metrics.timed_function("cycle_seconds")
+    def run_cycle(self):
+        logger.info("Running trading cycle for %d accounts", len(self.minds))
+        # Shared snapshots are dropped once; each manager drops its own position snapshot
+        for mind in self.minds:
+            mind.manager.refresh_market_data()
+
+        signal_mind = self.signal_mind
+        signal_mind.prefetch_inferences()
+        candidates = signal_mind.build_candidates(list(signal_mind.topic_ids))
+
+        # Review once what any account will review; the accounts then hit the verdict cache
+        reviewable = self._reviewable_trades(candidates)
+        if reviewable:
+            signal_mind.deepseek_reviewer.review_trades(reviewable)
+
+        futures = {self.executor.submit(self._run_account, mind, candidates): name
+                   for mind, name in zip(self.minds, self.names)}
+        for future, name in futures.items():
+            try:
+                future.result()
+            except Exception as e:
+                logger.exception("Trading cycle failed for account %s: %s", name, e)
+
+    def _reviewable_trades(self, candidates):
+        """
+        Trade payloads the account pipelines will send for review this cycle: agreeing
+        signals for tokens an account trades and does not hold, strongest moves first,
+        cut to that account's free position slots.
+        """
+        resolved = [candidate for candidate in candidates
+                    if DecisionPipeline.resolve_signal(candidate['allora_signal'], candidate['custom_signal'])]
+        selected = {}
+        for mind, name in zip(self.minds, self.names):
+            try:
+                positions = mind.manager.get_open_positions()
+            except Exception as e:
+                logger.warning("Skipping review prefetch for account %s: %s", name, e)
+                continue
+            held = {position['coin'] for position in positions}
+            openable = [candidate for candidate in resolved
+                        if candidate['token'] in mind.topic_ids and candidate['token'] not in held]
+            slots = mind.pipeline.slots_available(len(positions))
+            if slots is not None:
+                openable = sorted(openable, key=lambda candidate: abs(candidate['allora_diff']), reverse=True)[:slots]
+            for candidate in openable:
+                selected[candidate['token']] = candidate['trade_data']
+        return list(selected.values())
+
+    def _run_account(self, mind, candidates):
+        mind.trade_candidates(candidates, check_positions=True)
+        mind.monitor_positions()
+
+    def start(self, interval=180):
+        """
+        Runs cycles every `interval` seconds; exits are also re-checked on price ticks per account.
+        """
+        for mind in self.minds:
+            scheduler = TradeScheduler(mind, interval, poll_interval=self.poll_interval)
+            scheduler.start_fast_path()
+            self._schedulers.append(scheduler)
+        try:
+            while not self._stop.is_set():
+                started = time.monotonic()
+                self.run_cycle()
+                for mind, name in zip(self.minds, self.names):
+                    logger.info("Decision pipeline [%s]: %s", name, mind.pipeline.report())
+                sleep_for = max(0.0, interval - (time.monotonic() - started))
+                logger.info("Sleeping for %.0f seconds", sleep_for)
+                self._stop.wait(sleep_for)
+        finally:
+            self.stop()
+
+    def stop(self):
+        self._stop.set()
+        for scheduler in self._schedulers:
+            scheduler.stop()
+        self._schedulers = []
+        self.executor.shutdown(wait=False)
@@ -0,0 +1,88 @@
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class TradeScheduler:
+    def __init__(self, mind, interval, poll_interval=None):
+        """
+        Splits the bot into a slow and a fast path.
+
+        - Slow path (every `interval` seconds): inference prefetch at the topic epoch,
+          open_trade and the full monitor_positions pass
+        - Fast path: AlloraMind.check_exits on every streamed price update, using the
+          predictions already cached for the current epoch; ticks that arrive while a
+          check is running are coalesced into the next one
+
+        Without a live market stream the fast path only runs if poll_interval is set,
+        in which case mids are polled over REST at that cadence.
+
+        :param mind: AlloraMind instance to drive.
+        :param interval: Seconds between slow-path cycles.
+        :param poll_interval: Optional seconds between REST polls when not streaming.
+        """
+        self.mind = mind
+        self.interval = interval
+        self.poll_interval = poll_interval
+        self._pending_mids = None
+        self._tick = threading.Condition()
+        self._stop = threading.Event()
+        self._exit_worker = None
+
+    def on_price_update(self, mids):
+        """
+        Listener for MarketStream mid updates; runs on the websocket thread, so it only
+        hands the tick over to the exit worker.
+        """
+        with self._tick:
+            self._pending_mids = mids
+            self._tick.notify()
+
+    def _exit_loop(self):
+        while not self._stop.is_set():
+            with self._tick:
+                if self._pending_mids is None:
+                    self._tick.wait(timeout=self.poll_interval or 1.0)
+                mids, self._pending_mids = self._pending_mids, None
+            if mids is None:
+                if self.poll_interval is None or self._stream_live():
+                    continue
+                # REST fallback: one all_mids request per poll, shared by all positions
+                mids = self.mind.manager.market_data.all_mids()
+            try:
+                self.mind.check_exits({coin: float(px) for coin, px in mids.items()})
+            except Exception as e:
+                logger.exception("Exit check failed: %s", e)
+
+    def _stream_live(self):
+        stream = self.mind.manager.market_stream
+        return stream is not None and stream.is_live()
+
+    def start_fast_path(self):
+        stream = self.mind.manager.market_stream
+        if stream is not None:
+            stream.add_listener(self.on_price_update)
+        self._exit_worker = threading.Thread(target=self._exit_loop, name="exit-monitor", daemon=True)
+        self._exit_worker.start()
+
+    def stop(self):
+        self._stop.set()
+        stream = self.mind.manager.market_stream
+        if stream is not None:
+            stream.remove_listener(self.on_price_update)
+        with self._tick:
+            self._tick.notify()
+
+    def run(self):
+        self.start_fast_path()
+        try:
+            while not self._stop.is_set():
+                started = time.monotonic()
+                self.mind.run_cycle()
+                sleep_for = max(0.0, self.interval - (time.monotonic() - started))
+                logger.info("Sleeping for %.0f seconds", sleep_for)
+                self._stop.wait(sleep_for)
+        finally:
+            self.stop()
@@ -0,0 +1,244 @@
+import bisect
+import hashlib
+import logging
+import multiprocessing
+import queue
+import threading
+import time
+from allora.scheduler import TradeScheduler
+from utils import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class ConsistentHashRing:
+    def __init__(self, nodes, replicas=100):
+        """
+        Maps keys to nodes so that adding or removing a node only moves about 1/N of the keys.
+
+        :param nodes: Node identifiers (e.g. shard numbers).
+        :param replicas: Virtual points per node; more points give a more even spread.
+        """
+        self.replicas = replicas
+        self._ring = sorted(
+            (self._hash(f"{node}#{replica}"), node)
+            for node in nodes
+            for replica in range(replicas)
+        )
+        self._points = [point for point, _ in self._ring]
+
+    @staticmethod
+    def _hash(key):
+        return int.from_bytes(hashlib.md5(str(key).encode()).digest()[:8], 'big')
+
+    def node_for(self, key):
+        if not self._ring:
+            raise ValueError("Hash ring has no nodes")
+        index = bisect.bisect(self._points, self._hash(key)) % len(self._ring)
+        return self._ring[index][1]
+
+    def assign(self, keys):
+        """
+        Returns {node: [keys]} for every node that received at least one key.
+        """
+        assignment = {}
+        for key in keys:
+            assignment.setdefault(self.node_for(key), []).append(key)
+        return assignment
+
+
+def shard_worker(shard_id, topic_ids, settings, tasks, results):
+    """
+    Worker process: runs the signal, strategy and review pipeline for its shard of topics
+    and sends approved order intents back to the coordinator. Never places orders.
+
+    Each task is (cycle, open_coins); each result is
+    (shard_id, cycle, intents, {token: prediction}, writes, metrics, error). Database writes
+    are not made here but forwarded to the coordinator (writes, from ForwardingDatabase), so
+    only one process writes to the SQLite file; on shutdown a last result with cycle
+    None carries the final price-window snapshots. With settings['metrics'], the latency
+    histograms and counters recorded during the cycle (metrics.drain()) are merged into
+    the coordinator's registry, which serves and dumps them.
+    """
+    from hyperliquid.info import Info
+    from core.orders import OrderManager
+    from allora.allora_mind import AlloraMind
+    from database.db_manager import ForwardingDatabase
+    from strategy.custom_strategy import volatility_strategy
+    from utils.logging_setup import setup_logging
+
+    # Spawned processes start without the parent's log handlers
+    if settings.get('logging'):
+        setup_logging(**settings['logging'])
+    # Nor the parent's metrics switch
+    metrics.enable(bool(settings.get('metrics')))
+    info = Info(settings['base_url'], skip_ws=True)
+    db = ForwardingDatabase(settings['db_path'])
+    volatility_strategy.db = db
+    # Only used for price lookups; orders go through the coordinator's gateway
+    reader = OrderManager(None, settings['address'], settings['allowed_amount_per_trade'],
+                          settings['max_leverage'], info)
+    mind = AlloraMind(reader, settings['allora_upshot_key'], settings['deepseek_api_key'],
+                      threshold=settings['price_gap'], db=db)
+    mind.set_topic_ids(topic_ids)
+    volatility_strategy.warm_start(list(topic_ids), info, interval_seconds=settings['check_for_trades'])
+    logger.info("Shard %s started with %d topics", shard_id, len(topic_ids))
+
+    while True:
+        task = tasks.get()
+        if task is None:
+            break
+        cycle, open_coins = task
+        try:
+            reader.refresh_market_data()
+            mind.prefetch_inferences()
+            candidates = mind.build_candidates([token for token in topic_ids if token not in open_coins])
+            intents = []
+            for candidate, signal, review in mind.pipeline.run(candidates):
+                order = mind.approved_order(candidate, signal, review)
+                if order is not None:
+                    intents.append({'token': order[0], 'is_buy': order[1], 'allora_diff': candidate['allora_diff'],
+                                    'current_price': candidate['current_price'],
+                                    'prediction': candidate['prediction']})
+            predictions = {token: mind.inference_cache.peek(topic_id) for token, topic_id in topic_ids.items()}
+            results.put((shard_id, cycle, intents, predictions, db.drain(), metrics.drain(), None))
+        except Exception as e:
+            results.put((shard_id, cycle, [], {}, db.drain(), metrics.drain(), str(e)))
+    volatility_strategy.persist_price_history()
+    results.put((shard_id, None, [], {}, db.drain(), metrics.drain(), None))
+    db.close()
+
+
+class ShardCoordinator:
+    def __init__(self, mind, gateway, topic_ids, worker_settings, workers=2, cycle_timeout=None, poll_interval=None):
+        """
+        Spreads topics over worker processes by consistent hashing and funnels their order
+        intents through one OrderGateway.
+
+        - Workers each own a disjoint shard of tokens: inference fetch, strategy, DeepSeek
+          review and logging run in parallel processes, outside this process's GIL
+        - The coordinator owns the exchange connection: it admits intents against the global
+          exposure limits, submits them in one bulk order and monitors exits with the
+          predictions the workers report
+        - A worker that dies is restarted with the same shard on the next cycle
+
+        :param mind: Coordinator AlloraMind (the trading account); used for exits only.
+        :param gateway: OrderGateway wrapping mind.manager.
+        :param topic_ids: Dictionary mapping every token to its topic ID.
+        :param worker_settings: Picklable dict with base_url, address, allowed_amount_per_trade,
+                                max_leverage, allora_upshot_key, deepseek_api_key, price_gap,
+                                check_for_trades, db_path (of mind.db, which applies the
+                                workers' writes) and optionally logging (setup_logging kwargs)
+                                and metrics (True to collect the workers' metrics here).
+        :param workers: Number of worker processes.
+        :param cycle_timeout: Seconds to wait for worker results each cycle.
+        """
+        self.mind = mind
+        self.gateway = gateway
+        self.topic_ids = dict(topic_ids)
+        self.worker_settings = worker_settings
+        self.cycle_timeout = cycle_timeout
+        self.poll_interval = poll_interval
+        self.ring = ConsistentHashRing(range(workers))
+        self.shards = {shard_id: {token: self.topic_ids[token] for token in tokens}
+                       for shard_id, tokens in self.ring.assign(sorted(self.topic_ids)).items()}
+        self._context = multiprocessing.get_context("spawn")
+        self._results = self._context.Queue()
+        self._workers = {}
+        self._cycle = 0
+        self._stop = threading.Event()
+        self.mind.set_topic_ids(self.topic_ids)
+
+    def _start_worker(self, shard_id):
+        tasks = self._context.Queue()
+        process = self._context.Process(
+            target=shard_worker, name=f"shard-{shard_id}", daemon=True,
+            args=(shard_id, self.shards[shard_id], self.worker_settings, tasks, self._results))
+        process.start()
+        self._workers[shard_id] = (process, tasks)
+
+    def start_workers(self):
+        for shard_id in self.shards:
+            self._start_worker(shard_id)
+        logger.info("Started %d shard workers: %s", len(self.shards),
+                    {shard_id: len(tokens) for shard_id, tokens in self.shards.items()})
+
+    @metrics.timed_function("cycle_seconds")
+    def run_cycle(self, timeout):
+        self._cycle += 1
+        self.mind.manager.refresh_market_data()
+        open_coins = set(self.mind.manager.list_open_positions())
+        for shard_id in self.shards:
+            process, _ = self._workers.get(shard_id, (None, None))
+            if process is None or not process.is_alive():
+                logger.warning("Shard %s worker is not running, restarting it", shard_id)
+                self._start_worker(shard_id)
+            self._workers[shard_id][1].put((self._cycle, open_coins))
+
+        intents = []
+        pending = set(self.shards)
+        waited = time.perf_counter()
+        deadline = time.monotonic() + timeout
+        while pending:
+            try:
+                shard_id, cycle, shard_intents, predictions, writes, shard_metrics, error = self._results.get(
+                    timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                logger.warning("No result from shards %s this cycle", sorted(pending))
+                break
+            # Log rows and metrics are kept even when the rest of a late result is dropped
+            self.mind.db.apply_forwarded(writes)
+            metrics.merge(shard_metrics)
+            if cycle != self._cycle:
+                continue  # late answer from a previous cycle
+            pending.discard(shard_id)
+            if error:
+                logger.error("Shard %s failed: %s", shard_id, error)
+            for token, prediction in predictions.items():
+                if prediction is not None:
+                    self.mind.inference_cache.put(self.topic_ids[token], prediction)
+            intents.extend(shard_intents)
+        metrics.observe("cycle_stage_seconds", time.perf_counter() - waited, stage="shards")
+
+        with metrics.timed("cycle_stage_seconds", stage="submit"):
+            for result in self.gateway.submit(intents):
+                logger.info("Order result: %s", result)
+        with metrics.timed("cycle_stage_seconds", stage="monitor"):
+            self.mind.monitor_positions()
+        logger.info("Order gateway: %s", self.gateway.stats())
+
+    def run(self, interval=180):
+        self.start_workers()
+        scheduler = TradeScheduler(self.mind, interval, poll_interval=self.poll_interval)
+        scheduler.start_fast_path()
+        try:
+            while not self._stop.is_set():
+                started = time.monotonic()
+                self.run_cycle(self.cycle_timeout or interval * 0.8)
+                sleep_for = max(0.0, interval - (time.monotonic() - started))
+                logger.info("Sleeping for %.0f seconds", sleep_for)
+                self._stop.wait(sleep_for)
+        finally:
+            scheduler.stop()
+            self.stop()
+
+    def stop(self, timeout=5):
+        self._stop.set()
+        for process, tasks in self._workers.values():
+            tasks.put(None)
+        # Apply the writes each worker sends on its way out (cycle None)
+        running = set(self._workers)
+        deadline = time.monotonic() + timeout
+        while running:
+            try:
+                shard_id, cycle, _, _, writes, shard_metrics, _ = self._results.get(
+                    timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                break
+            self.mind.db.apply_forwarded(writes)
+            metrics.merge(shard_metrics)
+            if cycle is None:
+                running.discard(shard_id)
+        for process, _ in self._workers.values():
+            process.join(timeout=max(0.0, deadline - time.monotonic()))
+        self._workers = {}
@@ -1,51 +1,256 @@
-from database.db_manager import DatabaseManager
+from database.db_manager import get_database
 import pandas as pd
 import numpy as np
 
 class PerformanceAnalyzer:
-    def __init__(self):
-        self.db = DatabaseManager()
-    
+    STATE_NAME = 'performance_analyzer'
+    PARTIAL_COLUMNS = ['row_count', 'pnl_count', 'pnl_mean', 'pnl_m2', 'diff_count', 'diff_mean',
+                       'buffer_hits', 'lag_count', 'lag_mean']
+
+    def __init__(self, db=None, buffer_percent=3.0):
+        self.db = db or get_database()
+        self.buffer_percent = buffer_percent
+
     def analyze_results(self):
         """
         Enhanced analysis including trend and prediction buffer impact
+
+        Runs incrementally with two high-water marks: rows logged since the last run
+        (id) contribute counts, prediction diffs and buffer hits; rows closed since the
+        last run (result_seq, set by update_trade_result) contribute P/L and lag. Both
+        are folded into per (market_condition, trend) running aggregates (count, mean,
+        M2) and persisted together with the new marks.
         """
         conn = self.db.get_connection()
-        df = pd.read_sql_query("""
-            SELECT * FROM trade_logs
-        """, conn)
-        
-        # Analyze trades by trend
-        trend_analysis = df.groupby(['market_condition', 'trend']).agg({
-            'id': 'count',
-            'profit_loss_percent': ['mean', 'std'],
-            'prediction_diff': 'mean'
+        last_id, last_result_seq = self._load_high_water_marks(conn)
+        opened = pd.read_sql_query("""
+            SELECT id, market_condition, trend, prediction_difference_percent
+            FROM trade_logs
+            WHERE id > ?
+            ORDER BY id
+        """, conn, params=(last_id,))
+        closed = pd.read_sql_query("""
+            SELECT result_seq, market_condition, trend, profit_loss_percent, prediction_lag
+            FROM trade_logs
+            WHERE result_seq > ?
+            ORDER BY result_seq
+        """, conn, params=(last_result_seq,))
+
+        if not opened.empty or not closed.empty:
+            partial = self._aggregate(opened, closed)
+            marks = (last_id, last_result_seq)
+            new_marks = (int(opened['id'].max()) if not opened.empty else last_id,
+                         int(closed['result_seq'].max()) if not closed.empty else last_result_seq)
+            self.db.transaction(
+                lambda write_conn: self._merge_aggregates(write_conn, partial, marks, new_marks)
+            )
+
+        aggregates = pd.read_sql_query("SELECT * FROM analysis_aggregates", conn)
+        return self._build_results(aggregates)
+
+    def _load_high_water_marks(self, conn):
+        row = conn.execute(
+            "SELECT last_id, last_result_seq FROM analysis_state WHERE name = ?", (self.STATE_NAME,)
+        ).fetchone()
+        return tuple(row) if row else (0, 0)
+
+    @staticmethod
+    def _group(df):
+        return df.assign(
+            market_condition=df['market_condition'].fillna('N/A'),
+            trend=df['trend'].fillna('N/A')
+        ).groupby(['market_condition', 'trend'])
+
+    def _aggregate(self, opened, closed):
+        """
+        Per-group partial aggregates: row count, prediction diff mean and buffer hits of
+        newly logged rows; count, mean and M2 (sum of squared deviations) of P/L and the
+        lag mean of newly closed rows.
+        """
+        parts = []
+        if not opened.empty:
+            grouped = self._group(opened.assign(
+                buffer_hit=opened['prediction_difference_percent'].abs() >= self.buffer_percent))
+            parts.append(pd.DataFrame({
+                'row_count': grouped.size(),
+                'diff_count': grouped['prediction_difference_percent'].count(),
+                'diff_mean': grouped['prediction_difference_percent'].mean(),
+                'buffer_hits': grouped['buffer_hit'].sum(),
+            }))
+        if not closed.empty:
+            grouped = self._group(closed)
+            pnl = grouped['profit_loss_percent']
+            pnl_count = pnl.count()
+            parts.append(pd.DataFrame({
+                'pnl_count': pnl_count,
+                'pnl_mean': pnl.mean(),
+                'pnl_m2': pnl.var(ddof=0) * pnl_count,
+                'lag_count': grouped['prediction_lag'].count(),
+                'lag_mean': grouped['prediction_lag'].mean(),
+            }))
+        partial = pd.concat(parts, axis=1).reindex(columns=self.PARTIAL_COLUMNS)
+        return partial.fillna(0.0)
+
+    @staticmethod
+    def _merge_moments(n_a, mean_a, m2_a, n_b, mean_b, m2_b):
+        """
+        Chan et al. parallel merge of two (count, mean, M2) summaries.
+        """
+        n = n_a + n_b
+        if n == 0:
+            return 0, 0.0, 0.0
+        delta = mean_b - mean_a
+        mean = mean_a + delta * n_b / n
+        m2 = m2_a + m2_b + delta * delta * n_a * n_b / n
+        return n, mean, m2
+
+    def _merge_aggregates(self, conn, partial, marks, new_marks):
+        # Another run may have advanced the marks since we read them; never fold rows twice
+        if self._load_high_water_marks(conn) != marks:
+            return
+
+        for (condition, trend), new in partial.iterrows():
+            row = conn.execute("""
+                SELECT row_count, pnl_count, pnl_mean, pnl_m2, diff_count, diff_mean,
+                       buffer_hits, lag_count, lag_mean
+                FROM analysis_aggregates WHERE market_condition = ? AND trend = ?
+            """, (condition, trend)).fetchone() or (0, 0, 0.0, 0.0, 0, 0.0, 0, 0, 0.0)
+            row_count, pnl_count, pnl_mean, pnl_m2, diff_count, diff_mean, buffer_hits, lag_count, lag_mean = row
+
+            pnl_count, pnl_mean, pnl_m2 = self._merge_moments(
+                pnl_count, pnl_mean, pnl_m2, int(new['pnl_count']), new['pnl_mean'], new['pnl_m2'])
+            diff_count, diff_mean, _ = self._merge_moments(
+                diff_count, diff_mean, 0.0, int(new['diff_count']), new['diff_mean'], 0.0)
+            lag_count, lag_mean, _ = self._merge_moments(
+                lag_count, lag_mean, 0.0, int(new['lag_count']), new['lag_mean'], 0.0)
+
+            conn.execute("""
+                INSERT OR REPLACE INTO analysis_aggregates (
+                    market_condition, trend, row_count, pnl_count, pnl_mean, pnl_m2,
+                    diff_count, diff_mean, buffer_hits, lag_count, lag_mean
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, (condition, trend, row_count + int(new['row_count']), pnl_count, pnl_mean, pnl_m2,
+                  diff_count, diff_mean, buffer_hits + int(new['buffer_hits']), lag_count, lag_mean))
+
+        conn.execute(
+            "INSERT OR REPLACE INTO analysis_state (name, last_id, last_result_seq) VALUES (?, ?, ?)",
+            (self.STATE_NAME, *new_marks)
+        )
+
+    def _build_results(self, aggregates):
+        if aggregates.empty:
+            return {
+                'trend_analysis': pd.DataFrame(),
+                'buffer_effectiveness': float('nan'),
+                'avg_prediction_lag': float('nan')
+            }
+
+        aggregates = aggregates.set_index(['market_condition', 'trend']).sort_index()
+        pnl_std = np.sqrt(aggregates['pnl_m2'] / (aggregates['pnl_count'] - 1).where(aggregates['pnl_count'] > 1))
+        trend_analysis = pd.DataFrame({
+            'count': aggregates['row_count'],
+            'profit_loss_mean': aggregates['pnl_mean'].where(aggregates['pnl_count'] > 0),
+            'profit_loss_std': pnl_std,
+            'prediction_diff_mean': aggregates['diff_mean'].where(aggregates['diff_count'] > 0)
         }).round(4)
-        
-        # Analyze prediction accuracy vs buffer
-        buffer_analysis = df.apply(
-            lambda row: abs(row['prediction_diff']) >= 3.0,  # 3% buffer
-            axis=1
-        ).mean()
-        
+
+        lag_total = aggregates['lag_count'].sum()
         results = {
             'trend_analysis': trend_analysis,
-            'buffer_effectiveness': buffer_analysis,
-            'avg_prediction_lag': df['prediction_lag'].mean()
+            'buffer_effectiveness': aggregates['buffer_hits'].sum() / aggregates['row_count'].sum(),
+            'avg_prediction_lag': (
+                (aggregates['lag_mean'] * aggregates['lag_count']).sum() / lag_total if lag_total else float('nan')
+            )
         }
-        
+
         return results
-    
+
     def _calculate_prediction_lag(self, prediction, entry_price, exit_price):
         """
         Quantifies how far behind Allora's predictions are:
         - Compares predicted price movement vs actual movement
         - Larger differences indicate Allora is "chasing" the price
         - Critical for proving Allora is reactive during volatility
+        - Works element-wise on NumPy arrays as well as on scalars
         """
         actual_move = (exit_price - entry_price) / entry_price
         predicted_move = (prediction - entry_price) / entry_price
-        return abs(actual_move - predicted_move)
+        return np.abs(actual_move - predicted_move)
+
+    # Volatility groups reported by generate_report, keyed by the market_condition logged
+    # by VolatilityStrategy
+    REPORT_GROUPS = {
+        'high_volatility': 'HIGH_VOLATILITY',
+        'normal_volatility': 'NORMAL'
+    }
+
+    def report_aggregates(self, chunksize=50000):
+        """
+        Streams trade_logs in fixed-size chunks and merges per-chunk partial aggregates,
+        so memory stays bounded regardless of the table size.
+        :return: Dictionary with one entry per REPORT_GROUPS key plus 'avg_prediction_lag'.
+        """
+        totals = {name: {
+            'total_trades': 0, 'result_count': 0, 'wins': 0, 'loss_count': 0,
+            'loss_sum': 0.0, 'max_loss': np.nan, 'volatility_count': 0, 'volatility_sum': 0.0
+        } for name in self.REPORT_GROUPS}
+        lag_count, lag_sum = 0, 0.0
+
+        conn = self.db.get_connection()
+        chunks = pd.read_sql_query("""
+            SELECT market_condition, profit_loss_percent, volatility_24h,
+                   allora_prediction, entry_price, exit_price
+            FROM trade_logs
+            WHERE market_condition IN ({})
+        """.format(', '.join('?' * len(self.REPORT_GROUPS))),
+            conn, params=tuple(self.REPORT_GROUPS.values()), chunksize=chunksize)
+
+        for chunk in chunks:
+            conditions = chunk['market_condition'].to_numpy()
+            pnl = chunk['profit_loss_percent'].to_numpy(dtype=float)
+            volatility = chunk['volatility_24h'].to_numpy(dtype=float)
+
+            for name, condition in self.REPORT_GROUPS.items():
+                mask = conditions == condition
+                group_pnl = pnl[mask]
+                group_pnl = group_pnl[~np.isnan(group_pnl)]
+                losses = group_pnl[group_pnl < 0]
+                group_volatility = volatility[mask]
+                group_volatility = group_volatility[~np.isnan(group_volatility)]
+
+                total = totals[name]
+                total['total_trades'] += int(mask.sum())
+                total['result_count'] += group_pnl.size
+                total['wins'] += int((group_pnl > 0).sum())
+                total['loss_count'] += losses.size
+                total['loss_sum'] += float(losses.sum())
+                if losses.size:
+                    total['max_loss'] = float(np.fmin(total['max_loss'], losses.min()))
+                total['volatility_count'] += group_volatility.size
+                total['volatility_sum'] += float(group_volatility.sum())
+
+            lag = self._calculate_prediction_lag(
+                chunk['allora_prediction'].to_numpy(dtype=float),
+                chunk['entry_price'].to_numpy(dtype=float),
+                chunk['exit_price'].to_numpy(dtype=float)
+            )
+            lag = lag[np.isfinite(lag)]
+            lag_count += lag.size
+            lag_sum += float(lag.sum())
+
+        results = {}
+        for name, total in totals.items():
+            results[name] = {
+                'total_trades': total['total_trades'],
+                'avg_loss': total['loss_sum'] / total['loss_count'] if total['loss_count'] else np.nan,
+                'max_loss': total['max_loss'],
+                'win_rate': total['wins'] / total['result_count'] if total['result_count'] else np.nan,
+                'avg_volatility': (
+                    total['volatility_sum'] / total['volatility_count'] if total['volatility_count'] else np.nan
+                )
+            }
+        results['avg_prediction_lag'] = lag_sum / lag_count if lag_count else np.nan
+        return results
     
     def generate_report(self):
         """
@@ -58,7 +263,7 @@ class PerformanceAnalyzer:
         3. Prediction Lag Analysis
            - Shows Allora's delayed response to price movements
         """
-        results = self.analyze_results()
+        results = self.report_aggregates()
         
         report = """
         Allora Strategy Performance Report
@@ -0,0 +1,109 @@
+import sqlite3
+import numpy as np
+import pandas as pd
+
+# Accepted column names for the (timestamp, token, price, prediction) series
+COLUMN_ALIASES = {
+    'current_price': 'price',
+    'allora_prediction': 'prediction',
+    'coin': 'token',
+    'time': 'timestamp'
+}
+
+
+class PriceSeries:
+    def __init__(self, token, timestamps, prices, predictions):
+        """
+        One token's historical samples as contiguous NumPy arrays, oldest first.
+
+        :param timestamps: datetime64[ns] sample times.
+        :param prices: Market price at each sample.
+        :param predictions: Allora prediction available at each sample.
+        """
+        self.token = token
+        self.timestamps = timestamps
+        self.prices = prices
+        self.predictions = predictions
+
+    def __len__(self):
+        return len(self.prices)
+
+
+def frame_to_series(frame, tokens=None):
+    """
+    Splits a long-format DataFrame into one PriceSeries per token.
+    Rows without a price or prediction are dropped; duplicate timestamps keep the last row.
+
+    :param frame: DataFrame with timestamp, token, price and prediction columns
+                  (trade_logs names current_price/allora_prediction are accepted too).
+    :param tokens: Optional list of tokens to keep.
+    :return: Dictionary mapping tokens to PriceSeries.
+    """
+    frame = frame.rename(columns={k: v for k, v in COLUMN_ALIASES.items() if k in frame.columns})
+    missing = {'timestamp', 'token', 'price', 'prediction'} - set(frame.columns)
+    if missing:
+        raise ValueError(f"Backtest data is missing columns: {sorted(missing)}")
+
+    frame = frame[['timestamp', 'token', 'price', 'prediction']].dropna()
+    if tokens:
+        frame = frame[frame['token'].isin(tokens)]
+    frame = frame.assign(timestamp=pd.to_datetime(frame['timestamp']))
+    frame = frame[(frame['price'] > 0) & (frame['prediction'] > 0)]
+    frame = frame.sort_values(['token', 'timestamp'], kind='stable')
+    frame = frame.drop_duplicates(['token', 'timestamp'], keep='last')
+
+    series = {}
+    for token, rows in frame.groupby('token', sort=True):
+        series[token] = PriceSeries(
+            token,
+            rows['timestamp'].to_numpy(dtype='datetime64[ns]'),
+            rows['price'].to_numpy(dtype=np.float64),
+            rows['prediction'].to_numpy(dtype=np.float64)
+        )
+    return series
+
+
+def load_trade_logs(db_path='trading_logs.db', tokens=None, market_condition='ANALYSIS'):
+    """
+    Loads (price, prediction) series from the bot's trade_logs table.
+
+    AlloraMind.log_analysis writes one 'ANALYSIS' row per token and cycle, which is the
+    complete live sample; VolatilityStrategy rows repeat a subset of them.
+
+    :param market_condition: Rows to replay; None uses every row with a price and prediction.
+    """
+    query = ("SELECT timestamp, token, current_price, allora_prediction FROM trade_logs "
+             "WHERE current_price IS NOT NULL AND allora_prediction IS NOT NULL")
+    params = []
+    if market_condition is not None:
+        query += " AND market_condition = ?"
+        params.append(market_condition)
+    conn = sqlite3.connect(db_path)
+    try:
+        frame = pd.read_sql_query(query, conn, params=params)
+    finally:
+        conn.close()
+    return frame_to_series(frame, tokens)
+
+
+def load_csv(path, tokens=None):
+    return frame_to_series(pd.read_csv(path), tokens)
+
+
+def load_parquet(path, tokens=None):
+    """
+    Requires a pandas Parquet engine (pyarrow or fastparquet).
+    """
+    return frame_to_series(pd.read_parquet(path), tokens)
+
+
+def load_series(path, tokens=None):
+    """
+    Picks the loader from the file extension: .csv, .parquet/.pq, anything else is a SQLite database.
+    """
+    lowered = str(path).lower()
+    if lowered.endswith('.csv'):
+        return load_csv(path, tokens)
+    if lowered.endswith(('.parquet', '.pq')):
+        return load_parquet(path, tokens)
+    return load_trade_logs(path, tokens)
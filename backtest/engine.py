@@ -0,0 +1,295 @@
+import logging
+import os
+import numpy as np
+import pandas as pd
+from backtest.simulated import SimulatedOrderManager, StubReviewer, NullDatabase
+
+TRADE_COLUMNS = ['token', 'side', 'entry_time', 'exit_time', 'entry_price', 'exit_price', 'exit_reason',
+                 'pnl_usd', 'pnl_percent']
+
+
+class BacktestConfig:
+    def __init__(self, threshold=0.03, volatility_threshold=0.02, prediction_buffer=0.03, close_buffer=0.01,
+                 stop_loss_ratio=0.5, volatility_window=24, trend_window=12, allowed_amount_per_trade=10.0,
+                 leverage=5, fee_rate=0.00035, enforce_stop_loss=False, volatility_filter=False,
+                 initial_capital=None):
+        """
+        Parameters of the live decision logic, with the live defaults.
+
+        :param threshold: PRICE_GAP; minimum |prediction - price| / price for an Allora signal.
+        :param volatility_threshold: VolatilityStrategy volatility for the HIGH_VOLATILITY regime.
+        :param prediction_buffer: VolatilityStrategy minimum prediction difference.
+        :param close_buffer: AlloraMind.CLOSE_BUFFER; prediction move against a position that closes it.
+        :param stop_loss_ratio: Stop-loss as a fraction of the profit target (|diff| at entry).
+        :param volatility_window: Prices per volatility window.
+        :param trend_window: Prices per trend window (only used by replay()).
+        :param fee_rate: Fee on the notional of every fill.
+        :param enforce_stop_loss: Close when the stop-loss is hit. The live bot computes the stop
+                                  but never places it, so this is off by default.
+        :param volatility_filter: Only enter in the HIGH_VOLATILITY regime beyond prediction_buffer,
+                                  as VolatilityStrategy intends. Live, a strategy without an opinion
+                                  defers to Allora, so this is off by default.
+        :param initial_capital: Optional account size for percentage returns and drawdown.
+        """
+        self.threshold = threshold
+        self.volatility_threshold = volatility_threshold
+        self.prediction_buffer = prediction_buffer
+        self.close_buffer = close_buffer
+        self.stop_loss_ratio = stop_loss_ratio
+        self.volatility_window = volatility_window
+        self.trend_window = trend_window
+        self.allowed_amount_per_trade = allowed_amount_per_trade
+        self.leverage = leverage
+        self.fee_rate = fee_rate
+        self.enforce_stop_loss = enforce_stop_loss
+        self.volatility_filter = volatility_filter
+        self.initial_capital = initial_capital
+
+    def as_dict(self):
+        return dict(vars(self))
+
+
+class BacktestResult:
+    def __init__(self, trades, config, bars):
+        """
+        :param trades: DataFrame with one row per closed trade (TRADE_COLUMNS).
+        :param config: BacktestConfig the trades were produced with.
+        :param bars: Number of replayed samples across all tokens.
+        """
+        self.config = config
+        self.bars = bars
+        self.trades = trades.sort_values(['exit_time', 'token'], kind='stable').reset_index(drop=True)
+        equity = self.trades['pnl_usd'].cumsum()
+        peak = np.maximum.accumulate(np.concatenate(([0.0], equity.to_numpy())))[1:]
+        self.equity = pd.DataFrame({
+            'time': self.trades['exit_time'],
+            'pnl_usd': self.trades['pnl_usd'],
+            'equity': equity,
+            'drawdown_usd': peak - equity
+        })
+
+    def summary(self):
+        trades = self.trades
+        pnl = trades['pnl_usd'].to_numpy()
+        gains = pnl[pnl > 0].sum()
+        losses = -pnl[pnl < 0].sum()
+        max_drawdown = float(self.equity['drawdown_usd'].max()) if len(trades) else 0.0
+        summary = {
+            'tokens': int(trades['token'].nunique()),
+            'bars': self.bars,
+            'trades': len(trades),
+            'win_rate': float((pnl > 0).mean()) if len(pnl) else 0.0,
+            'total_pnl_usd': float(pnl.sum()),
+            'avg_pnl_percent': float(trades['pnl_percent'].mean()) if len(trades) else 0.0,
+            'profit_factor': float(gains / losses) if losses > 0 else None,
+            'max_drawdown_usd': max_drawdown,
+            'exit_reasons': trades['exit_reason'].value_counts().to_dict()
+        }
+        capital = self.config.initial_capital
+        if capital:
+            peak_equity = capital + np.maximum.accumulate(np.concatenate(([0.0], self.equity['equity'].to_numpy())))
+            drawdown_pct = np.concatenate(([0.0], self.equity['drawdown_usd'].to_numpy())) / peak_equity
+            summary['return_percent'] = summary['total_pnl_usd'] / capital * 100
+            summary['max_drawdown_percent'] = float(drawdown_pct.max() * 100)
+        return summary
+
+    def to_csv(self, directory):
+        """
+        Writes trades.csv and equity.csv into directory.
+        """
+        os.makedirs(directory, exist_ok=True)
+        self.trades.to_csv(os.path.join(directory, 'trades.csv'), index=False)
+        self.equity.to_csv(os.path.join(directory, 'equity.csv'), index=False)
+
+
+def rolling_volatility(prices, window):
+    """
+    VolatilityStrategy volatility at every sample: std of the last window's log returns
+    times sqrt(window); NaN until a full window is available.
+    """
+    volatility = np.full(len(prices), np.nan)
+    if len(prices) < window:
+        return volatility
+    returns = pd.Series(np.diff(np.log(prices)))
+    volatility[1:] = returns.rolling(window - 1).std(ddof=0).to_numpy() * np.sqrt(window)
+    return volatility
+
+
+def _next_index(mask):
+    """
+    next[i] = first index >= i where mask is True, len(mask) if none (one extra slot for i = len).
+    """
+    n = len(mask)
+    indexes = np.where(mask, np.arange(n), n)
+    return np.append(np.minimum.accumulate(indexes[::-1])[::-1], n).tolist()
+
+
+def _simulate_token(series, config, reviewer):
+    prices = series.prices
+    n = len(prices)
+    diff = (series.predictions - prices) / prices
+
+    long_entry = diff >= config.threshold
+    short_entry = diff <= -config.threshold
+    if config.volatility_filter:
+        regime = (rolling_volatility(prices, config.volatility_window) > config.volatility_threshold) & \
+                 (np.abs(diff) >= config.prediction_buffer)
+        long_entry &= regime
+        short_entry &= regime
+
+    # Each walk step is an O(1) lookup of the next entry or exit bar
+    next_entry = _next_index(long_entry | short_entry)
+    next_exit = {True: _next_index(diff < -config.close_buffer), False: _next_index(diff > config.close_buffer)}
+    is_long = long_entry.tolist()
+    price_list = prices.tolist() if config.enforce_stop_loss else None
+
+    entries, exits, reasons = [], [], []
+    entry = next_entry[0]
+    while entry < n:
+        if reviewer is not None and not _approved(reviewer, series, entry, diff, is_long[entry]):
+            entry = next_entry[entry + 1]
+            continue
+        # First signal exit after the entry cycle, or the last sample
+        exit_index = next_exit[is_long[entry]][min(entry + 1, n)]
+        reason = 'signal'
+        if exit_index >= n:
+            exit_index, reason = n - 1, 'end_of_data'
+
+        if config.enforce_stop_loss and exit_index > entry:
+            stop_index = _stop_loss_index(prices, price_list, entry, exit_index, is_long[entry],
+                                          config.stop_loss_ratio * abs(diff[entry]))
+            if stop_index is not None:
+                exit_index, reason = stop_index, 'stop_loss'
+
+        entries.append(entry)
+        exits.append(exit_index)
+        reasons.append(reason)
+        # The live loop opens before it monitors, so the earliest re-entry is the next cycle
+        entry = next_entry[exit_index + 1]
+
+    entries = np.asarray(entries, dtype=np.int64)
+    exits = np.asarray(exits, dtype=np.int64)
+    side = np.where(long_entry[entries], 1.0, -1.0)
+    notional = config.allowed_amount_per_trade * config.leverage
+    ratio = prices[exits] / prices[entries]
+    price_return = side * (ratio - 1)
+    return pd.DataFrame({
+        'token': series.token,
+        'side': np.where(side > 0, 'LONG', 'SHORT'),
+        'entry_time': series.timestamps[entries],
+        'exit_time': series.timestamps[exits],
+        'entry_price': prices[entries],
+        'exit_price': prices[exits],
+        'exit_reason': reasons,
+        'pnl_usd': notional * price_return - config.fee_rate * notional * (1 + ratio),
+        'pnl_percent': price_return * 100
+    }, columns=TRADE_COLUMNS)
+
+
+def _stop_loss_index(prices, price_list, entry, exit_index, is_long, stop):
+    """
+    First sample in (entry, exit_index] where the position is down by the stop, or None.
+    Short holds are scanned in Python; NumPy call overhead only pays off on long ones.
+    """
+    if is_long:
+        level = price_list[entry] * (1 - stop)
+    else:
+        level = price_list[entry] * (1 + stop)
+    if exit_index - entry <= 64:
+        for index in range(entry + 1, exit_index + 1):
+            if (price_list[index] <= level) if is_long else (price_list[index] >= level):
+                return index
+        return None
+    path = prices[entry + 1:exit_index + 1]
+    hit = path <= level if is_long else path >= level
+    return entry + 1 + int(np.argmax(hit)) if hit.any() else None
+
+
+def _approved(reviewer, series, entry, diff, is_long):
+    verdict = reviewer.review_trade({
+        'token': series.token,
+        'current_price': float(series.prices[entry]),
+        'allora_prediction': float(series.predictions[entry]),
+        'prediction_diff': float(diff[entry]) * 100,
+        'direction': 'BUY' if is_long else 'SELL',
+        'market_condition': 'ANALYSIS'
+    })
+    return bool(verdict.get('approval')) and verdict.get('confidence', 0) > 70
+
+
+def run_backtest(series, config=None, reviewer=None):
+    """
+    Replays historical (price, prediction) samples through the live entry and exit rules.
+
+    - Entry: Allora signal (|prediction - price| / price >= threshold) while flat, approved
+      by the reviewer
+    - Exit: prediction moves past close_buffer against the position, or the stop-loss when
+      enforced; positions still open at the end close at the last price
+    - Signals, regimes and exits are NumPy masks; only entries and exits are visited in Python
+
+    Tokens are independent, exactly as in the live loop (the optional position limits of the
+    DecisionPipeline are not modelled).
+
+    :param series: Dictionary mapping tokens to PriceSeries (see backtest.data).
+    :param reviewer: Optional reviewer (e.g. StubReviewer(decide=...)) consulted at every
+                     entry; without one every entry is approved, as by the default stub.
+    :return: BacktestResult.
+    """
+    config = config or BacktestConfig()
+    frames = [_simulate_token(series[token], config, reviewer) for token in sorted(series)]
+    trades = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=TRADE_COLUMNS)
+    return BacktestResult(trades, config, sum(len(s) for s in series.values()))
+
+
+def replay(series, config=None, reviewer=None, quiet=True):
+    """
+    Step-by-step replay through the real AlloraMind, VolatilityStrategy and DecisionPipeline
+    with a SimulatedOrderManager and StubReviewer. Much slower than run_backtest; use it on
+    small samples to check the vectorised engine against the live code path.
+    Stop-loss enforcement and the volatility filter are not applied (the live bot does neither).
+    """
+    from allora.allora_mind import AlloraMind
+    from strategy import custom_strategy as custom_strategy_module
+    from strategy.volatility_strategy import VolatilityStrategy
+
+    config = config or BacktestConfig()
+    reviewer = reviewer or StubReviewer()
+    db = NullDatabase()
+    manager = SimulatedOrderManager(config.allowed_amount_per_trade, config.leverage, config.fee_rate)
+    mind = AlloraMind(manager, None, None, threshold=config.threshold, db=db)
+    mind.deepseek_reviewer = reviewer
+    mind.pipeline.reviewer = reviewer
+    mind.CLOSE_BUFFER = config.close_buffer
+    # Simulated fills are immediate, so the duplicate-close cooldown is not needed
+    mind._begin_close = lambda token: True
+
+    topic_ids = {token: index + 1 for index, token in enumerate(sorted(series))}
+    frame = pd.concat([
+        pd.DataFrame({'timestamp': s.timestamps, 'token': token, 'price': s.prices, 'prediction': s.predictions})
+        for token, s in series.items()
+    ]).sort_values(['timestamp', 'token'], kind='stable')
+
+    original_strategy = custom_strategy_module.volatility_strategy
+    custom_strategy_module.volatility_strategy = VolatilityStrategy(
+        config.volatility_threshold, config.prediction_buffer, db=db,
+        volatility_window=config.volatility_window, trend_window=config.trend_window, persist_history=False)
+    if quiet:
+        # Per-bar trade and hold messages from the live code path
+        logging.disable(logging.INFO)
+    try:
+        for timestamp, rows in frame.groupby('timestamp', sort=True):
+            present = {token: topic_ids[token] for token in rows['token']}
+            for token, prediction in zip(rows['token'], rows['prediction']):
+                mind.inference_cache.put(topic_ids[token], float(prediction))
+            manager.set_prices(dict(zip(rows['token'], rows['price'])), now=timestamp.to_datetime64())
+            mind.set_topic_ids(present)
+            mind.open_trade()
+            mind.monitor_positions()
+        manager.close_all()
+    finally:
+        if quiet:
+            logging.disable(logging.NOTSET)
+        custom_strategy_module.volatility_strategy = original_strategy
+
+    trades = pd.DataFrame(manager.trades, columns=TRADE_COLUMNS)
+    return BacktestResult(trades, config, len(frame))
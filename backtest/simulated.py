@@ -0,0 +1,168 @@
+from strategy.deepseek_reviewer import VerdictCache
+
+
+class NullDatabase:
+    """
+    DatabaseManager stand-in that discards writes, so a replay never touches trade_logs.
+    """
+    def log_trade(self, trade_data):
+        pass
+
+    def update_trade_result(self, trade_id, exit_price, profit_loss, result):
+        pass
+
+    def save_price_window(self, token, prices):
+        pass
+
+    def load_price_windows(self):
+        return {}
+
+    def flush(self, timeout=None):
+        return True
+
+    def close(self):
+        pass
+
+
+class StubReviewer:
+    def __init__(self, approve=True, confidence=100, decide=None):
+        """
+        DeepSeekReviewer stand-in with the same review_trades interface and counters.
+
+        :param approve: Verdict returned for every trade when decide is not given.
+        :param confidence: Confidence reported with each verdict (AlloraMind requires > 70).
+        :param decide: Optional callable(trade_data) -> bool to model a selective reviewer.
+        """
+        self.approve = approve
+        self.confidence = confidence
+        self.decide = decide
+        self.cache = VerdictCache(0, 0)
+        self.llm_calls = 0
+        self.llm_trades = 0
+        self.llm_seconds = 0.0
+
+    def review_trade(self, trade_data):
+        return self.review_trades([trade_data])[0]
+
+    def review_trades(self, trades):
+        if not trades:
+            return []
+        self.llm_calls += 1
+        self.llm_trades += len(trades)
+        verdicts = []
+        for trade_data in trades:
+            approved = self.decide(trade_data) if self.decide is not None else self.approve
+            verdicts.append({
+                'approval': bool(approved),
+                'confidence': self.confidence,
+                'reasoning': 'Backtest stub reviewer',
+                'risk_score': 1
+            })
+        return verdicts
+
+
+class SimulatedOrderManager:
+    def __init__(self, allowed_amount_per_trade=10.0, leverage=5, fee_rate=0.00035):
+        """
+        OrderManager stand-in that fills market orders at the current replay price.
+
+        - Prices are set per step with set_prices(); every order fills in full at that price
+        - Entries are sized like the live bot: allowed amount times leverage, in USD notional
+        - Closed trades are appended to self.trades with their PnL after fees
+
+        :param fee_rate: Fee charged on the notional of every fill (HyperLiquid base taker fee by default).
+        """
+        self.allowed_amount_per_trade = allowed_amount_per_trade
+        self.leverage = leverage
+        self.fee_rate = fee_rate
+        self.prices = {}
+        self.now = None
+        self.positions = {}
+        self.trades = []
+
+    def set_prices(self, prices, now=None):
+        self.prices.update(prices)
+        self.now = now
+
+    def refresh_market_data(self):
+        pass
+
+    def get_price(self, coin):
+        return self.prices.get(coin)
+
+    def get_current_price(self, coin):
+        return self.prices.get(coin)
+
+    def get_position(self, coin):
+        position = self.positions.get(coin)
+        return dict(position) if position else None
+
+    def has_open_position(self, coin):
+        return coin in self.positions
+
+    def get_open_positions(self):
+        return [dict(position) for position in self.positions.values()]
+
+    def list_open_positions(self):
+        return list(self.positions)
+
+    def create_trade_order(self, coin, is_buy, profit_target=5, loss_target=3):
+        return self.create_trade_orders([(coin, is_buy)])[0]
+
+    def create_trade_orders(self, entries):
+        results = []
+        for coin, is_buy in entries:
+            price = self.prices.get(coin)
+            if price is None or coin in self.positions:
+                results.append({'coin': coin, 'is_buy': is_buy, 'size': None, 'status': None,
+                                'error': "price unavailable" if price is None else "position already open"})
+                continue
+            size = self.allowed_amount_per_trade * self.leverage / price
+            self.positions[coin] = {
+                'coin': coin,
+                'szi': size if is_buy else -size,
+                'entryPrice': price,
+                'leverage': {'type': 'cross', 'value': self.leverage},
+                'entry_time': self.now
+            }
+            results.append({'coin': coin, 'is_buy': is_buy, 'size': size,
+                            'status': {'filled': {'totalSz': str(size), 'avgPx': str(price)}}, 'error': None})
+        return results
+
+    def market_close(self, coin, reason='signal'):
+        results = self.market_close_many([coin], reason)
+        return results[0] if results else None
+
+    def market_close_many(self, coins, reason='signal'):
+        results = []
+        for coin in coins:
+            position = self.positions.pop(coin, None)
+            if position is None:
+                continue
+            price = self.prices[coin]
+            self.trades.append(self._closed_trade(position, price, reason))
+            results.append({'coin': coin, 'is_buy': position['szi'] < 0, 'size': abs(position['szi']),
+                            'status': {'filled': {'totalSz': str(abs(position['szi'])), 'avgPx': str(price)}},
+                            'error': None})
+        return results
+
+    def close_all(self, reason='end_of_data'):
+        return self.market_close_many(list(self.positions), reason)
+
+    def _closed_trade(self, position, exit_price, reason):
+        side = 1 if position['szi'] > 0 else -1
+        entry_price = position['entryPrice']
+        notional = abs(position['szi']) * entry_price
+        price_return = side * (exit_price / entry_price - 1)
+        fees = self.fee_rate * (notional + abs(position['szi']) * exit_price)
+        return {
+            'token': position['coin'],
+            'side': 'LONG' if side > 0 else 'SHORT',
+            'entry_time': position.get('entry_time'),
+            'exit_time': self.now,
+            'entry_price': entry_price,
+            'exit_price': exit_price,
+            'exit_reason': reason,
+            'pnl_usd': notional * price_return - fees,
+            'pnl_percent': price_return * 100
+        }
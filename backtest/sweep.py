@@ -0,0 +1,172 @@
+import itertools
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+import numpy as np
+import pandas as pd
+from backtest.data import PriceSeries
+from backtest.engine import BacktestConfig, run_backtest
+
+# Parameters whose values must be whole numbers
+INTEGER_PARAMS = {'volatility_window', 'trend_window', 'leverage'}
+
+DEFAULT_GRID = {
+    'threshold': [0.01, 0.02, 0.03, 0.04, 0.05],
+    'close_buffer': [0.005, 0.01, 0.02]
+}
+
+# Axes that only change the result when the matching BacktestConfig switch is on
+STOP_LOSS_GRID = {
+    'stop_loss_ratio': [0.25, 0.5, 0.75, 1.0]
+}
+VOLATILITY_FILTER_GRID = {
+    'volatility_window': [12, 24, 48],
+    'volatility_threshold': [0.01, 0.02, 0.03]
+}
+
+# Series attached in each worker process by _init_worker
+_worker_series = None
+_worker_shm = None
+
+
+class SharedSeries:
+    def __init__(self, series):
+        """
+        Copies every token's timestamps, prices and predictions once into a single shared
+        memory block; workers map NumPy views onto it instead of unpickling the arrays.
+        """
+        self.tokens = sorted(series)
+        lengths = [len(series[token]) for token in self.tokens]
+        self.offsets = np.concatenate(([0], np.cumsum(lengths))).tolist()
+        self.total = self.offsets[-1]
+        self.shm = shared_memory.SharedMemory(create=True, size=max(1, self.total * 3 * 8))
+        timestamps, prices, predictions = _views(self.shm.buf, self.total)
+        for index, token in enumerate(self.tokens):
+            start, end = self.offsets[index], self.offsets[index + 1]
+            timestamps[start:end] = series[token].timestamps.astype('datetime64[ns]').view(np.int64)
+            prices[start:end] = series[token].prices
+            predictions[start:end] = series[token].predictions
+
+    def descriptor(self):
+        """
+        Small picklable handle passed to workers.
+        """
+        return self.shm.name, self.total, self.tokens, self.offsets
+
+    def close(self):
+        self.shm.close()
+        self.shm.unlink()
+
+
+def _views(buffer, total):
+    block = np.ndarray((3, total), dtype=np.float64, buffer=buffer)
+    return block[0].view(np.int64), block[1], block[2]
+
+
+def attach_series(descriptor):
+    """
+    Rebuilds the {token: PriceSeries} dict as zero-copy views on the shared block.
+    :return: (series, SharedMemory) - keep the SharedMemory referenced while the views are used.
+    """
+    name, total, tokens, offsets = descriptor
+    shm = shared_memory.SharedMemory(name=name)
+    timestamps, prices, predictions = _views(shm.buf, total)
+    series = {}
+    for index, token in enumerate(tokens):
+        start, end = offsets[index], offsets[index + 1]
+        series[token] = PriceSeries(token, timestamps[start:end].view('datetime64[ns]'),
+                                    prices[start:end], predictions[start:end])
+    return series, shm
+
+
+def _init_worker(descriptor):
+    global _worker_series, _worker_shm
+    _worker_series, _worker_shm = attach_series(descriptor)
+
+
+def _evaluate(task):
+    base, params = task
+    config = BacktestConfig(**{**base, **params})
+    summary = run_backtest(_worker_series, config).summary()
+    drawdown = summary['max_drawdown_usd']
+    row = dict(params)
+    row.update({
+        'trades': summary['trades'],
+        'win_rate': summary['win_rate'],
+        'total_pnl_usd': summary['total_pnl_usd'],
+        'avg_pnl_percent': summary['avg_pnl_percent'],
+        'profit_factor': summary['profit_factor'],
+        'max_drawdown_usd': drawdown,
+        'return_over_drawdown': summary['total_pnl_usd'] / drawdown if drawdown > 0 else None
+    })
+    return row
+
+
+def default_grid(enforce_stop_loss=False, volatility_filter=False):
+    """
+    DEFAULT_GRID plus the stop-loss and volatility axes when they are enforced, so the sweep
+    never backtests parameter sets that only differ in values the engine ignores.
+    """
+    grid = dict(DEFAULT_GRID)
+    if enforce_stop_loss:
+        grid.update(STOP_LOSS_GRID)
+    if volatility_filter:
+        grid.update(VOLATILITY_FILTER_GRID)
+    return grid
+
+
+def grid_search(grid):
+    """
+    Every combination of the given parameter values.
+    """
+    names = list(grid)
+    return [dict(zip(names, values)) for values in itertools.product(*(grid[name] for name in names))]
+
+
+def random_search(ranges, samples, seed=None):
+    """
+    Uniformly sampled parameter sets.
+
+    :param ranges: Dictionary mapping parameter names to (low, high).
+    """
+    rng = random.Random(seed)
+    combinations = []
+    for _ in range(samples):
+        params = {}
+        for name, (low, high) in ranges.items():
+            params[name] = rng.randint(int(low), int(high)) if name in INTEGER_PARAMS else rng.uniform(low, high)
+        combinations.append(params)
+    return combinations
+
+
+def run_sweep(series, combinations, base_config=None, workers=None, metric='total_pnl_usd', chunksize=None):
+    """
+    Backtests every parameter set in parallel and ranks the results.
+
+    The price arrays are placed in shared memory once; each worker process attaches to it in
+    its initializer, so tasks only carry the parameter dict.
+
+    :param series: Dictionary mapping tokens to PriceSeries.
+    :param combinations: List of parameter dicts (BacktestConfig keyword arguments).
+    :param base_config: BacktestConfig for every parameter not being swept.
+    :param workers: Worker processes (default: all cores).
+    :param metric: Result column to rank by, highest first.
+    :return: DataFrame with one row per parameter set, best first.
+    """
+    base = (base_config or BacktestConfig()).as_dict()
+    workers = workers or os.cpu_count() or 1
+    chunksize = chunksize or max(1, len(combinations) // (workers * 4))
+    shared = SharedSeries(series)
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(shared.descriptor(),)) as executor:
+            rows = list(executor.map(_evaluate, [(base, params) for params in combinations], chunksize=chunksize))
+    finally:
+        shared.close()
+
+    results = pd.DataFrame(rows)
+    if len(results):
+        results = results.sort_values(metric, ascending=False, na_position='last', kind='stable')
+        results.insert(0, 'rank', range(1, len(results) + 1))
+    return results.reset_index(drop=True)
@@ -0,0 +1,240 @@
+import os
+import platform
+import shutil
+import subprocess
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from benchmarks.stubs import AlloraStub, DeepSeekStub, FakeExchange, FakeInfo
+from utils import metrics
+
+STAGES = ('refresh', 'prefetch', 'open_trade', 'review', 'monitor')
+REQUEST_HISTOGRAMS = ('allora_request_seconds', 'deepseek_request_seconds', 'hyperliquid_request_seconds',
+                      'sqlite_write_seconds')
+
+
+class BenchmarkConfig:
+    def __init__(self, cycles=5, warmup_cycles=1, allocation_cycles=1, allora_latency=0.02,
+                 deepseek_latency=0.2, info_latency=0.0, exchange_latency=0.0, threshold=0.03,
+                 allowed_amount_per_trade=10.0, leverage=5, approve_ratio=0.5, seed=0, top_allocations=10):
+        """
+        :param cycles: Timed run_cycle calls per token count.
+        :param warmup_cycles: Untimed cycles first (opens connections, fills caches and positions).
+        :param allocation_cycles: Extra cycles run under tracemalloc, kept out of the timings.
+        :param allora_latency: Seconds the Allora stub waits per request.
+        :param deepseek_latency: Seconds the DeepSeek stub waits per request.
+        :param info_latency: Seconds each FakeInfo call sleeps.
+        :param exchange_latency: Seconds each FakeExchange call sleeps.
+        :param approve_ratio: Share of tokens the DeepSeek stub approves.
+        :param top_allocations: Allocation sites listed per token count.
+        """
+        self.cycles = cycles
+        self.warmup_cycles = warmup_cycles
+        self.allocation_cycles = allocation_cycles
+        self.allora_latency = allora_latency
+        self.deepseek_latency = deepseek_latency
+        self.info_latency = info_latency
+        self.exchange_latency = exchange_latency
+        self.threshold = threshold
+        self.allowed_amount_per_trade = allowed_amount_per_trade
+        self.leverage = leverage
+        self.approve_ratio = approve_ratio
+        self.seed = seed
+        self.top_allocations = top_allocations
+
+    def as_dict(self):
+        return dict(vars(self))
+
+
+class DecisionLoopBench:
+    def __init__(self, token_count, config):
+        """
+        One AlloraMind wired to FakeInfo/FakeExchange, local Allora and DeepSeek stubs and a
+        throwaway SQLite database, with its own VolatilityStrategy (the module global is
+        swapped in for the run and restored by close()).
+        """
+        from allora.allora_mind import AlloraMind
+        from allora.inference_cache import InferenceCache
+        from allora.inference_fetcher import AsyncInferenceFetcher
+        from core.orders import OrderManager
+        from database.db_manager import DatabaseManager
+        from strategy import custom_strategy as custom_strategy_module
+        from strategy.deepseek_reviewer import DeepSeekReviewer
+        from strategy.volatility_strategy import VolatilityStrategy
+
+        self.config = config
+        self.token_count = token_count
+        coins = [f"T{index:04d}" for index in range(token_count)]
+        topic_ids = {coin: index + 1 for index, coin in enumerate(coins)}
+
+        self.info = FakeInfo(coins, latency=config.info_latency, seed=config.seed)
+        self.exchange = FakeExchange(self.info, latency=config.exchange_latency)
+        self.allora = AlloraStub(self.info, {topic: coin for coin, topic in topic_ids.items()},
+                                 latency=config.allora_latency, seed=config.seed).start()
+        self.deepseek = DeepSeekStub(latency=config.deepseek_latency, approve_ratio=config.approve_ratio,
+                                     seed=config.seed).start()
+
+        self._db_dir = tempfile.mkdtemp(prefix="allora-bench-")
+        self.db = DatabaseManager(os.path.join(self._db_dir, "bench.db"))
+        self.db.initialize()
+        self._strategy_module = custom_strategy_module
+        self._original_strategy = custom_strategy_module.volatility_strategy
+        custom_strategy_module.volatility_strategy = VolatilityStrategy(db=self.db)
+
+        self._cache_class = InferenceCache
+        reviewer = DeepSeekReviewer("benchmark-key")
+        reviewer.api_url = self.deepseek.url
+        fetcher = AsyncInferenceFetcher("benchmark-key", base_url=self.allora.url)
+        manager = OrderManager(self.exchange, "0xbenchmark", config.allowed_amount_per_trade, config.leverage,
+                               self.info)
+        self.mind = AlloraMind(manager, "benchmark-key", "benchmark-key", threshold=config.threshold, db=self.db,
+                               reviewer=reviewer, fetcher=fetcher)
+        self.mind.base_url = self.allora.url
+        self.mind.set_topic_ids(topic_ids)
+
+    def cycle(self):
+        """
+        One trading cycle on a new Allora epoch: prices move and every topic is refetched.
+        """
+        self.info.advance()
+        self.mind.inference_cache = self._cache_class()
+        self.mind.run_cycle()
+
+    def _request_counts(self):
+        return {
+            'allora': self.allora.requests,
+            'deepseek': self.deepseek.requests,
+            'deepseek_trades_reviewed': self.deepseek.trades,
+            'hyperliquid_info': dict(self.info.calls),
+            'hyperliquid_exchange': dict(self.exchange.calls)
+        }
+
+    def _reset_counts(self):
+        self.allora.requests = 0
+        self.deepseek.requests = 0
+        self.deepseek.trades = 0
+        self.info.calls.clear()
+        self.exchange.calls.clear()
+
+    def run(self):
+        config = self.config
+        for _ in range(config.warmup_cycles):
+            self.cycle()
+        self.db.flush()
+
+        metrics.reset()
+        self._reset_counts()
+        started = time.perf_counter()
+        for _ in range(config.cycles):
+            self.cycle()
+        elapsed = time.perf_counter() - started
+        self.db.flush()
+        requests = self._request_counts()
+        cycles = config.cycles
+
+        result = {
+            'tokens': self.token_count,
+            'cycles': cycles,
+            'seconds': elapsed,
+            'cycles_per_second': cycles / elapsed if elapsed else None,
+            'cycle_seconds': metrics.histogram('cycle_seconds').summary(),
+            'stages': {stage: metrics.histogram('cycle_stage_seconds', stage=stage).summary() for stage in STAGES},
+            'requests': requests,
+            'requests_per_cycle': {
+                'allora': requests['allora'] / cycles,
+                'deepseek': requests['deepseek'] / cycles,
+                'hyperliquid_info': sum(requests['hyperliquid_info'].values()) / cycles,
+                'hyperliquid_exchange': sum(requests['hyperliquid_exchange'].values()) / cycles
+            },
+            'request_latency': {series: summary for series, summary in metrics.snapshot()['histograms'].items()
+                                if series.startswith(REQUEST_HISTOGRAMS)},
+            'counters': metrics.snapshot()['counters'],
+            'open_positions': len(self.info.positions)
+        }
+        if config.allocation_cycles:
+            result['allocations'] = self._measure_allocations()
+        return result
+
+    def _measure_allocations(self):
+        """
+        Net and peak traced memory plus the largest allocation sites over allocation_cycles.
+        """
+        config = self.config
+        tracemalloc.start()
+        try:
+            before = tracemalloc.take_snapshot()
+            tracemalloc.reset_peak()
+            for _ in range(config.allocation_cycles):
+                self.cycle()
+            self.db.flush()
+            after = tracemalloc.take_snapshot()
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        # Fake backend payloads are not the bot's allocations
+        ignore = (tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, "<frozen *>"),
+                  tracemalloc.Filter(False, os.path.join(os.path.dirname(os.path.abspath(__file__)), "*")))
+        stats = after.filter_traces(ignore).compare_to(before.filter_traces(ignore), 'lineno')
+        allocated = [stat for stat in stats if stat.size_diff > 0]
+        return {
+            'cycles': config.allocation_cycles,
+            'net_bytes': sum(stat.size_diff for stat in stats),
+            'allocated_bytes': sum(stat.size_diff for stat in allocated),
+            'allocated_blocks': sum(stat.count_diff for stat in allocated if stat.count_diff > 0),
+            'peak_bytes': peak,
+            'top': [{'where': f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}",
+                     'bytes': stat.size_diff, 'blocks': stat.count_diff}
+                    for stat in sorted(allocated, key=lambda stat: stat.size_diff, reverse=True)[:config.top_allocations]]
+        }
+
+    def close(self):
+        self._strategy_module.volatility_strategy = self._original_strategy
+        self.allora.stop()
+        self.deepseek.stop()
+        self.db.close()
+        shutil.rmtree(self._db_dir, ignore_errors=True)
+
+
+def run_benchmarks(token_counts=(1, 10, 100, 1000), config=None, progress=None):
+    """
+    Benchmarks AlloraMind.run_cycle (refresh, prefetch, open_trade, review, monitor) at each
+    token count against stubbed HyperLiquid, Allora and DeepSeek backends.
+
+    :param progress: Optional callable(result) invoked after each token count.
+    :return: Dict with run metadata and one result per token count.
+    """
+    config = config or BenchmarkConfig()
+    was_enabled = metrics.enabled()
+    metrics.enable()
+    results = []
+    try:
+        for token_count in token_counts:
+            bench = DecisionLoopBench(token_count, config)
+            try:
+                result = bench.run()
+            finally:
+                bench.close()
+            results.append(result)
+            if progress is not None:
+                progress(result)
+    finally:
+        metrics.enable(was_enabled)
+    return {'meta': _run_metadata(config), 'results': results}
+
+
+def _run_metadata(config):
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {
+        'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'commit': commit,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'config': config.as_dict()
+    }
@@ -0,0 +1,261 @@
+import json
+import random
+import re
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+class FakeInfo:
+    def __init__(self, coins, latency=0.0, seed=0, step_volatility=0.01, sz_decimals=2, max_leverage=20):
+        """
+        In-memory HyperLiquid Info client: a random-walk price per coin and the positions
+        filled by FakeExchange. Every call is counted and can be slowed down.
+
+        :param coins: Listed coin names.
+        :param latency: Seconds each call sleeps, to model the REST round trip.
+        :param seed: Seed for starting prices and the random walk.
+        :param step_volatility: Standard deviation of the per-tick price return.
+        """
+        self.latency = latency
+        self.step_volatility = step_volatility
+        self.sz_decimals = sz_decimals
+        self.max_leverage = max_leverage
+        self.rng = random.Random(seed)
+        self.prices = {coin: round(self.rng.uniform(1, 1000), 2) for coin in coins}
+        self.positions = {}
+        self.leverage = {}
+        self.tick = 0
+        self.calls = Counter()
+        self._lock = threading.Lock()
+
+    def _call(self, name):
+        with self._lock:
+            self.calls[name] += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    def advance(self):
+        """
+        Moves every price one random-walk step (one trading cycle).
+        """
+        with self._lock:
+            self.tick += 1
+            for coin, price in self.prices.items():
+                self.prices[coin] = round(price * (1 + self.rng.gauss(0, self.step_volatility)), 6)
+
+    def meta(self):
+        self._call('meta')
+        return {'universe': [{'name': coin, 'szDecimals': self.sz_decimals, 'maxLeverage': self.max_leverage}
+                             for coin in self.prices]}
+
+    def meta_and_asset_ctxs(self):
+        self._call('meta_and_asset_ctxs')
+        universe = [{'name': coin, 'szDecimals': self.sz_decimals, 'maxLeverage': self.max_leverage}
+                    for coin in self.prices]
+        ctxs = [{'oraclePx': str(price), 'markPx': str(price), 'midPx': str(price)} for price in self.prices.values()]
+        return [{'universe': universe}, ctxs]
+
+    def all_mids(self):
+        self._call('all_mids')
+        return {coin: str(price) for coin, price in self.prices.items()}
+
+    def user_state(self, address):
+        self._call('user_state')
+        with self._lock:
+            positions = [{'position': {'coin': coin, 'szi': str(position['szi']), 'entryPx': str(position['entryPx']),
+                                       'leverage': {'type': 'cross', 'value': self.leverage.get(coin, 1)}}}
+                         for coin, position in self.positions.items()]
+        return {'assetPositions': positions,
+                'crossMarginSummary': {'accountValue': '100000.0', 'totalNtlPos': '0.0', 'totalRawUsd': '100000.0'}}
+
+    def open_orders(self, address):
+        self._call('open_orders')
+        return []
+
+
+class FakeExchange:
+    DEFAULT_SLIPPAGE = 0.05
+
+    def __init__(self, info, latency=0.0):
+        """
+        Exchange stand-in that fills every IoC order in full at the FakeInfo price.
+
+        :param info: FakeInfo whose prices and positions the fills use and update.
+        :param latency: Seconds each signed request sleeps.
+        """
+        self.info = info
+        self.latency = latency
+        self.calls = Counter()
+        self._oid = 0
+
+    def _call(self, name):
+        self.calls[name] += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    def _fill(self, coin, is_buy, size, reduce_only):
+        info = self.info
+        with info._lock:
+            price = info.prices[coin]
+            signed = size if is_buy else -size
+            position = info.positions.get(coin)
+            if reduce_only or (position and (position['szi'] > 0) != is_buy):
+                if position is None:
+                    return {'error': 'Reduce only order would increase position'}
+                remaining = position['szi'] + signed
+                if abs(remaining) < 1e-12:
+                    del info.positions[coin]
+                else:
+                    position['szi'] = remaining
+            elif position is None:
+                info.positions[coin] = {'szi': signed, 'entryPx': price}
+            else:
+                total = position['szi'] + signed
+                position['entryPx'] = (position['entryPx'] * position['szi'] + price * signed) / total
+                position['szi'] = total
+            self._oid += 1
+            return {'filled': {'totalSz': str(size), 'avgPx': str(price), 'oid': self._oid}}
+
+    def bulk_orders(self, order_requests):
+        self._call('bulk_orders')
+        statuses = [self._fill(order['coin'], order['is_buy'], float(order['sz']), order.get('reduce_only', False))
+                    for order in order_requests]
+        return {'status': 'ok', 'response': {'type': 'order', 'data': {'statuses': statuses}}}
+
+    def update_leverage(self, leverage, name, is_cross=True):
+        self._call('update_leverage')
+        self.info.leverage[name] = leverage
+        return {'status': 'ok', 'response': {'type': 'default'}}
+
+    def market_open(self, name, is_buy, sz, px=None, slippage=DEFAULT_SLIPPAGE):
+        self._call('market_open')
+        status = self._fill(name, is_buy, float(sz), False)
+        return {'status': 'ok', 'response': {'type': 'order', 'data': {'statuses': [status]}}}
+
+    def market_close(self, coin, sz=None, px=None, slippage=DEFAULT_SLIPPAGE):
+        self._call('market_close')
+        position = self.info.positions.get(coin)
+        if position is None:
+            return None
+        status = self._fill(coin, position['szi'] < 0, abs(position['szi']), True)
+        return {'status': 'ok', 'response': {'type': 'order', 'data': {'statuses': [status]}}}
+
+
+class StubServer:
+    def __init__(self, latency=0.0):
+        """
+        Local HTTP server on an ephemeral port, one thread per request, that sleeps
+        `latency` seconds before answering and counts requests.
+        """
+        self.latency = latency
+        self.requests = 0
+        self._lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # Headers and body go out as separate writes; avoid the delayed-ACK stall on keep-alive
+            disable_nagle_algorithm = True
+
+            def do_GET(self):
+                stub._handle(self)
+
+            def do_POST(self):
+                stub._handle(self)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server.server_port}/"
+
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, name=type(self).__name__, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def _handle(self, request):
+        with self._lock:
+            self.requests += 1
+        length = int(request.headers.get('Content-Length') or 0)
+        body = request.rfile.read(length) if length else b''
+        if self.latency:
+            time.sleep(self.latency)
+        status, payload = self.respond(request.path, body)
+        data = json.dumps(payload).encode()
+        request.send_response(status)
+        request.send_header("Content-Type", "application/json")
+        request.send_header("Content-Length", str(len(data)))
+        request.end_headers()
+        request.wfile.write(data)
+
+    def respond(self, path, body):
+        raise NotImplementedError
+
+
+class AlloraStub(StubServer):
+    def __init__(self, info, topic_coins, latency=0.0, seed=0, spread=0.06):
+        """
+        Allora inference API stand-in. Each topic's prediction is its coin's current FakeInfo
+        price moved by a deterministic random amount within +/- spread, so roughly half of
+        the topics clear a 3% PRICE_GAP.
+
+        :param topic_coins: Dictionary mapping topic IDs to coin names.
+        """
+        super().__init__(latency)
+        self.info = info
+        self.topic_coins = topic_coins
+        self.seed = seed
+        self.spread = spread
+
+    def respond(self, path, body):
+        try:
+            topic_id = int(parse_qs(urlparse(path).query)['allora_topic_id'][0])
+            coin = self.topic_coins[topic_id]
+        except (KeyError, ValueError, IndexError):
+            return 404, {'error': 'unknown topic'}
+        move = random.Random(f"{self.seed}:{topic_id}:{self.info.tick}").uniform(-self.spread, self.spread)
+        prediction = self.info.prices[coin] * (1 + move)
+        return 200, {'data': {'inference_data': {'network_inference_normalized': str(prediction),
+                                                 'timestamp': int(time.time())}}}
+
+
+class DeepSeekStub(StubServer):
+    TOKEN_PATTERN = re.compile(r'Token: ([A-Za-z0-9_]+)')
+
+    def __init__(self, latency=0.0, approve_ratio=0.5, seed=0):
+        """
+        DeepSeek chat-completions stand-in answering single and batched review prompts.
+
+        :param approve_ratio: Share of tokens approved (deterministic per token and seed).
+        """
+        super().__init__(latency)
+        self.approve_ratio = approve_ratio
+        self.seed = seed
+        self.trades = 0
+
+    def _verdict(self, token):
+        approved = random.Random(f"{self.seed}:{token}").random() < self.approve_ratio
+        return {'token': token, 'approval': approved, 'confidence': 85 if approved else 40,
+                'reasoning': 'Benchmark stub', 'risk_score': 3}
+
+    def respond(self, path, body):
+        prompt = json.loads(body)['messages'][0]['content']
+        tokens = self.TOKEN_PATTERN.findall(prompt)
+        with self._lock:
+            self.trades += len(tokens)
+        verdicts = [self._verdict(token) for token in tokens]
+        content = json.dumps(verdicts if len(verdicts) > 1 else verdicts[0] if verdicts else {})
+        return 200, {'choices': [{'message': {'role': 'assistant', 'content': content}}]}
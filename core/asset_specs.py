@@ -0,0 +1,111 @@
+import logging
+import math
+import threading
+import time
+from utils.helpers import round_price
+
+logger = logging.getLogger(__name__)
+
+
+class AssetSpec:
+    __slots__ = ('name', 'sz_decimals', 'max_leverage', 'min_size', 'min_notional')
+
+    def __init__(self, name, sz_decimals, max_leverage, min_notional=10.0):
+        """
+        Order constraints for one perp asset, precomputed from its universe entry.
+
+        :param name: Coin name, e.g. "BTC".
+        :param sz_decimals: Decimals allowed in order sizes.
+        :param max_leverage: Highest leverage the exchange accepts for the asset.
+        :param min_notional: Minimum order value in USD.
+        """
+        self.name = name
+        self.sz_decimals = sz_decimals
+        self.max_leverage = max_leverage
+        self.min_size = 10 ** -sz_decimals
+        self.min_notional = min_notional
+
+    def round_size(self, size):
+        return max(round(size, self.sz_decimals), self.min_size)
+
+    def round_price(self, price):
+        return round_price(price, self.sz_decimals)
+
+    def min_order_size(self, price, buffer=0.1):
+        """
+        Smallest size worth at least min_notional at this price, with a buffer for price moves.
+        """
+        scale = 10 ** self.sz_decimals
+        return math.ceil(self.min_notional / price * (1 + buffer) * scale) / scale
+
+
+class AssetSpecRegistry:
+    def __init__(self, info, refresh_interval=3600, min_notional=10.0, retry_interval=60):
+        """
+        Per-coin order constraints for the whole HyperLiquid perp universe, loaded from
+        info.meta() once and refreshed in the background so new listings are picked up.
+
+        :param info: HyperLiquid Info client.
+        :param refresh_interval: Seconds between background refreshes.
+        :param min_notional: Minimum order value in USD applied to every asset.
+        :param retry_interval: Seconds lookups wait after a failed load before fetching again,
+                               so an API outage does not cost a meta request per order.
+        """
+        self.info = info
+        self.refresh_interval = refresh_interval
+        self.min_notional = min_notional
+        self.retry_interval = retry_interval
+        self._specs = None
+        self._failed_at = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._worker = None
+
+    def load(self):
+        """
+        Fetches the universe and swaps in a new spec table; keeps the old one on failure.
+        """
+        try:
+            universe = self.info.meta()["universe"]
+        except Exception as e:
+            logger.error("Error loading asset specs: %s", e)
+            self._failed_at = time.monotonic()
+            return False
+        specs = {
+            asset["name"]: AssetSpec(asset["name"], int(asset["szDecimals"]), int(asset.get("maxLeverage", 1)),
+                                     self.min_notional)
+            for asset in universe
+            if not asset.get("isDelisted")
+        }
+        with self._lock:
+            self._specs = specs
+            self._failed_at = None
+        return True
+
+    def get(self, coin):
+        """
+        Returns the AssetSpec for a coin, or None if it is not listed (or metadata is unavailable).
+        """
+        if self._specs is None and (self._failed_at is None
+                                    or time.monotonic() - self._failed_at >= self.retry_interval):
+            self.load()
+        specs = self._specs
+        return specs.get(coin) if specs else None
+
+    def coins(self):
+        return list(self._specs or {})
+
+    def start(self):
+        if self._worker is not None:
+            return
+        if self._specs is None:
+            self.load()
+        self._worker = threading.Thread(target=self._refresh_loop, name="asset-specs", daemon=True)
+        self._worker.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _refresh_loop(self):
+        while not self._stop.wait(self.refresh_interval):
+            self.load()
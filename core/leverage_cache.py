@@ -0,0 +1,59 @@
+import threading
+
+
+class LeverageCache:
+    def __init__(self):
+        """
+        Last known leverage and margin mode per coin, so update_leverage is only sent to the
+        exchange when the target actually differs.
+
+        - Seeded from the leverage HyperLiquid reports on open positions in user_state
+        - Updated from our own successful update_leverage calls
+        - Cleared for a coin when an update fails, so the next order re-sends it
+        """
+        self.avoided = 0
+        self.sent = 0
+        self._lock = threading.Lock()
+        self._leverage = {}
+
+    def seed(self, positions):
+        """
+        Records the leverage of positions as returned in user_state assetPositions.
+
+        :param positions: Position dicts with 'coin' and 'leverage' ({"type", "value"}).
+        """
+        with self._lock:
+            for position in positions:
+                leverage = position.get('leverage') or {}
+                if 'value' not in leverage or 'type' not in leverage:
+                    continue
+                self._leverage[position['coin']] = (int(leverage['value']), leverage['type'] == 'cross')
+
+    def matches(self, coin, leverage, cross_margin):
+        """
+        True (and counted as an avoided call) if the coin is already at this leverage and mode.
+        """
+        with self._lock:
+            if self._leverage.get(coin) == (int(leverage), bool(cross_margin)):
+                self.avoided += 1
+                return True
+            self.sent += 1
+            return False
+
+    def record(self, coin, leverage, cross_margin):
+        with self._lock:
+            self._leverage[coin] = (int(leverage), bool(cross_margin))
+
+    def invalidate(self, coin=None):
+        with self._lock:
+            if coin is None:
+                self._leverage.clear()
+            else:
+                self._leverage.pop(coin, None)
+
+    def get(self, coin):
+        with self._lock:
+            return self._leverage.get(coin)
+
+    def stats(self):
+        return {"avoided": self.avoided, "sent": self.sent}
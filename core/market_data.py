@@ -0,0 +1,116 @@
+import threading
+import time
+from utils import metrics
+
+
+class MarketDataCache:
+    def __init__(self, info, ttl=5.0):
+        """
+        Short-lived snapshot of HyperLiquid market data shared by the price, mid and position paths.
+
+        :param info: HyperLiquid Info client used to fetch snapshots.
+        :param ttl: Seconds a snapshot stays valid before it is fetched again.
+        """
+        self.info = info
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._asset_ctxs = None
+        self._asset_ctxs_at = 0.0
+        self._coin_index = {}
+        self._mids = None
+        self._mids_at = 0.0
+        self._user_states = {}
+
+    def _is_fresh(self, fetched_at):
+        return time.monotonic() - fetched_at < self.ttl
+
+    def invalidate(self):
+        """
+        Drop every snapshot so the next lookup fetches fresh data (called once per trading cycle).
+        """
+        with self._lock:
+            self._asset_ctxs = None
+            self._mids = None
+            self._user_states.clear()
+
+    def invalidate_user_state(self, address=None):
+        """
+        Drop cached account state after our own orders change it.
+        """
+        with self._lock:
+            if address is None:
+                self._user_states.clear()
+            else:
+                self._user_states.pop(address, None)
+
+    def meta_and_asset_ctxs(self):
+        """
+        Returns the (universe, asset contexts) snapshot, fetching it at most once per TTL.
+        """
+        with self._lock:
+            if self._asset_ctxs is not None and self._is_fresh(self._asset_ctxs_at):
+                self.hits += 1
+                metrics.inc("market_data_cache_requests", snapshot="meta_and_asset_ctxs", result="hit")
+                return self._asset_ctxs
+            self.misses += 1
+            metrics.inc("market_data_cache_requests", snapshot="meta_and_asset_ctxs", result="miss")
+            with metrics.timed("hyperliquid_request_seconds", endpoint="meta_and_asset_ctxs"):
+                meta = self.info.meta_and_asset_ctxs()
+            self._asset_ctxs = meta
+            self._asset_ctxs_at = time.monotonic()
+            self._coin_index = {asset["name"]: index for index, asset in enumerate(meta[0]["universe"])}
+            return meta
+
+    def asset_data(self, coin):
+        """
+        Returns the merged universe entry and asset context for a coin, or None if it is not listed.
+        """
+        meta = self.meta_and_asset_ctxs()
+        coin_index = self._coin_index.get(coin)
+        if coin_index is None:
+            return None
+
+        universe_data = meta[0]["universe"]
+        additional_data = meta[1] if len(meta) > 1 else []
+        coin_data = dict(universe_data[coin_index])
+        if coin_index < len(additional_data):
+            coin_data.update(additional_data[coin_index])
+        return coin_data
+
+    def all_mids(self):
+        """
+        Returns the {coin: mid} snapshot, fetching it at most once per TTL.
+        """
+        with self._lock:
+            if self._mids is not None and self._is_fresh(self._mids_at):
+                self.hits += 1
+                metrics.inc("market_data_cache_requests", snapshot="all_mids", result="hit")
+                return self._mids
+            self.misses += 1
+            metrics.inc("market_data_cache_requests", snapshot="all_mids", result="miss")
+            with metrics.timed("hyperliquid_request_seconds", endpoint="all_mids"):
+                self._mids = self.info.all_mids()
+            self._mids_at = time.monotonic()
+            return self._mids
+
+    def user_state(self, address):
+        """
+        Returns the clearinghouse state for an address, fetching it at most once per TTL.
+        """
+        with self._lock:
+            cached = self._user_states.get(address)
+            if cached is not None and self._is_fresh(cached[1]):
+                self.hits += 1
+                metrics.inc("market_data_cache_requests", snapshot="user_state", result="hit")
+                return cached[0]
+            self.misses += 1
+            metrics.inc("market_data_cache_requests", snapshot="user_state", result="miss")
+            with metrics.timed("hyperliquid_request_seconds", endpoint="user_state"):
+                state = self.info.user_state(address)
+            self._user_states[address] = (state, time.monotonic())
+            return state
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses}
@@ -0,0 +1,204 @@
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class MarketStream:
+    def __init__(self, info, address, stale_after=10, price_stream=None):
+        """
+        Streaming market and account state fed by HyperLiquid websocket subscriptions.
+
+        - allMids keeps the latest mid for every coin
+        - userFills updates positions locally from our own fills
+        - orderUpdates keeps the open-order book current
+        - userEvents (liquidations, cancels we did not send) marks state for a REST resync
+
+        Readers fall back to REST whenever is_live() is False, e.g. after a disconnect.
+        Fills and order updates may have been missed while the stream was down, so the
+        first read after it comes back resyncs positions and open orders over REST.
+
+        :param info: HyperLiquid Info client created with skip_ws=False.
+        :param address: Account or vault address whose positions are tracked.
+        :param stale_after: Seconds without any message before the stream counts as down.
+        :param price_stream: Optional MarketStream that already subscribes to allMids. When set,
+                             mids and listeners come from it and only the user channels are
+                             subscribed on info. HyperLiquid's userEvents and orderUpdates
+                             messages carry no user field, so every further account needs its
+                             own Info client (its own socket) for them.
+        """
+        self.info = info
+        self.address = address
+        self.stale_after = stale_after
+        self._lock = threading.Lock()
+        self._mids = {}
+        self._positions = {}
+        self._open_orders = {}
+        self._last_message_at = 0.0
+        self._needs_resync = True
+        self._started = False
+        self._listeners = []
+        self.price_stream = price_stream
+
+    def start(self):
+        """
+        Seeds positions and open orders over REST, then subscribes to the streams.
+        """
+        if self._started:
+            return
+        self.resync()
+        if self.price_stream is None:
+            self.info.subscribe({"type": "allMids"}, self._on_all_mids)
+        self.info.subscribe({"type": "userFills", "user": self.address}, self._on_user_fills)
+        self.info.subscribe({"type": "userEvents", "user": self.address}, self._on_user_events)
+        self.info.subscribe({"type": "orderUpdates", "user": self.address}, self._on_order_updates)
+        self._started = True
+        logger.info("Market stream subscribed for %s", self.address)
+
+    def add_listener(self, callback):
+        """
+        Registers callback(mids) to run on the websocket thread after every allMids update.
+        """
+        if self.price_stream is not None:
+            self.price_stream.add_listener(callback)
+            return
+        with self._lock:
+            self._listeners.append(callback)
+
+    def remove_listener(self, callback):
+        if self.price_stream is not None:
+            self.price_stream.remove_listener(callback)
+            return
+        with self._lock:
+            if callback in self._listeners:
+                self._listeners.remove(callback)
+
+    def is_live(self):
+        ws_manager = getattr(self.info, "ws_manager", None)
+        live = ws_manager is not None and ws_manager.is_alive() and ws_manager.ws_ready
+        if self.price_stream is None:
+            live = live and time.monotonic() - self._last_message_at < self.stale_after
+        else:
+            # User channels are quiet between trades; message age is tracked on the price feed
+            live = live and self.price_stream.is_live()
+        if not live:
+            self._needs_resync = True
+        return live
+
+    def resync(self):
+        """
+        Replaces positions and open orders with a fresh REST snapshot.
+        """
+        state = self.info.user_state(self.address)
+        orders = self.info.open_orders(self.address)
+        positions = {}
+        for pos in state.get('assetPositions', []):
+            position_data = pos.get('position', {})
+            if float(position_data.get('szi', 0)) != 0:
+                positions[position_data.get('coin')] = {
+                    'coin': position_data.get('coin'),
+                    'szi': float(position_data.get('szi', 0)),
+                    'entryPrice': float(position_data.get('entryPx', 0)),
+                    'leverage': position_data.get('leverage', {})
+                }
+        with self._lock:
+            self._positions = positions
+            self._open_orders = {order['oid']: order for order in orders}
+            self._needs_resync = False
+
+    def get_mid(self, coin):
+        if self.price_stream is not None:
+            return self.price_stream.get_mid(coin)
+        with self._lock:
+            mid = self._mids.get(coin)
+        return float(mid) if mid is not None else None
+
+    def get_mids(self):
+        if self.price_stream is not None:
+            return self.price_stream.get_mids()
+        with self._lock:
+            return dict(self._mids)
+
+    def get_positions(self):
+        if self._needs_resync:
+            self.resync()
+        with self._lock:
+            return [dict(position) for position in self._positions.values()]
+
+    def get_open_orders(self):
+        if self._needs_resync:
+            self.resync()
+        with self._lock:
+            return [dict(order) for order in self._open_orders.values()]
+
+    def _touch(self):
+        now = time.monotonic()
+        if (self.price_stream is None and self._last_message_at
+                and now - self._last_message_at >= self.stale_after):
+            # First message after a gap (reconnect): local state may have missed updates
+            self._needs_resync = True
+        self._last_message_at = now
+
+    def _on_all_mids(self, msg):
+        mids = msg["data"]["mids"]
+        with self._lock:
+            self._mids.update(mids)
+            listeners = list(self._listeners)
+        self._touch()
+        for listener in listeners:
+            listener(mids)
+
+    def _on_user_fills(self, msg):
+        data = msg["data"]
+        self._touch()
+        # The first message replays historical fills already reflected in the REST seed
+        if data.get("isSnapshot"):
+            return
+        with self._lock:
+            for fill in data.get("fills", []):
+                self._apply_fill(fill)
+
+    def _apply_fill(self, fill):
+        coin = fill["coin"]
+        px = float(fill["px"])
+        sz = float(fill["sz"])
+        start = float(fill["startPosition"])
+        # Round away float noise so a full close lands exactly on zero
+        new_size = round(start + (sz if fill["side"] == "B" else -sz), 10)
+
+        if new_size == 0:
+            self._positions.pop(coin, None)
+            return
+
+        position = self._positions.get(coin)
+        if position is None or start == 0 or (start > 0) != (new_size > 0):
+            # New position or flipped side: the fill price is the entry
+            entry_price = px
+        elif abs(new_size) > abs(start):
+            entry_price = (position['entryPrice'] * abs(start) + px * sz) / abs(new_size)
+        else:
+            entry_price = position['entryPrice']
+
+        self._positions[coin] = {
+            'coin': coin,
+            'szi': new_size,
+            'entryPrice': entry_price,
+            'leverage': position['leverage'] if position else {}
+        }
+
+    def _on_user_events(self, msg):
+        self._touch()
+        data = msg.get("data", {})
+        if "liquidation" in data or "nonUserCancel" in data:
+            self._needs_resync = True
+
+    def _on_order_updates(self, msg):
+        self._touch()
+        with self._lock:
+            for update in msg.get("data", []):
+                order = update["order"]
+                if update.get("status") == "open":
+                    self._open_orders[order["oid"]] = order
+                else:
+                    self._open_orders.pop(order["oid"], None)
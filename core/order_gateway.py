@@ -0,0 +1,87 @@
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class OrderGateway:
+    def __init__(self, manager, max_open_positions=None, max_total_notional=None, max_net_notional=None):
+        """
+        Single point through which order intents from several signal workers reach the exchange.
+        Intents are admitted against account-wide exposure limits before one bulk submission.
+
+        :param manager: OrderManager that owns the exchange connection and position state.
+        :param max_open_positions: Optional cap on positions open at the same time.
+        :param max_total_notional: Optional cap on the summed USD notional of all positions.
+        :param max_net_notional: Optional cap on |long notional - short notional| in USD.
+        """
+        self.manager = manager
+        self.max_open_positions = max_open_positions
+        self.max_total_notional = max_total_notional
+        self.max_net_notional = max_net_notional
+        self.submitted = 0
+        self.rejected = {'open_position': 0, 'max_open_positions': 0, 'max_total_notional': 0,
+                         'max_net_notional': 0}
+        self._lock = threading.Lock()
+
+    def exposure(self):
+        """
+        Returns (open coins, total notional, net notional) of the current positions.
+        """
+        coins = set()
+        total = 0.0
+        net = 0.0
+        for position in self.manager.get_open_positions():
+            notional = float(position['szi']) * float(position['entryPrice'])
+            coins.add(position['coin'])
+            total += abs(notional)
+            net += notional
+        return coins, total, net
+
+    def _intent_notional(self, intent):
+        return self.manager.allowed_amount_per_trade * self.manager.leverage_for(intent['token'])
+
+    def admit(self, intents):
+        """
+        Filters intents against the exposure limits, strongest predicted moves first.
+
+        :param intents: Dicts with token, is_buy and allora_diff.
+        :return: The admitted intents.
+        """
+        coins, total, net = self.exposure()
+        admitted = []
+        for intent in sorted(intents, key=lambda item: abs(item.get('allora_diff') or 0), reverse=True):
+            notional = self._intent_notional(intent)
+            signed = notional if intent['is_buy'] else -notional
+            if intent['token'] in coins:
+                reason = 'open_position'
+            elif self.max_open_positions is not None and len(coins) >= self.max_open_positions:
+                reason = 'max_open_positions'
+            elif self.max_total_notional is not None and total + notional > self.max_total_notional:
+                reason = 'max_total_notional'
+            elif self.max_net_notional is not None and abs(net + signed) > self.max_net_notional:
+                reason = 'max_net_notional'
+            else:
+                coins.add(intent['token'])
+                total += notional
+                net += signed
+                admitted.append(intent)
+                continue
+            self.rejected[reason] += 1
+            logger.info("Order gateway rejected %s: %s", intent['token'], reason)
+        return admitted
+
+    def submit(self, intents):
+        """
+        Admits intents and sends the survivors as one bulk order.
+        :return: Per-order results from OrderManager.create_trade_orders.
+        """
+        with self._lock:
+            admitted = self.admit(intents)
+            if not admitted:
+                return []
+            self.submitted += len(admitted)
+            return self.manager.create_trade_orders([(intent['token'], intent['is_buy']) for intent in admitted])
+
+    def stats(self):
+        return {'submitted': self.submitted, 'rejected': dict(self.rejected)}
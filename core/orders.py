@@ -1,66 +1,198 @@
+import logging
 from hyperliquid.info import Info
 import json
+import threading
 from utils.helpers import round_size, round_price
+from core.market_data import MarketDataCache
+from core.leverage_cache import LeverageCache
+from core.asset_specs import AssetSpecRegistry
+from utils import metrics
+
+logger = logging.getLogger(__name__)
 
 
 class OrderManager:
-    def __init__(self, exchange, vault_address, allowed_amount_per_trade, leverage, info: Info):
+    # Used only when the asset spec registry has no entry (metadata unavailable)
+    FALLBACK_SIZE_DECIMALS = {'BTC': 3, 'ETH': 2, 'SOL': 1, 'default': 1}
+    FALLBACK_MIN_SIZES = {'BTC': 0.001, 'ETH': 0.01, 'SOL': 0.1, 'default': 0.1}
+    # Slippage allowance for market orders, as in the SDK's market_open
+    MARKET_SLIPPAGE = 0.05
+
+    def __init__(self, exchange, vault_address, allowed_amount_per_trade, leverage, info: Info, market_data=None,
+                 market_stream=None, asset_specs=None):
         self.exchange = exchange
         self.info = info
+        self.market_data = market_data or MarketDataCache(info)
+        # Optional MarketStream; reads use it while it is live and fall back to REST otherwise
+        self.market_stream = market_stream
+        # coin -> position snapshot, fetched once per cycle and updated by our own orders
+        self._positions = None
+        self._positions_lock = threading.Lock()
         self.vault_address = vault_address
         self.allowed_amount_per_trade = allowed_amount_per_trade
         self.leverage = leverage
-        
-        # Define size decimals for each coin
-        self.size_decimals = {
-            'BTC': 3,  # 0.001 BTC minimum
-            'ETH': 2,  # 0.01 ETH minimum
-            'SOL': 1,  # 0.1 SOL minimum
-            'default': 1
-        }
+        # Leverage per coin, seeded from user_state, so unchanged leverage is not re-sent
+        self.leverage_cache = LeverageCache()
+        # szDecimals, max leverage and minimum notional for every listed coin, from info.meta()
+        self.asset_specs = asset_specs or AssetSpecRegistry(info)
 
     def round_size(self, coin: str, size: float) -> float:
         """
         Round size according to coin's decimal requirements
         """
-        decimals = self.size_decimals.get(coin, self.size_decimals['default'])
-        rounded_size = round(size, decimals)
-        
-        # Ensure minimum sizes
-        min_sizes = {
-            'BTC': 0.001,
-            'ETH': 0.01,
-            'SOL': 0.1,
-            'default': 0.1
-        }
-        
-        min_size = min_sizes.get(coin, min_sizes['default'])
-        return max(rounded_size, min_size)
+        spec = self.asset_specs.get(coin)
+        if spec is not None:
+            return spec.round_size(size)
+        decimals = self.FALLBACK_SIZE_DECIMALS.get(coin, self.FALLBACK_SIZE_DECIMALS['default'])
+        min_size = self.FALLBACK_MIN_SIZES.get(coin, self.FALLBACK_MIN_SIZES['default'])
+        return max(round(size, decimals), min_size)
+
+    def round_order_price(self, coin, price):
+        """
+        Round a limit price to 5 significant figures and the coin's allowed decimals.
+        """
+        spec = self.asset_specs.get(coin)
+        return spec.round_price(price) if spec is not None else round_price(price)
+
+    def leverage_for(self, coin):
+        """
+        Configured leverage, capped at the coin's maximum.
+        """
+        spec = self.asset_specs.get(coin)
+        return min(self.leverage, spec.max_leverage) if spec is not None else self.leverage
+
+    def entry_size(self, coin, current_price):
+        """
+        Order size for a new position: allowed amount times leverage, rounded to the coin's
+        szDecimals and never below the minimum order value.
+        """
+        size = self.round_size(coin, (self.allowed_amount_per_trade / current_price) * self.leverage_for(coin))
+        return max(size, self.calculate_min_order_size(coin, current_price))
 
     def create_order(self, coin, is_buy, size, price, order_type, reduce_only=False):
         """
         Places a buy or sell order with size and price rounding.
         """
-        print(f"Placing {'Buy' if is_buy else 'Sell'} order for {size} {coin} at {price}")
-        return self.exchange.order(coin, is_buy, size, price, order_type, reduce_only=reduce_only)
+        logger.info("Placing %s order for %s %s at %s", 'Buy' if is_buy else 'Sell', size, coin, price)
+        with metrics.timed("hyperliquid_request_seconds", endpoint="order"):
+            return self.exchange.order(coin, is_buy, size, price, order_type, reduce_only=reduce_only)
 
     def cancel_order(self, coin, oid):
-        print(f"Cancelling order {oid} for {coin}")
-        return self.exchange.cancel(coin, oid)
+        logger.info("Cancelling order %s for %s", oid, coin)
+        with metrics.timed("hyperliquid_request_seconds", endpoint="cancel"):
+            return self.exchange.cancel(coin, oid)
 
     def update_leverage(self, coin, leverage, cross_margin=True):
+        """
+        Sets leverage and margin mode for a coin; returns None without calling the exchange
+        when the cached state already matches.
+        """
+        if self.leverage_cache.get(coin) is None:
+            # Open positions carry their leverage (streamed or from the per-cycle snapshot)
+            self.leverage_cache.seed(self.get_open_positions())
+        if self.leverage_cache.matches(coin, leverage, cross_margin):
+            metrics.inc("leverage_updates", result="avoided")
+            return None
+        metrics.inc("leverage_updates", result="sent")
         mode = "cross margin" if cross_margin else "isolated margin"
-        print(f"Updating leverage for {coin} to {leverage}x ({mode})")
-        return self.exchange.update_leverage(leverage, coin, cross_margin)
+        logger.info("Updating leverage for %s to %sx (%s)", coin, leverage, mode)
+        try:
+            with metrics.timed("hyperliquid_request_seconds", endpoint="update_leverage"):
+                response = self.exchange.update_leverage(leverage, coin, cross_margin)
+        except Exception:
+            self.leverage_cache.invalidate(coin)
+            raise
+        if isinstance(response, dict) and response.get("status") == "ok":
+            self.leverage_cache.record(coin, leverage, cross_margin)
+        else:
+            self.leverage_cache.invalidate(coin)
+        return response
 
     def market_open(self, coin, is_buy, size, leverage=5, cross_margin=True):
         self.update_leverage(coin, leverage, cross_margin=cross_margin)
-        print(f"Market {'Buy' if is_buy else 'Sell'} order for {size} {coin}")
-        return self.exchange.market_open(coin, is_buy, size)
+        logger.info("Market %s order for %s %s", 'Buy' if is_buy else 'Sell', size, coin)
+        with metrics.timed("hyperliquid_request_seconds", endpoint="market_open"):
+            return self.exchange.market_open(coin, is_buy, size)
 
     def market_close(self, coin):
-        print(f"Closing position for {coin}")
-        return self.exchange.market_close(coin)
+        logger.info("Closing position for %s", coin)
+        try:
+            with metrics.timed("hyperliquid_request_seconds", endpoint="market_close"):
+                response = self.exchange.market_close(coin)
+            if self._order_status(response) is not None:
+                with self._positions_lock:
+                    if self._positions is not None:
+                        self._positions.pop(coin, None)
+            else:
+                self._invalidate_positions()
+            return response
+        finally:
+            self.market_data.invalidate_user_state(self.vault_address)
+
+    def refresh_market_data(self):
+        """
+        Starts a new trading cycle: the next price, mid and position lookups fetch fresh snapshots.
+        """
+        self.market_data.invalidate()
+        self._invalidate_positions()
+
+    def _invalidate_positions(self):
+        with self._positions_lock:
+            self._positions = None
+
+    @staticmethod
+    def _order_status(response):
+        """
+        Returns the first order status of a successful exchange response, or None.
+        """
+        try:
+            if response.get("status") != "ok":
+                return None
+            status = response["response"]["data"]["statuses"][0]
+        except (AttributeError, KeyError, IndexError, TypeError):
+            return None
+        return None if "error" in status else status
+
+    def _record_fill(self, coin, is_buy, status):
+        """
+        Applies our own market order fill to the position snapshot without refetching it.
+        """
+        filled = status.get("filled")
+        if not filled:
+            self._invalidate_positions()
+            return
+        size = float(filled["totalSz"]) * (1 if is_buy else -1)
+        price = float(filled["avgPx"])
+        with self._positions_lock:
+            if self._positions is None:
+                return
+            position = self._positions.get(coin)
+            if position is None:
+                self._positions[coin] = {'coin': coin, 'szi': size, 'entryPrice': price,
+                                         'leverage': {'type': 'cross', 'value': self.leverage_for(coin)}}
+            else:
+                # Adding to or reducing an existing position: let the next cycle resync it
+                self._positions = None
+
+    def _positions_snapshot(self):
+        with self._positions_lock:
+            if self._positions is not None:
+                return self._positions
+        positions = self._fetch_open_positions()
+        if positions is None:
+            return {}
+        with self._positions_lock:
+            self._positions = {pos['coin']: pos for pos in positions}
+            return self._positions
+
+    def get_position(self, coin):
+        if self._stream_live():
+            return next((pos for pos in self.market_stream.get_positions() if pos['coin'] == coin), None)
+        position = self._positions_snapshot().get(coin)
+        return dict(position) if position else None
+
+    def has_open_position(self, coin):
+        return self.get_position(coin) is not None
 
     def list_open_positions(self):
         """
@@ -69,15 +201,25 @@ class OrderManager:
         positions = self.get_open_positions()
         return [pos['coin'] for pos in positions] if positions else []
 
+    def _stream_live(self):
+        return self.market_stream is not None and self.market_stream.is_live()
+
     def get_open_positions(self):
         """
         Get all open positions with correct position structure
         Returns list of positions with standardized format
         """
+        if self._stream_live():
+            return self.market_stream.get_positions()
+        return [dict(pos) for pos in self._positions_snapshot().values()]
+
+    def _fetch_open_positions(self):
+        """
+        Fetches open positions from the account state; None if the request failed.
+        """
         try:
-            response = self.info.user_state(self.vault_address)
+            response = self.market_data.user_state(self.vault_address)
             positions = response.get('assetPositions', [])
-            print(positions)
             
             formatted_positions = []
             for pos in positions:
@@ -92,17 +234,17 @@ class OrderManager:
                             'leverage': position_data.get('leverage', {})
                         })
             
+            self.leverage_cache.seed(formatted_positions)
             return formatted_positions
             
         except Exception as e:
-            print(f"Error getting positions: {str(e)}")
-            return []
+            logger.error("Error getting positions: %s", e)
+            return None
 
     def get_wallet_summary(self, mode="cross"):
-        print("Fetching wallet summary...")
-        response = self.info.user_state(self.vault_address)
+        response = self.market_data.user_state(self.vault_address)
         summary = response.get("crossMarginSummary", {}) if mode == "cross" else response.get("marginSummary", {})
-        print(f" Wallet Summary: {summary}")
+        logger.info("Wallet summary: %s", summary)
         return {
             "account_value": summary.get("accountValue"),
             "total_position_value": summary.get("totalNtlPos"),
@@ -114,6 +256,9 @@ class OrderManager:
         """
         Calculate minimum order size to meet $10 minimum requirement
         """
+        spec = self.asset_specs.get(coin)
+        if spec is not None:
+            return spec.min_order_size(current_price)
         min_value = 10.0  # $10 minimum
         min_size = (min_value / current_price) * 1.1  # Add 10% buffer
         
@@ -129,64 +274,198 @@ class OrderManager:
             # Get current price
             current_price = self.get_current_price(coin)
             if current_price is None:
-                print(f"Could not get current price for {coin}, skipping trade")
+                logger.warning("Could not get current price for %s, skipping trade", coin)
                 return None
             
-            # Calculate size in coin units
-            size = (self.allowed_amount_per_trade / current_price) * self.leverage
+            # Size in coin units, rounded to the coin's szDecimals
+            rounded_size = self.entry_size(coin, current_price)
             
-            # Round size according to coin's requirements
-            rounded_size = self.round_size(coin, size)
-            
-            print(f"Creating {'Buy' if is_buy else 'Sell'} order for {rounded_size} {coin}")
+            logger.info("Creating %s order for %s %s", 'Buy' if is_buy else 'Sell', rounded_size, coin)
             
             # Update leverage before order
-            self.update_leverage(coin, self.leverage)
+            self.update_leverage(coin, self.leverage_for(coin))
             
             # Create market order
-            order = self.exchange.market_open(
-                name=coin,
-                is_buy=is_buy,
-                sz=rounded_size
-            )
+            with metrics.timed("hyperliquid_request_seconds", endpoint="market_open"):
+                order = self.exchange.market_open(
+                    name=coin,
+                    is_buy=is_buy,
+                    sz=rounded_size
+                )
             
-            print(f"Order response: {order}")
+            logger.debug("Order response: %s", order)
+            self.market_data.invalidate_user_state(self.vault_address)
+            status = self._order_status(order)
+            if status is not None:
+                self._record_fill(coin, is_buy, status)
             return order
             
         except Exception as e:
-            print(f"Error creating order: {str(e)}")
+            logger.error("Error creating order: %s", e)
             return None
 
-    def get_price(self, coin):
-        coin = str(coin).upper()
-        # Fetch metadata for available tokens
-        meta = self.info.meta_and_asset_ctxs()
+    def create_trade_orders(self, entries):
+        """
+        Opens several market positions with a single signed bulk order request.
 
-        # Parse universe and additional data
-        universe_data = meta[0]["universe"]
-        additional_data = meta[1] if len(meta) > 1 else []
+        :param entries: Iterable of (coin, is_buy) pairs.
+        :return: One result dict per entry (coin, is_buy, size, status, error), in order.
+        """
+        orders = []
+        results = []
+        for coin, is_buy in entries:
+            current_price = self.get_current_price(coin)
+            if current_price is None:
+                results.append(self._order_result(coin, is_buy, None, error="price unavailable"))
+                continue
+            size = self.entry_size(coin, current_price)
+            try:
+                # Skipped when the cached leverage already matches
+                self.update_leverage(coin, self.leverage_for(coin))
+            except Exception as e:
+                results.append(self._order_result(coin, is_buy, size, error=f"leverage update failed: {str(e)}"))
+                continue
+            orders.append({'coin': coin, 'is_buy': is_buy, 'size': size, 'price': current_price,
+                           'reduce_only': False})
+            results.append(None)
+        submitted = iter(self.submit_market_orders(orders))
+        return [result if result is not None else next(submitted) for result in results]
 
-        # Find the coin data from universe_data
-        coin_index = next((index for index, asset in enumerate(universe_data) if asset["name"] == coin), None)
-        if coin_index is None:
-            print(f"Oops... This coin is not supported by HyperLiquid. Coin: {coin}")
-            return None
+    def market_close_many(self, coins):
+        """
+        Closes the positions in several coins with a single signed bulk order request.
 
-        # Merge data using the same index in additional_data
-        coin_data = universe_data[coin_index]
-        if coin_index < len(additional_data):
-            coin_data.update(additional_data[coin_index])
+        :return: One result dict per coin that had an open position.
+        """
+        orders = []
+        for coin in coins:
+            position = self.get_position(coin)
+            if position is None or float(position['szi']) == 0:
+                continue
+            orders.append({'coin': coin, 'is_buy': float(position['szi']) < 0, 'size': abs(float(position['szi'])),
+                           'price': self.get_current_price(coin), 'reduce_only': True})
+        return self.submit_market_orders(orders)
 
-        if coin_data:
-            return coin_data["oraclePx"]
+    def slippage_price(self, coin, is_buy, price, slippage=None):
+        """
+        Aggressive limit price for a market order: the reference price moved by the slippage
+        allowance against us, rounded to the coin's price tick.
+        """
+        slippage = self.MARKET_SLIPPAGE if slippage is None else slippage
+        return self.round_order_price(coin, price * (1 + slippage) if is_buy else price * (1 - slippage))
+
+    def submit_market_orders(self, orders):
+        """
+        Sends market (aggressive IoC limit) orders for several coins in one bulk request
+        and applies the fills to the position snapshot.
+
+        :param orders: Dicts with coin, is_buy, size, reduce_only and optionally price
+                       (the reference price for the slippage limit; the cached mid if missing).
+        :return: One result dict per order (coin, is_buy, size, status, error), in order.
+        """
+        if not orders:
+            return []
+        mids = None
+        requests = []
+        priced = []
+        results = []
+        for order in orders:
+            price = order.get('price')
+            if price is None:
+                if mids is None:
+                    mids = self.market_data.all_mids()
+                price = mids.get(order['coin'])
+            if price is None:
+                results.append(self._order_result(order['coin'], order['is_buy'], order['size'],
+                                                  error="price unavailable"))
+                continue
+            requests.append({
+                'coin': order['coin'],
+                'is_buy': order['is_buy'],
+                'sz': order['size'],
+                'limit_px': self.slippage_price(order['coin'], order['is_buy'], float(price)),
+                'order_type': {'limit': {'tif': 'Ioc'}},
+                'reduce_only': order.get('reduce_only', False)
+            })
+            priced.append(order)
+            results.append(None)
+        submitted = iter(self._submit_bulk(priced, requests))
+        return [result if result is not None else next(submitted) for result in results]
+
+    def _submit_bulk(self, orders, requests):
+        """
+        Sends the priced order requests in one bulk_orders call and maps the statuses back.
+        """
+        if not requests:
+            return []
+        logger.info("Submitting %d market orders: %s", len(requests),
+                    ', '.join(('Buy ' if r['is_buy'] else 'Sell ') + str(r['sz']) + ' ' + r['coin'] for r in requests))
+
+        try:
+            with metrics.timed("hyperliquid_request_seconds", endpoint="bulk_orders"):
+                response = self.exchange.bulk_orders(requests)
+        except Exception as e:
+            logger.error("Error submitting bulk order: %s", e)
+            self._invalidate_positions()
+            return [self._order_result(o['coin'], o['is_buy'], o['size'], error=str(e)) for o in orders]
+        finally:
+            self.market_data.invalidate_user_state(self.vault_address)
+
+        logger.debug("Bulk order response: %s", response)
+        try:
+            if response.get("status") != "ok":
+                raise ValueError(response.get("response"))
+            statuses = list(response["response"]["data"]["statuses"])
+        except (AttributeError, KeyError, TypeError, ValueError) as e:
+            self._invalidate_positions()
+            return [self._order_result(o['coin'], o['is_buy'], o['size'], error=str(e)) for o in orders]
+
+        statuses += [{"error": "missing from bulk response"}] * (len(orders) - len(statuses))
+        results = []
+        for order, status in zip(orders, statuses):
+            if "error" in status:
+                results.append(self._order_result(order['coin'], order['is_buy'], order['size'],
+                                                  error=status["error"]))
+                continue
+            if order.get('reduce_only'):
+                if status.get("filled"):
+                    with self._positions_lock:
+                        if self._positions is not None:
+                            self._positions.pop(order['coin'], None)
+                else:
+                    self._invalidate_positions()
+            else:
+                self._record_fill(order['coin'], order['is_buy'], status)
+            results.append(self._order_result(order['coin'], order['is_buy'], order['size'], status=status))
+        return results
+
+    @staticmethod
+    def _order_result(coin, is_buy, size, status=None, error=None):
+        return {'coin': coin, 'is_buy': is_buy, 'size': size, 'status': status, 'error': error}
+
+    def get_price(self, coin):
+        coin = str(coin).upper()
+        # Streamed mids replace the REST oracle price while the websocket is live
+        if self._stream_live():
+            mid = self.market_stream.get_mid(coin)
+            if mid is not None:
+                return mid
+        # Universe and asset contexts come from the per-cycle snapshot with an O(1) name lookup
+        coin_data = self.market_data.asset_data(coin)
+        if coin_data is None:
+            logger.warning("Coin %s is not supported by HyperLiquid", coin)
+            return None
 
-        return None
+        return coin_data.get("oraclePx")
 
     def get_open_orders(self):
-        return self.info.open_orders(self.vault_address)
+        if self._stream_live():
+            return self.market_stream.get_open_orders()
+        with metrics.timed("hyperliquid_request_seconds", endpoint="open_orders"):
+            return self.info.open_orders(self.vault_address)
 
     def modify_open_order(self, name, is_buy, sz, order_type,   order_id, limit_price):
-        print("OID->",order_id)
+        logger.info("Modifying order %s", order_id)
         return self.exchange.modify_order(oid=order_id,
                                           limit_px=limit_price,
                                           name=name,
@@ -198,13 +477,17 @@ class OrderManager:
         """
         Get the current price for a given coin
         """
+        if self._stream_live():
+            mid = self.market_stream.get_mid(coin)
+            if mid is not None:
+                return mid
         try:
-            # Use info.all_mids() instead of exchange.get_all_mids()
-            market_info = self.info.all_mids()
+            # Mids come from the per-cycle snapshot instead of one all_mids() request per coin
+            market_info = self.market_data.all_mids()
             if coin in market_info:
                 return float(market_info[coin])
             raise ValueError(f"Price not found for {coin}")
         except Exception as e:
-            print(f"Error getting price for {coin}: {str(e)}")
+            logger.warning("Error getting price for %s: %s", coin, e)
             return None
 
@@ -1,83 +1,331 @@
+import atexit
+import logging
+import os
+import queue
 import sqlite3
+import threading
+import time
 from datetime import datetime
-import os
+import numpy as np
+from database.migrations import apply_migrations
+from utils import metrics
 
-class DatabaseManager:
-    def __init__(self):
-        self.db_path = 'trading_logs.db'
-        print(f"Initializing database at {self.db_path}")  # Debug print
-        self._create_tables()
-    
-    def _create_tables(self):
-        """
-        Create tables if they don't exist
-        """
-        print("Creating tables...")  # Debug print
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS trade_logs (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
-                token TEXT,
-                current_price REAL,
-                allora_prediction REAL,
-                prediction_difference_percent REAL,
-                volatility_24h REAL,
-                trade_direction TEXT,
-                entry_price REAL,
-                market_condition TEXT,
-                reason TEXT
-            )
-        """)
-        
-        conn.commit()
-        conn.close()
-        print(f"Database initialized successfully")  # Debug print
+logger = logging.getLogger(__name__)
 
-    def log_trade(self, trade_data):
-        print(f"Attempting to log trade: {trade_data}")  # Debug print
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
+INSERT_TRADE_SQL = """
+    INSERT INTO trade_logs (
+        timestamp, token, current_price, allora_prediction,
+        prediction_difference_percent, volatility_24h,
+        trade_direction, entry_price, market_condition, reason, trend
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+UPDATE_TRADE_RESULT_SQL = """
+    UPDATE trade_logs
+    SET exit_price = ?, profit_loss_percent = ?, trade_result = ?,
+        result_seq = (SELECT COALESCE(MAX(result_seq), 0) + 1 FROM trade_logs)
+    WHERE id = ?
+"""
+
+SAVE_PRICE_WINDOW_SQL = """
+    INSERT OR REPLACE INTO price_windows (token, prices, updated_at) VALUES (?, ?, ?)
+"""
+
+_STOP = object()
+
+
+
+class _Transaction:
+    """
+    A callable run on the writer thread inside its own transaction.
+    """
+    def __init__(self, fn):
+        self.fn = fn
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+    def run(self, conn):
         try:
-            cursor.execute("""
-                INSERT INTO trade_logs (
-                    timestamp, token, current_price, allora_prediction, 
-                    prediction_difference_percent, volatility_24h,
-                    trade_direction, entry_price, market_condition, reason
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (
-                datetime.now(),
-                trade_data['token'],
-                trade_data['current_price'],
-                trade_data['allora_prediction'],
-                trade_data['prediction_diff'],
-                trade_data['volatility'],
-                trade_data['direction'],
-                trade_data['entry_price'],
-                trade_data['market_condition'],
-                trade_data.get('reason', None)
-            ))
-            
+            self.result = self.fn(conn)
             conn.commit()
-            print(f"Successfully logged trade")  # Debug print
-            
         except Exception as e:
-            print(f"Error logging trade: {str(e)}")
+            conn.rollback()
+            self.error = e
         finally:
-            conn.close()
-    
+            self.done.set()
+
+
+def _read_price_windows(conn):
+    rows = conn.execute("SELECT token, prices, updated_at FROM price_windows").fetchall()
+    return {token: (np.frombuffer(blob, dtype='<f8').copy(), updated_at) for token, blob, updated_at in rows}
+
+
+_shared_db = None
+_shared_db_lock = threading.Lock()
+
+
+def get_database(db_path=None):
+    """
+    Returns the process-wide DatabaseManager, creating it (unopened) on first call.
+
+    :param db_path: Database path used when the shared instance is first created;
+                    defaults to the DB_PATH environment variable.
+    """
+    global _shared_db
+    with _shared_db_lock:
+        if _shared_db is None:
+            _shared_db = DatabaseManager(db_path or os.getenv('DB_PATH', 'trading_logs.db'))
+        return _shared_db
+
+
+class DatabaseManager:
+    def __init__(self, db_path='trading_logs.db', batch_size=500):
+        """
+        SQLite storage with one long-lived WAL connection and a background writer thread.
+        The connection is opened lazily on first use (or by initialize()).
+
+        Writes are queued and applied by the writer in group commits, so logging never
+        blocks the trading loop. Call flush() to wait for queued writes; close() (also
+        registered with atexit) flushes before shutting the writer down.
+
+        :param db_path: Path to the SQLite database file.
+        :param batch_size: Maximum number of queued statements applied per commit.
+        """
+        self.db_path = db_path
+        self.batch_size = batch_size
+        self._queue = queue.Queue()
+        self._closed = False
+        self._conn = None
+        self._writer = None
+        self._open_lock = threading.Lock()
+        self._read_conn = None
+        self._read_lock = threading.Lock()
+
+    def initialize(self):
+        """
+        Opens the connection, applies schema migrations and starts the writer. Runs once per
+        instance; later calls are no-ops, and every read or write calls it lazily.
+        """
+        if self._conn is not None:
+            return
+        with self._open_lock:
+            if self._conn is not None:
+                return
+            logger.info("Initializing database at %s", self.db_path)
+            conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            apply_migrations(conn)
+
+            self._writer = threading.Thread(target=self._writer_loop, name="db-writer", daemon=True)
+            self._conn = conn
+            self._writer.start()
+            atexit.register(self.close)
+
+    def get_connection(self):
+        """
+        Returns a long-lived read connection; WAL lets it read while the writer commits.
+        """
+        self.initialize()
+        with self._read_lock:
+            if self._read_conn is None:
+                self._read_conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            return self._read_conn
+
+    def _enqueue(self, sql, params):
+        if self._closed:
+            # Shutdown can race a trade still being logged; losing the row beats crashing the cycle
+            logger.warning("DatabaseManager is closed, dropping write: %s", " ".join(sql.split()[:3]))
+            return
+        self.initialize()
+        self._queue.put((sql, params))
+
+    def log_trade(self, trade_data):
+        self._enqueue(INSERT_TRADE_SQL, (
+            trade_data.get('timestamp') or datetime.now(),
+            trade_data['token'],
+            trade_data['current_price'],
+            trade_data['allora_prediction'],
+            trade_data['prediction_diff'],
+            trade_data['volatility'],
+            trade_data['direction'],
+            trade_data['entry_price'],
+            trade_data['market_condition'],
+            trade_data.get('reason', None),
+            trade_data.get('trend', None)
+        ))
+
+    def update_trade_result(self, trade_id, exit_price, profit_loss, result):
+        self._enqueue(UPDATE_TRADE_RESULT_SQL, (exit_price, profit_loss, result, trade_id))
+
+    def save_price_window(self, token, prices):
+        """
+        Queues a snapshot of a token's rolling price window (oldest first).
+        """
+        blob = np.asarray(prices, dtype='<f8').tobytes()
+        self._enqueue(SAVE_PRICE_WINDOW_SQL, (token, blob, time.time()))
+
+    def load_price_windows(self):
+        """
+        Returns {token: (prices, updated_at)} for every stored price window.
+        """
+        return _read_price_windows(self.get_connection())
+
+    def apply_forwarded(self, writes):
+        """
+        Queues writes collected by a ForwardingDatabase in another process.
+
+        :param writes: List of (method name, args) from ForwardingDatabase.drain().
+        """
+        for method, args in writes:
+            if method not in ForwardingDatabase.WRITE_METHODS:
+                logger.warning("Ignoring forwarded call to %s", method)
+                continue
+            getattr(self, method)(*args)
+
+    def transaction(self, fn):
+        """
+        Runs fn(conn) on the writer connection in a single transaction, after every write
+        queued before it, and returns its result. Exceptions roll back and are re-raised.
+        """
+        if self._closed:
+            raise RuntimeError("DatabaseManager is closed")
+        self.initialize()
+        job = _Transaction(fn)
+        self._queue.put(job)
+        job.done.wait()
+        if job.error is not None:
+            raise job.error
+        return job.result
+
+    def flush(self, timeout=None):
+        """
+        Blocks until every write queued before this call has been committed.
+        :return: True if the writer caught up within the timeout.
+        """
+        if self._writer is None or not self._writer.is_alive():
+            return self._queue.empty()
+        done = threading.Event()
+        self._queue.put(done)
+        return done.wait(timeout)
+
+    def close(self):
+        """
+        Flushes pending writes, stops the writer thread and closes the connections.
+        """
+        if self._closed:
+            return
+        self._closed = True
+        if self._writer is None:
+            return
+        self._queue.put(_STOP)
+        self._writer.join()
+        self._conn.close()
+        with self._read_lock:
+            if self._read_conn is not None:
+                self._read_conn.close()
+                self._read_conn = None
+
+    def _writer_loop(self):
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            # Keep queue order: statements are grouped until a transaction or flush marker
+            statements = []
+            for item in batch:
+                if isinstance(item, tuple):
+                    statements.append(item)
+                    continue
+                if statements:
+                    self._write_batch(statements)
+                    statements = []
+                if isinstance(item, _Transaction):
+                    item.run(self._conn)
+                elif isinstance(item, threading.Event):
+                    item.set()
+            if statements:
+                self._write_batch(statements)
+            if any(item is _STOP for item in batch):
+                return
+
+    @metrics.timed_function("sqlite_write_seconds")
+    def _write_batch(self, statements):
+        """
+        Applies queued statements in one transaction, grouping consecutive identical
+        statements into a single executemany call.
+        """
+        metrics.inc("sqlite_rows_written", len(statements))
+        try:
+            group_sql, group_params = statements[0][0], []
+            for sql, params in statements:
+                if sql != group_sql:
+                    self._conn.executemany(group_sql, group_params)
+                    group_sql, group_params = sql, []
+                group_params.append(params)
+            self._conn.executemany(group_sql, group_params)
+            self._conn.commit()
+        except Exception:
+            self._conn.rollback()
+            # Retry one statement at a time so a single bad row does not drop the whole batch
+            for sql, params in statements:
+                try:
+                    self._conn.execute(sql, params)
+                    self._conn.commit()
+                except Exception as e:
+                    self._conn.rollback()
+                    logger.error("Error logging trade: %s", e)
+
+
+class ForwardingDatabase:
+    WRITE_METHODS = ('log_trade', 'update_trade_result', 'save_price_window')
+
+    def __init__(self, db_path):
+        """
+        DatabaseManager stand-in for worker processes. Reads go straight to the SQLite file;
+        writes are collected and handed to the process that owns the DatabaseManager (see
+        apply_forwarded), so one writer thread serializes every write to the file.
+
+        :param db_path: Path of the database, already initialized by the owning process.
+        """
+        self.db_path = db_path
+        self._writes = []
+        self._lock = threading.Lock()
+        self._read_conn = None
+
+    def _collect(self, method, *args):
+        with self._lock:
+            self._writes.append((method, args))
+
+    def log_trade(self, trade_data):
+        # Stamped here: the owning process may apply the write up to a cycle later
+        self._collect('log_trade', dict(trade_data, timestamp=datetime.now()))
+
     def update_trade_result(self, trade_id, exit_price, profit_loss, result):
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute("""
-            UPDATE trade_logs 
-            SET exit_price = ?, profit_loss_percent = ?, trade_result = ?
-            WHERE id = ?
-        """, (exit_price, profit_loss, result, trade_id))
-        
-        conn.commit()
-        conn.close()
\ No newline at end of file
+        self._collect('update_trade_result', trade_id, exit_price, profit_loss, result)
+
+    def save_price_window(self, token, prices):
+        self._collect('save_price_window', token, np.asarray(prices, dtype='<f8'))
+
+    def load_price_windows(self):
+        if self._read_conn is None:
+            self._read_conn = sqlite3.connect(f"file:{self.db_path}?mode=ro", uri=True, check_same_thread=False)
+        return _read_price_windows(self._read_conn)
+
+    def drain(self):
+        """
+        Returns and clears the writes collected so far.
+        """
+        with self._lock:
+            writes, self._writes = self._writes, []
+        return writes
+
+    def close(self):
+        if self._read_conn is not None:
+            self._read_conn.close()
+            self._read_conn = None
@@ -0,0 +1,144 @@
+# Versioned schema migrations. The applied version lives in SQLite's PRAGMA user_version;
+# migrations must be idempotent so pre-versioning databases (user_version 0) upgrade cleanly.
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def _columns(conn, table):
+    return {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+
+
+def _add_column(conn, table, column, column_type):
+    if column not in _columns(conn, table):
+        conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {column_type}")
+
+
+def _create_trade_logs(conn):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS trade_logs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+            token TEXT,
+            current_price REAL,
+            allora_prediction REAL,
+            prediction_difference_percent REAL,
+            volatility_24h REAL,
+            trade_direction TEXT,
+            entry_price REAL,
+            market_condition TEXT,
+            reason TEXT
+        )
+    """)
+
+
+def _add_result_columns(conn):
+    """
+    Columns written by update_trade_result and read by PerformanceAnalyzer.
+    """
+    _add_column(conn, "trade_logs", "trend", "TEXT")
+    _add_column(conn, "trade_logs", "prediction_lag", "REAL")
+    _add_column(conn, "trade_logs", "exit_price", "REAL")
+    _add_column(conn, "trade_logs", "profit_loss_percent", "REAL")
+    _add_column(conn, "trade_logs", "trade_result", "TEXT")
+
+
+def _add_trade_logs_indexes(conn):
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_trade_logs_token_timestamp ON trade_logs (token, timestamp)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_trade_logs_condition_trend ON trade_logs (market_condition, trend)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_trade_logs_direction ON trade_logs (trade_direction)")
+
+
+def _create_analysis_state(conn):
+    """
+    High-water mark and running aggregates for the incremental PerformanceAnalyzer.
+    """
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS analysis_state (
+            name TEXT PRIMARY KEY,
+            last_id INTEGER NOT NULL DEFAULT 0
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS analysis_aggregates (
+            market_condition TEXT NOT NULL,
+            trend TEXT NOT NULL,
+            row_count INTEGER NOT NULL DEFAULT 0,
+            pnl_count INTEGER NOT NULL DEFAULT 0,
+            pnl_mean REAL NOT NULL DEFAULT 0,
+            pnl_m2 REAL NOT NULL DEFAULT 0,
+            diff_count INTEGER NOT NULL DEFAULT 0,
+            diff_mean REAL NOT NULL DEFAULT 0,
+            buffer_hits INTEGER NOT NULL DEFAULT 0,
+            lag_count INTEGER NOT NULL DEFAULT 0,
+            lag_mean REAL NOT NULL DEFAULT 0,
+            PRIMARY KEY (market_condition, trend)
+        )
+    """)
+
+
+def _create_price_windows(conn):
+    """
+    Rolling price windows persisted as little-endian float64 blobs for warm restarts.
+    """
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS price_windows (
+            token TEXT PRIMARY KEY,
+            prices BLOB NOT NULL,
+            updated_at REAL NOT NULL
+        )
+    """)
+
+
+def _add_result_sequence(conn):
+    """
+    Orders trade results by when update_trade_result wrote them, so PerformanceAnalyzer can
+    fold P/L once a trade closes instead of when it was logged. Rows closed since the last
+    analysis run get their id as sequence number so the next run picks them up.
+    """
+    _add_column(conn, "trade_logs", "result_seq", "INTEGER")
+    _add_column(conn, "analysis_state", "last_result_seq", "INTEGER NOT NULL DEFAULT 0")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_trade_logs_result_seq ON trade_logs (result_seq)")
+    conn.execute("""
+        UPDATE trade_logs SET result_seq = id
+        WHERE result_seq IS NULL AND profit_loss_percent IS NOT NULL
+          AND id > COALESCE((SELECT MAX(last_id) FROM analysis_state), 0)
+    """)
+
+
+MIGRATIONS = [
+    (1, _create_trade_logs),
+    (2, _add_result_columns),
+    (3, _add_trade_logs_indexes),
+    (4, _create_analysis_state),
+    (5, _create_price_windows),
+    (6, _add_result_sequence),
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+
+def get_schema_version(conn):
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def apply_migrations(conn):
+    """
+    Applies every migration newer than the database's recorded version.
+    :return: The schema version after migrating.
+    """
+    current = get_schema_version(conn)
+    for version, migrate in MIGRATIONS:
+        if version <= current:
+            continue
+        try:
+            migrate(conn)
+            conn.execute(f"PRAGMA user_version = {version}")
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        logger.info("Applied database migration %d: %s", version, migrate.__name__.strip('_'))
+        current = version
+    return current
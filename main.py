@@ -1,42 +1,206 @@
-from utils.setup import setup
+from utils.setup import setup, setup_accounts
+from utils.env_loader import EnvLoader
 from core.orders import OrderManager
-from utils.helpers import display_leverage_info
+from core.market_data import MarketDataCache
+from core.asset_specs import AssetSpecRegistry
+from core.market_stream import MarketStream
+from utils.helpers import display_leverage_info, convert_percentage_to_decimal
 from hyperliquid.utils import constants
+from utils.constants import MAINNET_API_URL, TESTNET_API_URL
 from hyperliquid.exchange import Exchange
+from hyperliquid.info import Info
 from allora.allora_mind import AlloraMind
+from allora.multi_account import MultiAccountRunner
+from allora.sharding import ShardCoordinator
+from core.order_gateway import OrderGateway
+from allora.inference_cache import InferenceCache
+from allora.inference_fetcher import AsyncInferenceFetcher
+from strategy.deepseek_reviewer import DeepSeekReviewer
 from analysis.performance_analyzer import PerformanceAnalyzer
+from database.db_manager import get_database
+from strategy.custom_strategy import volatility_strategy
+from utils import metrics
+from utils.logging_setup import setup_logging, parse_module_levels
+import atexit
+import logging
 import time
 
+logger = logging.getLogger(__name__)
+
 
 def main():
+    # ACCOUNTS_FILE switches to trading several accounts from this process,
+    # SHARD_WORKERS to spreading the topics over worker processes
+    config = EnvLoader().get_config()
+    setup_logging(**logging_settings(config))
+    start_metrics(config)
+    if config["accounts_file"]:
+        return main_multi_account()
+    if config["shard_workers"] > 0:
+        return main_sharded(config)
+
     (address, info, exchange, vault, allora_upshot_key, deepseek_api_key, check_for_trades, price_gap,
      allowed_amount_per_trade, max_leverage, allora_topics) = setup()
 
-    manager = OrderManager(exchange, vault, allowed_amount_per_trade, max_leverage, info)
+    # One storage handle for the whole process; schema setup runs once here
+    db = get_database()
+    db.initialize()
+    volatility_strategy.db = db
+    # Registered after the database's own atexit close, so it runs first
+    atexit.register(volatility_strategy.persist_price_history)
+
+    # setup() only opens a websocket when WS_MARKET_DATA=True
+    market_stream = None
+    if hasattr(info, "ws_manager"):
+        market_stream = MarketStream(info, vault)
+        market_stream.start()
+
+    manager = OrderManager(exchange, vault, allowed_amount_per_trade, max_leverage, info,
+                           market_stream=market_stream)
+    # Order rounding and limits for the whole universe, refreshed in the background
+    manager.asset_specs.start()
     res = manager.get_wallet_summary()
-    print(res)
-    allora_mind = AlloraMind(manager, allora_upshot_key, deepseek_api_key, threshold=price_gap)
+    logger.info("Wallet: %s", res)
+    allora_mind = AlloraMind(manager, allora_upshot_key, deepseek_api_key, threshold=price_gap, db=db,
+                             max_open_positions=config["max_open_positions"],
+                             max_new_trades_per_cycle=config["max_new_trades_per_cycle"])
     allora_mind.set_topic_ids(allora_topics)
-    allora_mind.start_allora_trade_bot(interval=check_for_trades)
+    volatility_strategy.warm_start(list(allora_topics.keys()), info, interval_seconds=check_for_trades)
+    allora_mind.start_allora_trade_bot(interval=check_for_trades, poll_interval=config["exit_poll_interval"])
 
     # Add periodic analysis
+    analyzer = PerformanceAnalyzer(db)
     while True:
         try:
-            analyze_trading_results()
+            analyze_trading_results(analyzer)
             time.sleep(3600)  # Analyze every hour
         except KeyboardInterrupt:
             break
 
 
-def analyze_trading_results():
-    analyzer = PerformanceAnalyzer()
+def main_multi_account():
+    config, info, accounts = setup_accounts()
+    db = get_database()
+    db.initialize()
+    volatility_strategy.db = db
+    # Registered after the database's own atexit close, so it runs first
+    atexit.register(volatility_strategy.persist_price_history)
+    price_gap = convert_percentage_to_decimal(config["price_gap"])
+
+    # One market-data, inference and review layer for every account
+    market_data = MarketDataCache(info)
+    asset_specs = AssetSpecRegistry(info)
+    asset_specs.start()
+    inference_cache = InferenceCache()
+    fetcher = AsyncInferenceFetcher(config["allora_upshot_key"])
+    reviewer = DeepSeekReviewer(config["deepseek_api_key"])
+
+    minds = []
+    price_stream = None
+    for account in accounts:
+        market_stream = None
+        if hasattr(info, "ws_manager"):
+            if price_stream is None:
+                # The shared client carries allMids plus the first account's user channels
+                market_stream = price_stream = MarketStream(info, account["address"])
+            else:
+                # userEvents/orderUpdates can only be subscribed once per socket
+                market_stream = MarketStream(Info(info.base_url, skip_ws=False), account["address"],
+                                             price_stream=price_stream)
+            market_stream.start()
+        manager = OrderManager(account["exchange"], account["address"], account["allowed_amount_per_trade"],
+                               account["max_leverage"], info, market_data=market_data,
+                               market_stream=market_stream, asset_specs=asset_specs)
+        mind = AlloraMind(manager, config["allora_upshot_key"], config["deepseek_api_key"], threshold=price_gap,
+                          inference_cache=inference_cache, db=db,
+                          max_open_positions=account["max_open_positions"],
+                          max_new_trades_per_cycle=account["max_new_trades_per_cycle"],
+                          reviewer=reviewer, fetcher=fetcher)
+        mind.set_topic_ids(account["allora_topics"])
+        minds.append(mind)
+
+    # Signals are computed once for the union of topics; this mind never places orders
+    signal_mind = AlloraMind(minds[0].manager, config["allora_upshot_key"], config["deepseek_api_key"],
+                             threshold=price_gap, inference_cache=inference_cache, db=db,
+                             reviewer=reviewer, fetcher=fetcher)
+    signal_mind.set_topic_ids(config["allora_topics"])
+
+    volatility_strategy.warm_start(list(config["allora_topics"].keys()), info,
+                                   interval_seconds=config["check_for_trades"])
+    runner = MultiAccountRunner(signal_mind, minds, names=[account["name"] for account in accounts],
+                                poll_interval=config["exit_poll_interval"])
+    runner.start(interval=config["check_for_trades"])
+
+
+def main_sharded(config):
+    (address, info, exchange, vault, allora_upshot_key, deepseek_api_key, check_for_trades, price_gap,
+     allowed_amount_per_trade, max_leverage, allora_topics) = setup()
+    db = get_database()
+    db.initialize()
+
+    market_stream = None
+    if hasattr(info, "ws_manager"):
+        market_stream = MarketStream(info, vault)
+        market_stream.start()
+    manager = OrderManager(exchange, vault, allowed_amount_per_trade, max_leverage, info,
+                           market_stream=market_stream)
+    manager.asset_specs.start()
+    # The coordinator only monitors exits; signals run in the shard workers
+    allora_mind = AlloraMind(manager, allora_upshot_key, deepseek_api_key, threshold=price_gap, db=db)
+    gateway = OrderGateway(manager, max_open_positions=config["max_open_positions"],
+                           max_total_notional=config["max_total_notional"],
+                           max_net_notional=config["max_net_notional"])
+    worker_settings = {
+        'base_url': MAINNET_API_URL if config["mainnet"] == "True" else TESTNET_API_URL,
+        'address': vault,
+        'allowed_amount_per_trade': allowed_amount_per_trade,
+        'max_leverage': max_leverage,
+        'allora_upshot_key': allora_upshot_key,
+        'deepseek_api_key': deepseek_api_key,
+        'price_gap': price_gap,
+        'check_for_trades': check_for_trades,
+        'db_path': db.db_path,
+        'logging': logging_settings(config),
+        'metrics': config["metrics_enabled"]
+    }
+    coordinator = ShardCoordinator(allora_mind, gateway, allora_topics, worker_settings,
+                                   workers=config["shard_workers"], poll_interval=config["exit_poll_interval"])
+    coordinator.run(interval=check_for_trades)
+
+
+def logging_settings(config):
+    """
+    Keyword arguments for setup_logging() from LOG_* settings; every API key is redacted.
+    """
+    return {
+        'level': config["log_level"],
+        'json_format': config["log_format"] == "json",
+        'module_levels': parse_module_levels(config["log_module_levels"]),
+        'rate_limit_seconds': config["log_rate_limit_seconds"],
+        'secrets': (config["secret_key"], config["allora_upshot_key"], config["deepseek_api_key"])
+    }
+
+
+def start_metrics(config):
+    """
+    Turns on latency histograms and counters when METRICS_ENABLED=True and exposes them on
+    METRICS_PORT and/or dumps them every METRICS_DUMP_INTERVAL seconds.
+    """
+    if not config["metrics_enabled"]:
+        return
+    metrics.enable()
+    if config["metrics_port"]:
+        metrics.start_http_server(config["metrics_port"])
+    if config["metrics_dump_interval"]:
+        metrics.start_dump(config["metrics_dump_interval"], config["metrics_dump_path"] or None)
+
+
+def analyze_trading_results(analyzer):
     results = analyzer.analyze_results()
-    print("\nTrading Analysis Results:")
-    print("========================")
-    print("\nPerformance by Market Condition:")
-    print(results['condition_analysis'])
-    print(f"\nVolatility Correlation: {results['volatility_correlation']:.4f}")
-    print(f"Allora Prediction Accuracy: {results['prediction_accuracy']:.4f}")
+    logger.info("Trading analysis results, performance by market condition and trend:\n%s",
+                results['trend_analysis'])
+    logger.info("Buffer effectiveness: %.4f, average prediction lag: %.4f",
+                results['buffer_effectiveness'], results['avg_prediction_lag'])
 
 
 if __name__ == "__main__":
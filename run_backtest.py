@@ -0,0 +1,64 @@
+import argparse
+import json
+import time
+from backtest.data import load_series
+from backtest.engine import BacktestConfig, run_backtest
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Replay stored prices and Allora predictions through the bot's rules")
+    parser.add_argument("source", nargs="?", default="trading_logs.db",
+                        help="trade_logs SQLite database, .csv or .parquet file (default: trading_logs.db)")
+    parser.add_argument("--tokens", nargs="*", help="Only replay these tokens")
+    parser.add_argument("--threshold", type=float, default=0.03, help="PRICE_GAP as a fraction (default: 0.03)")
+    parser.add_argument("--close-buffer", type=float, default=0.01)
+    parser.add_argument("--volatility-threshold", type=float, default=0.02)
+    parser.add_argument("--prediction-buffer", type=float, default=0.03)
+    parser.add_argument("--volatility-window", type=int, default=24)
+    parser.add_argument("--stop-loss-ratio", type=float, default=0.5)
+    parser.add_argument("--stop-loss", action="store_true", help="Enforce the stop-loss the live bot only computes")
+    parser.add_argument("--volatility-filter", action="store_true",
+                        help="Only enter in the HIGH_VOLATILITY regime")
+    parser.add_argument("--amount", type=float, default=10.0, help="ALLOWED_AMOUNT_PER_TRADE")
+    parser.add_argument("--leverage", type=int, default=5)
+    parser.add_argument("--fee-rate", type=float, default=0.00035)
+    parser.add_argument("--capital", type=float, help="Account size for percentage return and drawdown")
+    parser.add_argument("--output", help="Directory for trades.csv and equity.csv")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    started = time.perf_counter()
+    series = load_series(args.source, args.tokens)
+    loaded = time.perf_counter()
+
+    config = BacktestConfig(
+        threshold=args.threshold,
+        volatility_threshold=args.volatility_threshold,
+        prediction_buffer=args.prediction_buffer,
+        close_buffer=args.close_buffer,
+        stop_loss_ratio=args.stop_loss_ratio,
+        volatility_window=args.volatility_window,
+        allowed_amount_per_trade=args.amount,
+        leverage=args.leverage,
+        fee_rate=args.fee_rate,
+        enforce_stop_loss=args.stop_loss,
+        volatility_filter=args.volatility_filter,
+        initial_capital=args.capital
+    )
+    result = run_backtest(series, config)
+    finished = time.perf_counter()
+
+    print(f"Loaded {sum(len(s) for s in series.values())} samples for {len(series)} tokens "
+          f"in {loaded - started:.2f}s, replayed in {finished - loaded:.2f}s")
+    print(json.dumps(result.summary(), indent=2, default=str))
+    if len(result.trades):
+        print(result.trades.tail(20).to_string(index=False))
+    if args.output:
+        result.to_csv(args.output)
+        print(f"Wrote trades and equity curve to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+import argparse
+import json
+import os
+from benchmarks.decision_loop import BenchmarkConfig, run_benchmarks
+from utils.logging_setup import setup_logging
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark the trading cycle against stubbed HyperLiquid, "
+                                                 "Allora and DeepSeek backends")
+    parser.add_argument("--tokens", nargs="*", type=int, default=[1, 10, 100, 1000],
+                        help="Token counts to benchmark (default: 1 10 100 1000)")
+    parser.add_argument("--cycles", type=int, default=5, help="Timed cycles per token count")
+    parser.add_argument("--warmup", type=int, default=1, help="Untimed cycles before timing")
+    parser.add_argument("--alloc-cycles", type=int, default=1,
+                        help="Cycles run under tracemalloc for allocation stats (0 to skip)")
+    parser.add_argument("--allora-latency", type=float, default=0.02, help="Allora stub latency in seconds")
+    parser.add_argument("--deepseek-latency", type=float, default=0.2, help="DeepSeek stub latency in seconds")
+    parser.add_argument("--info-latency", type=float, default=0.0, help="HyperLiquid Info call latency in seconds")
+    parser.add_argument("--exchange-latency", type=float, default=0.0,
+                        help="HyperLiquid Exchange call latency in seconds")
+    parser.add_argument("--approve-ratio", type=float, default=0.5, help="Share of trades the DeepSeek stub approves")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--log-level", default="INFO",
+                        help="Level of the bot's own logging during the run (it is written to a null stream)")
+    parser.add_argument("--output", default="benchmark_results.json")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    # The bot logs as it would in production, but the output is discarded
+    setup_logging(level=args.log_level, json_format=True, stream=open(os.devnull, "w"))
+    config = BenchmarkConfig(
+        cycles=args.cycles,
+        warmup_cycles=args.warmup,
+        allocation_cycles=args.alloc_cycles,
+        allora_latency=args.allora_latency,
+        deepseek_latency=args.deepseek_latency,
+        info_latency=args.info_latency,
+        exchange_latency=args.exchange_latency,
+        approve_ratio=args.approve_ratio,
+        seed=args.seed
+    )
+
+    def report(result):
+        stages = ", ".join(f"{stage} p50={_ms(summary['p50'])}" for stage, summary in result['stages'].items())
+        line = (f"{result['tokens']:>5} tokens: {result['cycles_per_second']:.2f} cycles/s, "
+                f"cycle p50={_ms(result['cycle_seconds']['p50'])} max={_ms(result['cycle_seconds']['max'])} | {stages}")
+        if 'allocations' in result:
+            line += f" | allocated {result['allocations']['allocated_bytes'] / 1024:.0f} KiB/cycle"
+        print(line)
+
+    results = run_benchmarks(args.tokens, config, progress=report)
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {args.output}")
+
+
+def _ms(seconds):
+    return "-" if seconds is None else f"{seconds * 1000:.1f}ms"
+
+
+if __name__ == "__main__":
+    main()
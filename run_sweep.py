@@ -0,0 +1,73 @@
+import argparse
+import time
+from backtest.data import load_series
+from backtest.engine import BacktestConfig
+from backtest.sweep import INTEGER_PARAMS, default_grid, grid_search, random_search, run_sweep
+
+
+def parse_values(spec):
+    """
+    "threshold=0.01,0.02,0.03" -> ("threshold", [0.01, 0.02, 0.03])
+    """
+    name, values = spec.split("=", 1)
+    cast = int if name in INTEGER_PARAMS else float
+    return name, [cast(value) for value in values.split(",")]
+
+
+def parse_range(spec):
+    """
+    "threshold=0.01:0.05" -> ("threshold", (0.01, 0.05))
+    """
+    name, bounds = spec.split("=", 1)
+    low, high = bounds.split(":")
+    return name, (float(low), float(high))
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Rank backtests over a grid or random sample of parameters")
+    parser.add_argument("source", nargs="?", default="trading_logs.db",
+                        help="trade_logs SQLite database, .csv or .parquet file (default: trading_logs.db)")
+    parser.add_argument("--tokens", nargs="*", help="Only replay these tokens")
+    parser.add_argument("--param", action="append", default=[], metavar="NAME=V1,V2,...",
+                        help="Grid values for a BacktestConfig parameter (repeatable)")
+    parser.add_argument("--random", type=int, metavar="N", help="Random search with N samples instead of a grid")
+    parser.add_argument("--range", action="append", default=[], metavar="NAME=LOW:HIGH",
+                        help="Sampling range for --random (repeatable)")
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--stop-loss", action="store_true", help="Enforce the stop-loss in every run")
+    parser.add_argument("--volatility-filter", action="store_true",
+                        help="Only enter in the HIGH_VOLATILITY regime (needed for volatility parameters to matter)")
+    parser.add_argument("--metric", default="total_pnl_usd",
+                        choices=["total_pnl_usd", "return_over_drawdown", "profit_factor", "win_rate"])
+    parser.add_argument("--workers", type=int, help="Worker processes (default: all cores)")
+    parser.add_argument("--output", default="sweep_results.csv")
+    parser.add_argument("--top", type=int, default=10)
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    defaults = default_grid(args.stop_loss, args.volatility_filter)
+    if args.random:
+        ranges = dict(parse_range(spec) for spec in args.range)
+        if not ranges:
+            ranges = {name: (min(values), max(values)) for name, values in defaults.items()}
+        combinations = random_search(ranges, args.random, args.seed)
+    else:
+        grid = dict(parse_values(spec) for spec in args.param) or defaults
+        combinations = grid_search(grid)
+
+    series = load_series(args.source, args.tokens)
+    base_config = BacktestConfig(enforce_stop_loss=args.stop_loss, volatility_filter=args.volatility_filter)
+    started = time.perf_counter()
+    results = run_sweep(series, combinations, base_config, workers=args.workers, metric=args.metric)
+    elapsed = time.perf_counter() - started
+
+    results.to_csv(args.output, index=False)
+    print(f"Evaluated {len(combinations)} parameter sets on {len(series)} tokens in {elapsed:.1f}s")
+    print(results.head(args.top).to_string(index=False))
+    print(f"Ranked results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,36 +1,230 @@
-import requests
-from typing import Dict, Optional
+import asyncio
+import aiohttp
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
 import json
+from utils import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class VerdictCache:
+    def __init__(self, max_size: int = 256, ttl: float = 900.0):
+        """
+        Thread-safe LRU cache of review verdicts with a time-to-live. Verdicts are copied
+        in and out, so callers annotating a verdict never alter the cached one.
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Tuple, Tuple[float, Dict]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Tuple) -> Optional[Dict]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or time.monotonic() - entry[0] >= self.ttl:
+                self._entries.pop(key, None)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return dict(entry[1])
+
+    def put(self, key: Tuple, verdict: Dict) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic(), dict(verdict))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
 
 
 class DeepSeekReviewer:
-    def __init__(self, api_key: str):
+    def __init__(self, api_key: str, timeout: float = 15.0, deadline: float = 20.0, max_concurrency: int = 5,
+                 cache_ttl: float = 900.0, cache_size: int = 256, diff_bucket: float = 0.5, batch_size: int = 10):
+        """
+        :param timeout: Per-request timeout in seconds.
+        :param deadline: Wall-clock budget for reviewing a whole batch of trades.
+        :param max_concurrency: Maximum number of review requests in flight.
+        :param cache_ttl: Seconds a verdict is reused for a similar trade.
+        :param cache_size: Maximum number of cached verdicts (least recently used are evicted).
+        :param diff_bucket: Width, in percentage points, of the prediction_diff buckets used
+                            to treat nearly identical trades as the same.
+        :param batch_size: Maximum number of trades reviewed in a single prompt.
+        """
         self.api_key = api_key
         self.api_url = "https://api.deepseek.com/v1/chat/completions"
         self.headers = {
             "Authorization": f"Bearer {api_key}",
             "Content-Type": "application/json"
         }
+        self.timeout = timeout
+        self.deadline = deadline
+        self.max_concurrency = max_concurrency
+        self.diff_bucket = diff_bucket
+        self.batch_size = batch_size
+        self.cache = VerdictCache(cache_size, cache_ttl)
+        # Totals used to estimate what skipped reviews save
+        self.llm_calls = 0
+        self.llm_trades = 0
+        self.llm_seconds = 0.0
+
+    def fallback_verdict(self, reason: str) -> Dict:
+        """
+        Verdict recorded when no review could be obtained; never approves a trade.
+        """
+        return {
+            'approval': False,
+            'confidence': 0,
+            'reasoning': f"Review unavailable: {reason}",
+            'risk_score': 10,
+            'fallback': True
+        }
 
-    def review_trade(self, trade_data: Dict) -> Optional[Dict]:
-        prompt = self._create_review_prompt(trade_data)
+    def _cache_key(self, trade_data: Dict) -> Tuple:
+        diff = trade_data.get('prediction_diff')
+        bucket = None if diff is None else int(diff // self.diff_bucket)
+        return trade_data.get('token'), trade_data.get('direction'), bucket
 
-        try:
-            response = requests.post(
-                self.api_url,
-                headers=self.headers,
-                json={
-                    "model": "deepseek-chat",
-                    "messages": [{"role": "user", "content": prompt}],
-                    "temperature": 0.3
+    def review_trade(self, trade_data: Dict) -> Dict:
+        """
+        Reviews a single trade; returns a fallback verdict instead of None on failure.
+        """
+        return self.review_trades([trade_data])[0]
+
+    def review_trades(self, trades: List[Dict]) -> List[Dict]:
+        """
+        Blocking wrapper around review_trades_async for the synchronous trading loop.
+        """
+        if not trades:
+            return []
+        return asyncio.run(self.review_trades_async(trades))
+
+    async def review_trades_async(self, trades: List[Dict]) -> List[Dict]:
+        """
+        Reviews all trades concurrently under the concurrency cap and batch deadline.
+        Cached verdicts are reused; reviews still pending at the deadline get a fallback.
+        :return: One verdict per trade, in input order.
+        """
+        verdicts: List[Optional[Dict]] = [None] * len(trades)
+        pending = {}
+        for index, trade_data in enumerate(trades):
+            cached = self.cache.get(self._cache_key(trade_data))
+            if cached is not None:
+                metrics.inc("deepseek_verdicts", source="cache")
+                verdicts[index] = cached
+            else:
+                pending[index] = trade_data
+
+        if pending:
+            indexes = list(pending.keys())
+            batches = [indexes[i:i + self.batch_size] for i in range(0, len(indexes), self.batch_size)]
+            semaphore = asyncio.Semaphore(self.max_concurrency)
+            timeout = aiohttp.ClientTimeout(total=self.timeout)
+            async with aiohttp.ClientSession(headers=self.headers, timeout=timeout) as session:
+                tasks = {
+                    asyncio.ensure_future(
+                        self._review_batch(session, semaphore, [pending[index] for index in batch])
+                    ): batch
+                    for batch in batches
                 }
-            )
-            response.raise_for_status()
-            analysis = response.json()["choices"][0]["message"]["content"]
-            return self._parse_analysis(analysis)
+                done, not_done = await asyncio.wait(tasks, timeout=self.deadline)
+                for task in not_done:
+                    task.cancel()
+                for task in done:
+                    for index, verdict in zip(tasks[task], task.result()):
+                        verdicts[index] = verdict
+                        if not verdict.get('fallback'):
+                            metrics.inc("deepseek_verdicts", source="api")
+                            self.cache.put(self._cache_key(pending[index]), verdict)
+                        else:
+                            metrics.inc("deepseek_verdicts", source="fallback")
+                for task in not_done:
+                    for index in tasks[task]:
+                        metrics.inc("deepseek_verdicts", source="fallback")
+                        logger.warning("DeepSeek review timed out for %s", pending[index].get('token'))
+                        verdicts[index] = self.fallback_verdict("timed out")
+
+        return verdicts
+
+    async def _review_batch(self, session, semaphore, trades: List[Dict]) -> List[Dict]:
+        """
+        Reviews several trades with one prompt; a single trade uses the original prompt.
+        :return: One verdict per trade, in input order.
+        """
+        started = time.monotonic()
+        try:
+            if len(trades) == 1:
+                prompt = self._create_review_prompt(trades[0])
+            else:
+                prompt = self._create_batch_review_prompt(trades)
+            async with semaphore:
+                with metrics.timed("deepseek_request_seconds"):
+                    async with session.post(
+                        self.api_url,
+                        json={
+                            "model": "deepseek-chat",
+                            "messages": [{"role": "user", "content": prompt}],
+                            "temperature": 0.3
+                        }
+                    ) as response:
+                        response.raise_for_status()
+                        body = await response.json(content_type=None)
+            analysis = body["choices"][0]["message"]["content"]
+        except asyncio.CancelledError:
+            raise
         except Exception as e:
-            print(f"DeepSeek review failed: {str(e)}")
-            return None
+            logger.error("DeepSeek review failed: %s", e)
+            return [self.fallback_verdict(str(e) or type(e).__name__)] * len(trades)
+        finally:
+            self.llm_calls += 1
+            self.llm_trades += len(trades)
+            self.llm_seconds += time.monotonic() - started
+
+        if len(trades) == 1:
+            verdict = self._parse_analysis(analysis)
+            return [verdict if verdict is not None else self.fallback_verdict("unparseable response")]
+        return self._parse_batch_analysis(analysis, trades)
+
+    def _create_batch_review_prompt(self, trades: List[Dict]) -> str:
+        lines = "\n".join(
+            f"        - Token: {trade['token']}, Current Price: ${trade['current_price']:,.2f}, "
+            f"Allora Prediction: ${trade['allora_prediction']:,.2f}, "
+            f"Prediction Difference: {trade['prediction_diff']:.2f}%, Direction: {trade['direction']}, "
+            f"Market Condition: {trade['market_condition']}"
+            for trade in trades
+        )
+        return f"""
+        As an AI trading expert, review each of these potential trades independently:
+
+{lines}
+
+        Respond with a JSON array containing one object per trade, each with:
+        1. token (string, as given above)
+        2. approval (true/false)
+        3. confidence (0-100)
+        4. reasoning (string)
+        5. risk_score (1-10)
+        """
+
+    def _parse_batch_analysis(self, analysis: str, trades: List[Dict]) -> List[Dict]:
+        try:
+            start = analysis.find('[')
+            end = analysis.rfind(']')
+            if start == -1 or end == -1:
+                raise ValueError("No valid JSON array found in the response")
+            items = json.loads(analysis[start:end + 1])
+        except Exception as e:
+            logger.error("Error parsing batch analysis: %s", e)
+            return [self.fallback_verdict("unparseable response")] * len(trades)
+
+        by_token = {item.get('token'): item for item in items if isinstance(item, dict)}
+        return [by_token.get(trade['token']) or self.fallback_verdict("missing from batch response")
+                for trade in trades]
 
     def _create_review_prompt(self, trade_data: Dict) -> str:
         return f"""
@@ -63,8 +257,8 @@ class DeepSeekReviewer:
             json_str = analysis[start:end + 1]  # Extract JSON substring
             return json.loads(json_str)  # Convert to dict
         except json.JSONDecodeError as e:
-            print(f"JSON decoding error: {e}")
+            logger.error("JSON decoding error: %s", e)
         except Exception as e:
-            print(f"Error parsing analysis: {e}")
+            logger.error("Error parsing analysis: %s", e)
 
         return None  # Return None on failure
@@ -0,0 +1,116 @@
+import math
+import numpy as np
+
+
+class RollingPriceWindow:
+    def __init__(self, capacity=288, volatility_window=24, trend_window=12):
+        """
+        Fixed-size price history for one token with O(1) rolling volatility and trend.
+
+        - Prices live in a preallocated NumPy ring buffer; appending never allocates
+        - The last (volatility_window - 1) log returns are kept in their own ring with a
+          sliding-window Welford mean/M2, so volatility is O(1) per tick
+        - Matches VolatilityStrategy.calculate_volatility / calculate_trend on the same data
+
+        :param capacity: Number of prices retained (288 = 24 hours of 5-minute samples).
+        :param volatility_window: Prices per volatility window.
+        :param trend_window: Prices per trend window.
+        """
+        if volatility_window < 2 or volatility_window > capacity or trend_window > capacity:
+            raise ValueError("Windows must fit inside the buffer capacity")
+        self.capacity = capacity
+        self.volatility_window = volatility_window
+        self.trend_window = trend_window
+        self._prices = np.empty(capacity, dtype=np.float64)
+        self._size = 0
+        self._head = 0  # next write position
+
+        self._return_window = volatility_window - 1
+        self._returns = np.empty(self._return_window, dtype=np.float64)
+        self._return_count = 0
+        self._return_head = 0
+        self._mean = 0.0
+        self._m2 = 0.0
+        self._last_log_price = None
+        self._updates_since_resync = 0
+
+    def __len__(self):
+        return self._size
+
+    def append(self, price):
+        price = float(price)
+        log_price = math.log(price)
+        if self._last_log_price is not None:
+            self._push_return(log_price - self._last_log_price)
+        self._last_log_price = log_price
+
+        self._prices[self._head] = price
+        self._head = (self._head + 1) % self.capacity
+        if self._size < self.capacity:
+            self._size += 1
+
+    def extend(self, prices):
+        for price in prices:
+            self.append(price)
+
+    def _push_return(self, value):
+        n = self._return_window
+        if self._return_count < n:
+            # Growing window: plain Welford update
+            self._return_count += 1
+            delta = value - self._mean
+            self._mean += delta / self._return_count
+            self._m2 += delta * (value - self._mean)
+        else:
+            # Full window: replace the oldest return in place
+            old = self._returns[self._return_head]
+            old_mean = self._mean
+            self._mean += (value - old) / n
+            self._m2 += (value - old) * (value - self._mean + old - old_mean)
+        self._returns[self._return_head] = value
+        self._return_head = (self._return_head + 1) % n
+
+        # Sliding updates accumulate rounding error; recompute exactly once per lap of the buffer
+        self._updates_since_resync += 1
+        if self._updates_since_resync >= self.capacity and self._return_count == n:
+            self._mean = float(self._returns.mean())
+            self._m2 = float(((self._returns - self._mean) ** 2).sum())
+            self._updates_since_resync = 0
+
+    def price_at(self, offset):
+        """
+        Returns the price `offset` samples back from the newest (1 = newest).
+        """
+        if offset < 1 or offset > self._size:
+            raise IndexError("offset outside the stored history")
+        return float(self._prices[(self._head - offset) % self.capacity])
+
+    def volatility(self):
+        """
+        Standard deviation of the last window's log returns scaled by sqrt(window),
+        or None until a full window of prices is available.
+        """
+        if self._size < self.volatility_window or self._return_count < self._return_window:
+            return None
+        variance = max(self._m2 / self._return_window, 0.0)
+        return math.sqrt(variance) * math.sqrt(self.volatility_window)
+
+    def trend(self, threshold=0.01):
+        """
+        'UP', 'DOWN' or 'SIDEWAYS' from the change over the trend window.
+        """
+        if self._size < self.trend_window:
+            return 'SIDEWAYS'
+        first = self.price_at(self.trend_window)
+        price_change = (self.price_at(1) - first) / first
+        if abs(price_change) < threshold:
+            return 'SIDEWAYS'
+        return 'UP' if price_change > 0 else 'DOWN'
+
+    def to_array(self):
+        """
+        Returns a copy of the stored prices, oldest first.
+        """
+        if self._size < self.capacity:
+            return self._prices[:self._size].copy()
+        return np.roll(self._prices, -self._head)
@@ -1,26 +1,130 @@
+import logging
 import numpy as np
+import time
 from datetime import datetime
-from database.db_manager import DatabaseManager
+from database.db_manager import get_database
+from strategy.price_window import RollingPriceWindow
+
+logger = logging.getLogger(__name__)
+
+# HyperLiquid candle intervals by length in seconds
+CANDLE_INTERVALS = {
+    60: '1m', 180: '3m', 300: '5m', 900: '15m', 1800: '30m',
+    3600: '1h', 7200: '2h', 14400: '4h'
+}
+
 
 class VolatilityStrategy:
-    def __init__(self, volatility_threshold=0.02, prediction_buffer=0.03):
+    def __init__(self, volatility_threshold=0.02, prediction_buffer=0.03, db=None,
+                 volatility_window=24, trend_window=12, history_size=288, persist_history=True,
+                 persist_interval=900):
         """
         Strategy to test Allora's prediction accuracy during high volatility periods
         - Tracks price history for volatility calculation
         - Uses 2% volatility as default threshold for "high volatility" periods
         - Added 3% buffer for prediction differences to avoid chasing bad trades
+        - db is resolved lazily so the instance created at import time can share the
+          process-wide DatabaseManager configured later in main()
+        - price_history holds one RollingPriceWindow per token (O(1) volatility and trend per tick)
+        - With persist_history, each window is snapshotted to the database at most every
+          persist_interval seconds and by persist_price_history() at shutdown, so warm_start()
+          can restore the windows after a restart
         """
         self.price_history = {}
-        self.db = DatabaseManager()
+        self._db = db
+        self.volatility_window = volatility_window
+        self.trend_window = trend_window
+        self.history_size = history_size
+        self.persist_history = persist_history
+        self.persist_interval = persist_interval
+        self._persisted_at = {}
         self.volatility_threshold = volatility_threshold
         self.prediction_buffer = prediction_buffer
         
+    @property
+    def db(self):
+        if self._db is None:
+            self._db = get_database()
+        return self._db
+
+    @db.setter
+    def db(self, db):
+        self._db = db
+
     def update_price_history(self, token, price):
-        if token not in self.price_history:
-            self.price_history[token] = []
-        self.price_history[token].append(float(price))
-        # Keep last 24 hours of data (assuming 5-minute intervals)
-        self.price_history[token] = self.price_history[token][-288:]
+        window = self.price_history.get(token)
+        if window is None:
+            # Keep last 24 hours of data (assuming 5-minute intervals)
+            window = self.price_history[token] = RollingPriceWindow(
+                self.history_size, self.volatility_window, self.trend_window)
+        window.append(price)
+        if self.persist_history:
+            now = time.monotonic()
+            persisted_at = self._persisted_at.get(token)
+            if persisted_at is None or now - persisted_at >= self.persist_interval:
+                self._persist_window(token, window, now)
+        return window
+
+    def _persist_window(self, token, window, now):
+        self.db.save_price_window(token, window.to_array())
+        self._persisted_at[token] = now
+
+    def persist_price_history(self):
+        """
+        Snapshots every price window regardless of persist_interval. Call on shutdown so a
+        restart warm-starts from the latest prices.
+        """
+        if not self.persist_history:
+            return
+        now = time.monotonic()
+        for token, window in list(self.price_history.items()):
+            self._persist_window(token, window, now)
+
+    def warm_start(self, tokens, info=None, interval_seconds=300):
+        """
+        Restores price windows so the strategy can produce signals on its first cycle.
+        - Uses the stored window when it is recent enough to be contiguous with live data
+        - Otherwise backfills from HyperLiquid candle closes when an Info client is given
+
+        :param tokens: Tokens to restore.
+        :param info: Optional HyperLiquid Info client for candle backfill.
+        :param interval_seconds: Sampling interval of the live loop (CHECK_FOR_TRADES).
+        :return: Dictionary mapping tokens to the number of restored prices.
+        """
+        stored = self.db.load_price_windows()
+        now = time.time()
+        restored = {}
+        for token in tokens:
+            prices = None
+            if token in stored:
+                stored_prices, updated_at = stored[token]
+                if now - updated_at <= interval_seconds * 2 and len(stored_prices) >= self.volatility_window:
+                    prices = stored_prices
+            if prices is None and info is not None:
+                prices = self._fetch_candle_closes(info, token, interval_seconds)
+            if prices is None or len(prices) == 0:
+                continue
+
+            window = RollingPriceWindow(self.history_size, self.volatility_window, self.trend_window)
+            window.extend(prices[-self.history_size:])
+            self.price_history[token] = window
+            restored[token] = len(window)
+        logger.info("Warm-started price history: %s", restored)
+        return restored
+
+    def _fetch_candle_closes(self, info, token, interval_seconds):
+        interval = CANDLE_INTERVALS.get(interval_seconds)
+        if interval is None:
+            logger.warning("No HyperLiquid candle interval matches %ss, skipping backfill for %s", interval_seconds, token)
+            return None
+        end_ms = int(time.time() * 1000)
+        start_ms = end_ms - self.history_size * interval_seconds * 1000
+        try:
+            candles = info.candles_snapshot(token, interval, start_ms, end_ms)
+        except Exception as e:
+            logger.warning("Candle backfill failed for %s: %s", token, e)
+            return None
+        return np.array([float(candle['c']) for candle in candles], dtype=np.float64)
     
     def calculate_volatility(self, prices, window=24):
         """
@@ -53,14 +157,14 @@ class VolatilityStrategy:
     
     def execute(self, token, current_price, allora_signal, allora_prediction):
         # Update price history
-        self.update_price_history(token, current_price)
+        window = self.update_price_history(token, current_price)
         
         # Calculate volatility
-        volatility = self.calculate_volatility(self.price_history[token])
+        volatility = window.volatility()
         if volatility is None:
             return None
             
-        trend = self.calculate_trend(self.price_history[token])
+        trend = window.trend()
         prediction_diff = ((allora_prediction - current_price) / current_price)
         
         # Only trade if prediction difference exceeds buffer
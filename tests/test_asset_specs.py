@@ -0,0 +1,36 @@
+from core.asset_specs import AssetSpecRegistry
+
+
+class FlakyInfo:
+    def __init__(self):
+        self.calls = 0
+        self.available = False
+
+    def meta(self):
+        self.calls += 1
+        if not self.available:
+            raise ConnectionError("meta unavailable")
+        return {'universe': [{'name': 'BTC', 'szDecimals': 5, 'maxLeverage': 50}]}
+
+
+def test_failed_load_is_not_retried_on_every_lookup():
+    info = FlakyInfo()
+    registry = AssetSpecRegistry(info, retry_interval=3600)
+    for _ in range(5):
+        assert registry.get('BTC') is None
+    assert info.calls == 1
+
+    # The periodic refresh (or the next lookup after retry_interval) picks the specs up
+    info.available = True
+    assert registry.load()
+    assert registry.get('BTC').sz_decimals == 5
+    assert info.calls == 2
+
+
+def test_lookup_retries_after_the_retry_interval():
+    info = FlakyInfo()
+    registry = AssetSpecRegistry(info, retry_interval=0)
+    registry.get('BTC')
+    info.available = True
+    assert registry.get('BTC').max_leverage == 50
+    assert info.calls == 2
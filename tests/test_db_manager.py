@@ -0,0 +1,42 @@
+import logging
+import pickle
+from database.db_manager import DatabaseManager, ForwardingDatabase
+
+TRADE = {'token': 'BTC', 'current_price': 100.0, 'allora_prediction': 105.0, 'prediction_diff': 5.0,
+         'volatility': 0.01, 'direction': 'long', 'entry_price': 100.0, 'market_condition': 'NORMAL'}
+
+
+def test_log_trade_after_close_is_dropped_with_warning(tmp_path, caplog):
+    db = DatabaseManager(str(tmp_path / "trades.db"))
+    db.initialize()
+    db.log_trade(TRADE)
+    db.close()
+
+    with caplog.at_level(logging.WARNING, logger="database.db_manager"):
+        db.log_trade(TRADE)
+        db.update_trade_result(1, 101.0, 1.0, 'WIN')
+
+    assert sum("dropping write" in message for message in caplog.messages) == 2
+
+
+def test_forwarded_writes_are_applied_by_the_owning_manager(tmp_path):
+    db = DatabaseManager(str(tmp_path / "trades.db"))
+    db.initialize()
+    db.save_price_window('ETH', [1.0, 2.0])
+    db.flush()
+
+    worker_db = ForwardingDatabase(db.db_path)
+    assert list(worker_db.load_price_windows()['ETH'][0]) == [1.0, 2.0]
+    worker_db.log_trade(TRADE)
+    worker_db.save_price_window('BTC', [100.0, 101.0])
+    writes = pickle.loads(pickle.dumps(worker_db.drain()))  # as sent over the results queue
+    assert worker_db.drain() == []
+
+    db.apply_forwarded(writes + [('transaction', (None,))])
+    db.flush()
+    rows = db.get_connection().execute("SELECT token, trade_direction, timestamp FROM trade_logs").fetchall()
+    assert [row[:2] for row in rows] == [('BTC', 'long')]
+    assert rows[0][2] is not None
+    assert list(db.load_price_windows()['BTC'][0]) == [100.0, 101.0]
+    worker_db.close()
+    db.close()
@@ -0,0 +1,93 @@
+import asyncio
+import json
+import time
+from aiohttp import web
+from conftest import stub_server
+from strategy.deepseek_reviewer import DeepSeekReviewer, VerdictCache
+
+
+def _trade(token, diff=4.0):
+    return {'token': token, 'current_price': 100.0, 'allora_prediction': 100.0 + diff, 'prediction_diff': diff,
+            'direction': 'long', 'market_condition': 'NORMAL'}
+
+
+def _deepseek_routes(state, reply, delay=0.0):
+    async def handle(request):
+        body = await request.json()
+        state['prompts'].append(body['messages'][0]['content'])
+        if delay:
+            await asyncio.sleep(delay)
+        return web.json_response({'choices': [{'message': {'role': 'assistant', 'content': reply}}]})
+    return [web.post('/{tail:.*}', handle)]
+
+
+def _reviewer(url, **kwargs):
+    reviewer = DeepSeekReviewer("test-key", **kwargs)
+    reviewer.api_url = url
+    return reviewer
+
+
+def test_verdict_cache_returns_copies_and_expires():
+    cache = VerdictCache(ttl=0.05)
+    verdict = {'approval': True}
+    cache.put(('BTC', 'long', 8), verdict)
+    verdict['approval'] = False
+
+    cached = cache.get(('BTC', 'long', 8))
+    assert cached == {'approval': True}
+    cached['applied'] = True
+    assert cache.get(('BTC', 'long', 8)) == {'approval': True}
+    assert cache.hits == 2
+
+    time.sleep(0.06)
+    assert cache.get(('BTC', 'long', 8)) is None
+    assert cache.misses == 1
+
+
+def test_cached_verdict_skips_the_api_until_ttl_expires():
+    state = {'prompts': []}
+    reply = json.dumps({'approval': True, 'confidence': 80, 'reasoning': 'ok', 'risk_score': 3})
+    with stub_server(_deepseek_routes(state, reply)) as url:
+        reviewer = _reviewer(url, cache_ttl=0.2)
+        first = reviewer.review_trade(_trade('BTC'))
+        # Same token, direction and prediction_diff bucket: served from the cache
+        second = reviewer.review_trade(_trade('BTC', diff=4.1))
+        time.sleep(0.25)
+        third = reviewer.review_trade(_trade('BTC'))
+
+    assert first['approval'] and second['approval'] and third['approval']
+    assert len(state['prompts']) == 2
+    assert reviewer.cache.hits == 1
+
+
+def test_batch_response_missing_a_token_falls_back_for_that_trade():
+    state = {'prompts': []}
+    reply = "Here you go:\n" + json.dumps([
+        {'token': 'ETH', 'approval': True, 'confidence': 90, 'reasoning': 'trend', 'risk_score': 2},
+        {'token': 'BTC', 'approval': False, 'confidence': 60, 'reasoning': 'chop', 'risk_score': 6},
+    ])
+    with stub_server(_deepseek_routes(state, reply)) as url:
+        reviewer = _reviewer(url)
+        verdicts = reviewer.review_trades([_trade('BTC'), _trade('ETH'), _trade('SOL')])
+
+    assert len(state['prompts']) == 1
+    assert [verdict['approval'] for verdict in verdicts] == [False, True, False]
+    assert verdicts[2]['fallback'] and "missing from batch response" in verdicts[2]['reasoning']
+    # Only real verdicts are cached
+    assert reviewer.cache.get(reviewer._cache_key(_trade('ETH')))['approval'] is True
+    assert reviewer.cache.get(reviewer._cache_key(_trade('SOL'))) is None
+
+
+def test_reviews_past_the_deadline_get_a_fallback_verdict():
+    state = {'prompts': []}
+    reply = json.dumps({'approval': True, 'confidence': 80, 'reasoning': 'ok', 'risk_score': 3})
+    with stub_server(_deepseek_routes(state, reply, delay=1.0)) as url:
+        reviewer = _reviewer(url, deadline=0.2, timeout=5)
+        started = time.monotonic()
+        verdict = reviewer.review_trade(_trade('BTC'))
+        elapsed = time.monotonic() - started
+
+    assert elapsed < 0.9
+    assert verdict['approval'] is False
+    assert verdict['fallback'] and "timed out" in verdict['reasoning']
+    assert reviewer.cache.get(reviewer._cache_key(_trade('BTC'))) is None
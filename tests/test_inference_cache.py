@@ -0,0 +1,25 @@
+import time
+from allora.inference_cache import InferenceCache
+
+
+def test_failed_fetch_is_attempted_once_until_min_refresh_seconds_pass():
+    cache = InferenceCache(min_refresh_seconds=0.1)
+    cache.put(14, 100.0)
+    cache._entries[14]['refresh_at'] = 0  # epoch rolled over
+    calls = []
+
+    def failing_fetch():
+        calls.append(1)
+        return None, None
+
+    assert cache.stale_topics({'BTC': 14}) == {'BTC': 14}
+    assert cache.get_or_fetch(14, failing_fetch) is None
+    # generate_signal and monitor_positions in the same cycle: no second attempt
+    assert cache.get_or_fetch(14, failing_fetch) is None
+    assert cache.stale_topics({'BTC': 14}) == {}
+    assert len(calls) == 1
+    assert cache.peek(14) == 100.0
+
+    time.sleep(0.12)
+    assert cache.get_or_fetch(14, lambda: (101.0, None)) == 101.0
+    assert cache.get(14) == 101.0
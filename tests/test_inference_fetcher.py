@@ -0,0 +1,51 @@
+import asyncio
+from aiohttp import web
+from allora.inference_fetcher import AsyncInferenceFetcher
+from conftest import stub_server
+
+
+def _inference(value):
+    return {'data': {'inference_data': {'network_inference_normalized': str(value)}}}
+
+
+def _allora_routes(state):
+    async def handle(request):
+        topic_id = int(request.query['allora_topic_id'])
+        state['requests'][topic_id] = state['requests'].get(topic_id, 0) + 1
+        state['in_flight'] += 1
+        state['peak'] = max(state['peak'], state['in_flight'])
+        try:
+            if topic_id == 1 and state['requests'][topic_id] == 1:
+                return web.json_response({'error': 'boom'}, status=500)
+            if topic_id == 3:
+                await asyncio.sleep(1.0)
+            await asyncio.sleep(0.05)
+            return web.json_response(_inference(100 + topic_id))
+        finally:
+            state['in_flight'] -= 1
+    return [web.get('/{tail:.*}', handle)]
+
+
+def test_fetch_retries_after_server_error_and_gives_up_on_timeouts():
+    state = {'requests': {}, 'in_flight': 0, 'peak': 0}
+    with stub_server(_allora_routes(state)) as url:
+        fetcher = AsyncInferenceFetcher("key", base_url=url, timeout=0.3, max_retries=2, max_concurrency=2,
+                                        backoff_base=0.01, backoff_max=0.02)
+        raw = fetcher.fetch_raw_sync({'BTC': 1, 'ETH': 2, 'SOL': 3, 'ARB': 4, 'OP': 5})
+
+    assert raw['BTC'][0] == 101.0
+    assert state['requests'][1] == 2  # 500 first, then retried
+    assert raw['ETH'][0] == 102.0
+    assert raw['SOL'] == (None, None)  # slower than the timeout on every attempt
+    assert state['requests'][3] == 2
+    assert state['peak'] <= 2
+
+
+def test_fetch_all_sync_maps_tokens_to_predictions():
+    state = {'requests': {}, 'in_flight': 0, 'peak': 0}
+    with stub_server(_allora_routes(state)) as url:
+        fetcher = AsyncInferenceFetcher("key", base_url=url, timeout=0.3, max_retries=1, backoff_base=0.01)
+        predictions = fetcher.fetch_all_sync({'ETH': 2, 'SOL': 3, 'BTC': 1})
+
+    assert predictions == {'ETH': 102.0, 'SOL': None, 'BTC': None}
+    assert fetcher.fetch_all_sync({}) == {}
@@ -0,0 +1,139 @@
+import pytest
+
+from core.market_stream import MarketStream
+
+
+class StubWebsocket:
+    def __init__(self):
+        self.alive = True
+        self.ws_ready = True
+
+    def is_alive(self):
+        return self.alive
+
+
+class StubFeedInfo:
+    """
+    Info client whose subscriptions are driven by the test and whose REST state is a dict.
+    """
+    def __init__(self):
+        self.ws_manager = StubWebsocket()
+        self.handlers = {}
+        self.positions = {}
+        self.orders = []
+        self.rest_calls = 0
+
+    def subscribe(self, subscription, callback):
+        # Same restriction as the SDK's WebsocketManager: these messages carry no user field
+        if subscription["type"] in ("userEvents", "orderUpdates") and subscription["type"] in self.handlers:
+            raise NotImplementedError(f"Cannot subscribe to {subscription['type']} multiple times")
+        self.handlers[subscription["type"]] = callback
+
+    def push(self, channel, data):
+        self.handlers[channel]({"channel": channel, "data": data})
+
+    def user_state(self, address):
+        self.rest_calls += 1
+        return {'assetPositions': [{'position': {'coin': coin, 'szi': str(szi), 'entryPx': str(entry),
+                                                 'leverage': {'type': 'cross', 'value': 5}}}
+                                   for coin, (szi, entry) in self.positions.items()]}
+
+    def open_orders(self, address):
+        return list(self.orders)
+
+
+def _fill(coin, side, px, sz, start):
+    return {'coin': coin, 'side': side, 'px': str(px), 'sz': str(sz), 'startPosition': str(start)}
+
+
+def test_stream_applies_fills_and_order_updates():
+    info = StubFeedInfo()
+    stream = MarketStream(info, "0xabc")
+    stream.start()
+    info.push("allMids", {"mids": {"BTC": "100.5"}})
+    info.push("userFills", {"isSnapshot": True, "fills": [_fill("ETH", "B", 10, 1, 0)]})
+    info.push("userFills", {"fills": [_fill("BTC", "B", 100, 2, 0), _fill("BTC", "B", 110, 2, 2)]})
+    info.push("orderUpdates", [{"order": {"oid": 7, "coin": "BTC"}, "status": "open"}])
+
+    assert stream.is_live()
+    assert stream.get_mid("BTC") == 100.5
+    assert stream.get_positions() == [{'coin': 'BTC', 'szi': 4.0, 'entryPrice': 105.0, 'leverage': {}}]
+    assert stream.get_open_orders() == [{"oid": 7, "coin": "BTC"}]
+    assert info.rest_calls == 1  # seed only
+
+    info.push("orderUpdates", [{"order": {"oid": 7, "coin": "BTC"}, "status": "filled"}])
+    info.push("userFills", {"fills": [_fill("BTC", "A", 120, 4, 4)]})
+    assert stream.get_positions() == []
+    assert stream.get_open_orders() == []
+
+
+def test_reconnect_resyncs_positions_over_rest():
+    info = StubFeedInfo()
+    stream = MarketStream(info, "0xabc", stale_after=10)
+    stream.start()
+    info.push("userFills", {"fills": [_fill("BTC", "B", 100, 2, 0)]})
+    assert stream.is_live()
+
+    # Socket drops; meanwhile the position is closed and another one opened
+    info.ws_manager.alive = False
+    assert not stream.is_live()
+    info.positions = {"SOL": (3.0, 20.0)}
+    info.ws_manager.alive = True
+    info.push("allMids", {"mids": {"SOL": "21"}})
+
+    assert stream.is_live()
+    assert stream.get_positions() == [{'coin': 'SOL', 'szi': 3.0, 'entryPrice': 20.0,
+                                       'leverage': {'type': 'cross', 'value': 5}}]
+    assert info.rest_calls == 2
+    stream.get_positions()
+    assert info.rest_calls == 2
+
+
+def test_messages_after_a_silent_gap_trigger_resync():
+    info = StubFeedInfo()
+    stream = MarketStream(info, "0xabc", stale_after=10)
+    stream.start()
+    info.push("allMids", {"mids": {"BTC": "100"}})
+    stream.get_positions()
+    assert info.rest_calls == 1
+
+    stream._last_message_at -= 30  # nothing received for longer than stale_after
+    info.positions = {"BTC": (1.0, 100.0)}
+    info.push("allMids", {"mids": {"BTC": "101"}})
+
+    assert [position['coin'] for position in stream.get_positions()] == ['BTC']
+    assert info.rest_calls == 2
+
+
+def test_second_account_cannot_share_a_socket():
+    info = StubFeedInfo()
+    MarketStream(info, "0xabc").start()
+    with pytest.raises(NotImplementedError):
+        MarketStream(info, "0xdef").start()
+
+
+def test_streams_for_two_accounts_share_one_price_feed():
+    shared, own = StubFeedInfo(), StubFeedInfo()
+    first = MarketStream(shared, "0xabc")
+    first.start()
+
+    second = MarketStream(own, "0xdef", price_stream=first)
+    second.start()
+    seen = []
+    second.add_listener(seen.append)
+    assert "allMids" not in own.handlers
+
+    shared.push("allMids", {"mids": {"BTC": "100"}})
+    own.push("userFills", {"fills": [_fill("ETH", "B", 10, 1, 0)]})
+    own.push("orderUpdates", [{"order": {"oid": 9, "coin": "ETH"}, "status": "open"}])
+
+    assert second.is_live()
+    assert second.get_mid("BTC") == 100.0
+    assert seen == [{"BTC": "100"}]
+    assert first.get_positions() == [] and first.get_open_orders() == []
+    assert [position['coin'] for position in second.get_positions()] == ['ETH']
+    assert second.get_open_orders() == [{"oid": 9, "coin": "ETH"}]
+
+    # The account socket is up but the shared price feed dropped
+    shared.ws_manager.alive = False
+    assert not second.is_live()
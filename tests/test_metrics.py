@@ -0,0 +1,42 @@
+import pickle
+import pytest
+from utils import metrics
+
+
+@pytest.fixture
+def enabled_metrics():
+    was_enabled = metrics.enabled()
+    metrics.enable()
+    metrics.reset()
+    yield metrics
+    metrics.reset()
+    metrics.enable(was_enabled)
+
+
+def test_drained_metrics_merge_into_another_registry(enabled_metrics):
+    for seconds in (0.010, 0.020, 0.030):
+        metrics.observe("allora_request_seconds", seconds, client="async")
+    metrics.inc("allora_retries", 2)
+
+    # What a shard worker sends back with its cycle result
+    drained = pickle.loads(pickle.dumps(metrics.drain()))
+    assert metrics.snapshot() == {'counters': {}, 'histograms': {}}
+
+    metrics.observe("allora_request_seconds", 0.040, client="async")
+    metrics.inc("allora_retries")
+    metrics.merge(drained)
+
+    summary = metrics.histogram("allora_request_seconds", client="async").summary()
+    assert summary['count'] == 4
+    assert summary['sum'] == pytest.approx(0.1)
+    assert summary['min'] == 0.010 and summary['max'] == 0.040
+    assert summary['p50'] == pytest.approx(0.020, rel=0.01)
+    assert metrics.counter("allora_retries").value == 3
+
+
+def test_merge_is_a_no_op_while_disabled(enabled_metrics):
+    metrics.inc("allora_retries")
+    drained = metrics.drain()
+    metrics.enable(False)
+    metrics.merge(drained)
+    assert metrics.snapshot()['counters'] == {}
@@ -0,0 +1,71 @@
+from allora.decision_pipeline import DecisionPipeline
+from allora.multi_account import MultiAccountRunner
+
+
+class RecordingReviewer:
+    def __init__(self):
+        self.reviewed = []
+
+    def review_trades(self, trades):
+        self.reviewed.append([trade['token'] for trade in trades])
+        return [{'approval': False, 'confidence': 0} for _ in trades]
+
+
+class StubManager:
+    def __init__(self, held=()):
+        self.held = held
+        self.vault_address = "0xabc"
+
+    def refresh_market_data(self):
+        pass
+
+    def get_open_positions(self):
+        return [{'coin': coin, 'szi': 1.0} for coin in self.held]
+
+
+class StubMind:
+    def __init__(self, reviewer, topics, held=(), max_open_positions=None, candidates=()):
+        self.manager = StubManager(held)
+        self.topic_ids = {token: index for index, token in enumerate(topics)}
+        self.deepseek_reviewer = reviewer
+        self.pipeline = DecisionPipeline(reviewer, max_open_positions=max_open_positions)
+        self.candidates = list(candidates)
+
+    def prefetch_inferences(self):
+        pass
+
+    def build_candidates(self, tokens):
+        return self.candidates
+
+    def trade_candidates(self, candidates, check_positions=False):
+        pass
+
+    def monitor_positions(self):
+        pass
+
+
+def _candidate(token, signal, diff):
+    return {'token': token, 'allora_signal': signal, 'custom_signal': None, 'allora_diff': diff,
+            'trade_data': {'token': token}}
+
+
+def test_pre_review_skips_tokens_no_account_can_open():
+    reviewer = RecordingReviewer()
+    candidates = [_candidate('BTC', 'BUY', 0.05), _candidate('ETH', 'SELL', -0.04),
+                  _candidate('SOL', 'BUY', 0.08), _candidate('ARB', 'HOLD', 0.0), _candidate('OP', 'BUY', 0.03)]
+    minds = [
+        # Holds BTC; one slot left, so only its strongest other move (SOL) is reviewed
+        StubMind(reviewer, ['BTC', 'ETH', 'SOL'], held=['BTC'], max_open_positions=2),
+        # Holds BTC and ETH, no limits
+        StubMind(reviewer, ['BTC', 'ETH'], held=['BTC', 'ETH']),
+        # Full
+        StubMind(reviewer, ['OP'], held=['XRP'], max_open_positions=1),
+    ]
+    signal_mind = StubMind(reviewer, ['BTC', 'ETH', 'SOL', 'ARB', 'OP'], candidates=candidates)
+    runner = MultiAccountRunner(signal_mind, minds)
+    try:
+        runner.run_cycle()
+    finally:
+        runner.executor.shutdown()
+
+    assert reviewer.reviewed == [['SOL']]
@@ -0,0 +1,49 @@
+from benchmarks.stubs import FakeExchange, FakeInfo
+from core.orders import OrderManager
+
+
+def _manager(coins=('BTC', 'ETH'), sz_decimals=2):
+    info = FakeInfo(list(coins), sz_decimals=sz_decimals)
+    exchange = FakeExchange(info)
+    sent = []
+    bulk_orders = exchange.bulk_orders
+    exchange.bulk_orders = lambda requests: sent.append(requests) or bulk_orders(requests)
+    return OrderManager(exchange, "0xabc", 10.0, 5, info), info, sent
+
+
+def test_bulk_orders_without_price_read_mids_once_from_the_cache():
+    manager, info, sent = _manager()
+    info.prices = {'BTC': 50000.0, 'ETH': 2000.0}
+    results = manager.submit_market_orders([
+        {'coin': 'BTC', 'is_buy': True, 'size': 0.01},
+        {'coin': 'ETH', 'is_buy': False, 'size': 0.5},
+    ])
+
+    assert info.calls['all_mids'] == 1
+    assert [request['limit_px'] for request in sent[0]] == [52500.0, 1900.0]
+    assert [result['error'] for result in results] == [None, None]
+
+
+def test_coin_missing_from_mids_is_reported_not_raised():
+    manager, info, sent = _manager()
+    results = manager.submit_market_orders([
+        {'coin': 'NEWCOIN', 'is_buy': True, 'size': 1.0},
+        {'coin': 'BTC', 'is_buy': True, 'size': 0.01},
+    ])
+
+    assert results[0]['error'] == "price unavailable"
+    assert results[1]['coin'] == 'BTC' and results[1]['error'] is None
+    assert [request['coin'] for request in sent[0]] == ['BTC']
+
+
+def test_limit_price_respects_tick_size_of_low_priced_coins():
+    # szDecimals=2 allows at most 6 - 2 = 4 price decimals
+    manager, info, sent = _manager(coins=('MEME',), sz_decimals=2)
+    info.prices = {'MEME': 0.123456}
+    manager.submit_market_orders([
+        {'coin': 'MEME', 'is_buy': True, 'size': 100.0},
+        {'coin': 'MEME', 'is_buy': False, 'size': 100.0, 'price': 0.123456},
+    ])
+
+    assert [request['limit_px'] for request in sent[0]] == [0.1296, 0.1173]
+    assert manager.slippage_price('MEME', True, 0.5) == 0.525
@@ -0,0 +1,55 @@
+import pytest
+from analysis.performance_analyzer import PerformanceAnalyzer
+from database.db_manager import DatabaseManager
+
+
+def _trade(token, diff=5.0, condition='NORMAL', trend='UP'):
+    return {'token': token, 'current_price': 100.0, 'allora_prediction': 100.0 + diff, 'prediction_diff': diff,
+            'volatility': 0.01, 'direction': 'long', 'entry_price': 100.0, 'market_condition': condition,
+            'trend': trend}
+
+
+@pytest.fixture
+def db(tmp_path):
+    db = DatabaseManager(str(tmp_path / "trades.db"))
+    db.initialize()
+    yield db
+    db.close()
+
+
+def test_results_closed_after_a_run_are_folded_on_the_next_run(db):
+    analyzer = PerformanceAnalyzer(db=db)
+    db.log_trade(_trade('BTC'))
+    db.log_trade(_trade('ETH', diff=1.0))
+    db.flush()
+
+    first = analyzer.analyze_results()['trend_analysis'].loc[('NORMAL', 'UP')]
+    assert first['count'] == 2
+    assert first['profit_loss_mean'] != first['profit_loss_mean']  # NaN: nothing closed yet
+
+    db.update_trade_result(1, 102.0, 2.0, 'WIN')
+    db.update_trade_result(2, 96.0, -4.0, 'LOSS')
+    db.flush()
+
+    second = analyzer.analyze_results()
+    row = second['trend_analysis'].loc[('NORMAL', 'UP')]
+    assert row['count'] == 2
+    assert row['profit_loss_mean'] == pytest.approx(-1.0)
+    assert row['profit_loss_std'] == pytest.approx(4.2426, abs=1e-4)
+    assert second['buffer_effectiveness'] == pytest.approx(0.5)
+
+    # Nothing new: aggregates are unchanged, closed rows are not folded twice
+    third = analyzer.analyze_results()['trend_analysis'].loc[('NORMAL', 'UP')]
+    assert third['count'] == 2
+    assert third['profit_loss_mean'] == pytest.approx(-1.0)
+
+
+def test_trade_logged_and_closed_between_runs_is_counted_once(db):
+    analyzer = PerformanceAnalyzer(db=db)
+    db.log_trade(_trade('BTC', condition='HIGH_VOLATILITY', trend='DOWN'))
+    db.update_trade_result(1, 90.0, -10.0, 'LOSS')
+    db.flush()
+
+    row = analyzer.analyze_results()['trend_analysis'].loc[('HIGH_VOLATILITY', 'DOWN')]
+    assert row['count'] == 1
+    assert row['profit_loss_mean'] == pytest.approx(-10.0)
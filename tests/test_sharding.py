@@ -0,0 +1,76 @@
+import queue
+from allora.inference_cache import InferenceCache
+from allora.sharding import ShardCoordinator
+from database.db_manager import DatabaseManager, ForwardingDatabase
+
+TRADE = {'token': 'BTC', 'current_price': 100.0, 'allora_prediction': 105.0, 'prediction_diff': 5.0,
+         'volatility': 0.01, 'direction': 'long', 'entry_price': 100.0, 'market_condition': 'NORMAL'}
+
+
+class StubManager:
+    def refresh_market_data(self):
+        pass
+
+    def list_open_positions(self):
+        return []
+
+
+class StubMind:
+    def __init__(self, db):
+        self.db = db
+        self.manager = StubManager()
+        self.inference_cache = InferenceCache()
+
+    def set_topic_ids(self, topic_ids):
+        self.topic_ids = topic_ids
+
+    def monitor_positions(self):
+        pass
+
+
+class StubGateway:
+    def __init__(self):
+        self.submitted = []
+
+    def submit(self, intents):
+        self.submitted.extend(intents)
+        return []
+
+    def stats(self):
+        return {}
+
+
+class StubProcess:
+    def is_alive(self):
+        return True
+
+    def join(self, timeout=None):
+        pass
+
+
+def test_coordinator_writes_the_rows_workers_forward(tmp_path):
+    db = DatabaseManager(str(tmp_path / "trades.db"))
+    db.initialize()
+    gateway = StubGateway()
+    coordinator = ShardCoordinator(StubMind(db), gateway, {'BTC': 14}, {'db_path': db.db_path}, workers=1)
+    coordinator._results = queue.Queue()
+    tasks = queue.Queue()
+    coordinator._workers = {0: (StubProcess(), tasks)}
+
+    # What shard_worker sends for cycle 1, then on shutdown
+    worker_db = ForwardingDatabase(db.db_path)
+    worker_db.log_trade(TRADE)
+    intent = {'token': 'BTC', 'is_buy': True}
+    coordinator._results.put((0, 1, [intent], {'BTC': 105.0}, worker_db.drain(), None, None))
+    coordinator.run_cycle(timeout=1)
+    worker_db.save_price_window('BTC', [100.0, 101.0])
+    coordinator._results.put((0, None, [], {}, worker_db.drain(), None, None))
+    coordinator.stop(timeout=1)
+    db.flush()
+
+    assert tasks.get_nowait() == (1, set())
+    assert tasks.get_nowait() is None
+    assert gateway.submitted == [intent]
+    assert db.get_connection().execute("SELECT COUNT(*) FROM trade_logs").fetchone()[0] == 1
+    assert list(db.load_price_windows()['BTC'][0]) == [100.0, 101.0]
+    db.close()
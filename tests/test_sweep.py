@@ -0,0 +1,9 @@
+from backtest.sweep import default_grid, grid_search
+
+
+def test_default_grid_only_sweeps_axes_the_engine_uses():
+    assert set(default_grid()) == {'threshold', 'close_buffer'}
+    assert len(grid_search(default_grid())) == 15
+    assert 'stop_loss_ratio' in default_grid(enforce_stop_loss=True)
+    assert 'volatility_window' not in default_grid(enforce_stop_loss=True)
+    assert len(grid_search(default_grid(enforce_stop_loss=True, volatility_filter=True))) == 15 * 4 * 9
@@ -0,0 +1,31 @@
+from strategy.volatility_strategy import VolatilityStrategy
+
+
+class RecordingDatabase:
+    def __init__(self):
+        self.saved = []
+
+    def save_price_window(self, token, prices):
+        self.saved.append((token, list(prices)))
+
+
+def test_price_windows_are_persisted_on_an_interval_and_at_shutdown():
+    db = RecordingDatabase()
+    strategy = VolatilityStrategy(db=db, persist_interval=3600)
+    for price in (100.0, 101.0, 102.0):
+        strategy.update_price_history('BTC', price)
+    strategy.update_price_history('ETH', 10.0)
+
+    # First sample of each token is written, later ones wait for the interval
+    assert db.saved == [('BTC', [100.0]), ('ETH', [10.0])]
+
+    strategy.persist_price_history()
+    assert db.saved[2:] == [('BTC', [100.0, 101.0, 102.0]), ('ETH', [10.0])]
+
+
+def test_persist_interval_zero_writes_every_update():
+    db = RecordingDatabase()
+    strategy = VolatilityStrategy(db=db, persist_interval=0)
+    strategy.update_price_history('BTC', 100.0)
+    strategy.update_price_history('BTC', 101.0)
+    assert len(db.saved) == 2
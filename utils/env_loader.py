@@ -15,6 +15,9 @@ class EnvLoader:
             'ALLORA_UPSHOT_KEY',
             'DEEPSEEK_API_KEY'
         ]
+        # With ACCOUNTS_FILE every account brings its own key
+        if os.getenv('ACCOUNTS_FILE'):
+            required_vars.remove('HL_SECRET_KEY')
         
         # Check for required variables
         missing_vars = [var for var in required_vars if not os.getenv(var)]
@@ -28,17 +31,45 @@ class EnvLoader:
             "hl_master_address": os.getenv('HL_MASTER_ADDRESS'),
             "vault": os.getenv('HL_VAULT', ''),
             "allora_upshot_key": os.getenv('ALLORA_UPSHOT_KEY'),
+            "deepseek_api_key": os.getenv('DEEPSEEK_API_KEY'),
             "price_gap": float(os.getenv('PRICE_GAP', '0.25')),
             "allowed_amount_per_trade": float(os.getenv('ALLOWED_AMOUNT_PER_TRADE', '500')),
             "max_leverage": int(os.getenv('MAX_LEVERAGE', '5')),
             "check_for_trades": int(os.getenv('CHECK_FOR_TRADES', '300')),
+            "exit_poll_interval": self._optional_number('EXIT_POLL_INTERVAL', float),
             "volatility_threshold": float(os.getenv('VOLATILITY_THRESHOLD', '0.02')),
             "db_path": os.getenv('DB_PATH', 'trading_logs.db'),
             "mainnet": os.getenv('MAINNET', "False"),
+            "ws_market_data": os.getenv('WS_MARKET_DATA', "False") == "True",
+            "accounts_file": os.getenv('ACCOUNTS_FILE', ''),
+            "shard_workers": int(os.getenv('SHARD_WORKERS', '0')),
+            "max_open_positions": self._optional_number('MAX_OPEN_POSITIONS', int),
+            "max_new_trades_per_cycle": self._optional_number('MAX_NEW_TRADES_PER_CYCLE', int),
+            "max_total_notional": self._optional_number('MAX_TOTAL_NOTIONAL', float),
+            "max_net_notional": self._optional_number('MAX_NET_NOTIONAL', float),
+            "metrics_enabled": os.getenv('METRICS_ENABLED', "False") == "True",
+            "metrics_port": self._optional_number('METRICS_PORT', int),
+            "metrics_dump_interval": self._optional_number('METRICS_DUMP_INTERVAL', int),
+            "metrics_dump_path": os.getenv('METRICS_DUMP_PATH', ''),
+            "log_level": os.getenv('LOG_LEVEL', 'INFO'),
+            "log_format": os.getenv('LOG_FORMAT', 'json'),
+            "log_module_levels": os.getenv('LOG_MODULE_LEVELS', ''),
+            "log_rate_limit_seconds": float(os.getenv('LOG_RATE_LIMIT_SECONDS', '60')),
             "allora_topics": {
                 "BTC": int(os.getenv('BTC_TOPIC_ID', '14')),
                 "ETH": int(os.getenv('ETH_TOPIC_ID', '13'))
             }
         }
+        # ALLORA_TOPICS="BTC:14,ETH:13,SOL:37" replaces the per-token topic variables
+        if os.getenv('ALLORA_TOPICS'):
+            config["allora_topics"] = {
+                token.strip().upper(): int(topic_id)
+                for token, topic_id in (pair.split(':') for pair in os.getenv('ALLORA_TOPICS').split(','))
+            }
         
         return config
+
+    @staticmethod
+    def _optional_number(name, cast):
+        value = os.getenv(name)
+        return cast(value) if value else None
@@ -1,15 +1,28 @@
 import json
+import logging
+
+logger = logging.getLogger(__name__)
 
 
 def display_leverage_info(info, address, coin):
     user_state = info.user_state(address)
     for position in user_state.get("assetPositions", []):
         if position["position"]["coin"] == coin:
-            print(f"Leverage info for {coin}:", json.dumps(position["position"]["leverage"], indent=2))
+            logger.info("Leverage info for %s: %s", coin, json.dumps(position["position"]["leverage"]))
+
 
+def round_price(price, sz_decimals=None):
+    """
+    Rounds a perp price to 5 significant figures and at most 6 - szDecimals decimals.
+    Integer prices are always accepted by the exchange.
 
-def round_price(price):
-    return round(float(f"{price:.5g}"), 6)
+    :param sz_decimals: The asset's szDecimals; without it up to 6 decimals are kept.
+    """
+    if sz_decimals is None:
+        return round(float(f"{price:.5g}"), 6)
+    if price > 100_000:
+        return float(round(price))
+    return round(float(f"{price:.5g}"), 6 - sz_decimals)
 
 
 def round_size(size, sz_decimals):
@@ -0,0 +1,200 @@
+import atexit
+import copy
+import json
+import logging
+import queue
+import re
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+
+# Private keys (0x + 64 hex) and DeepSeek-style API keys are masked even when not registered
+SECRET_PATTERNS = (
+    re.compile(r'0x[0-9a-fA-F]{64}'),
+    re.compile(r'sk-[A-Za-z0-9]{16,}'),
+)
+REDACTED = "***"
+
+# Attributes every LogRecord has; anything else was passed through `extra=` and is emitted as a field
+_RECORD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {'message', 'asctime'}
+
+_secrets = set()
+_secrets_lock = threading.Lock()
+_listener = None
+
+
+def add_secret(value):
+    """
+    Registers a value (API key, private key) that must never appear in log output.
+    """
+    if value and len(str(value)) >= 8:
+        with _secrets_lock:
+            _secrets.add(str(value))
+
+
+def redact(text):
+    with _secrets_lock:
+        secrets = sorted(_secrets, key=len, reverse=True)
+    for secret in secrets:
+        if secret in text:
+            text = text.replace(secret, REDACTED)
+    for pattern in SECRET_PATTERNS:
+        text = pattern.sub(REDACTED, text)
+    return text
+
+
+class RedactingFilter(logging.Filter):
+    def filter(self, record):
+        """
+        Renders the message (and traceback) once and masks every registered secret in it.
+        """
+        record.msg = redact(record.getMessage())
+        record.args = None
+        if record.exc_info and not record.exc_text:
+            record.exc_text = redact(logging.Formatter().formatException(record.exc_info))
+        return True
+
+
+class RateLimitFilter(logging.Filter):
+    def __init__(self, interval=60.0, max_keys=10000):
+        """
+        Lets the first occurrence of a message through and drops identical repeats from the
+        same logger for `interval` seconds; the next one that passes carries the drop count.
+
+        :param interval: Seconds a repeated message is suppressed for; 0 disables the filter.
+        :param max_keys: Bound on remembered messages; the table is cleared when it fills up.
+        """
+        super().__init__()
+        self.interval = interval
+        self.max_keys = max_keys
+        self._seen = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        if self.interval <= 0:
+            return True
+        key = (record.name, record.levelno, record.getMessage())
+        now = time.monotonic()
+        with self._lock:
+            entry = self._seen.get(key)
+            if entry is not None and now - entry[0] < self.interval:
+                entry[1] += 1
+                return False
+            if len(self._seen) >= self.max_keys:
+                self._seen.clear()
+            self._seen[key] = [now, 0]
+        if entry is not None and entry[1]:
+            record.suppressed = entry[1]
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        """
+        One JSON object per line: ts, level, logger, message, any `extra=` fields and exc.
+        """
+        entry = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS and not key.startswith('_'):
+                entry[key] = value
+        if record.exc_text:
+            entry['exc'] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+    def format(self, record):
+        line = super().format(record)
+        suppressed = getattr(record, 'suppressed', None)
+        return f"{line} (suppressed {suppressed} repeats)" if suppressed else line
+
+
+class _NonBlockingQueueHandler(QueueHandler):
+    def prepare(self, record):
+        # The listener thread formats; keep the already-redacted message and traceback text
+        record = copy.copy(record)
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            pass  # never block the trading loop on a slow log consumer
+
+
+def parse_module_levels(spec):
+    """
+    "core.orders=DEBUG,allora=WARNING" -> {"core.orders": "DEBUG", "allora": "WARNING"}
+    """
+    levels = {}
+    for pair in (spec or "").split(","):
+        if "=" in pair:
+            name, level = pair.split("=", 1)
+            levels[name.strip()] = level.strip().upper()
+    return levels
+
+
+def setup_logging(level="INFO", json_format=True, module_levels=None, rate_limit_seconds=60.0,
+                  secrets=(), stream=None, queue_size=10000):
+    """
+    Routes every logger through a bounded queue to one background writer thread, so log
+    calls on the trading path never wait on stdout.
+
+    :param level: Root level name.
+    :param json_format: JSON lines when True, plain text otherwise.
+    :param module_levels: Optional {logger name: level name} overrides (e.g. {"core.orders": "DEBUG"}).
+    :param rate_limit_seconds: Window in which identical messages are logged only once.
+    :param secrets: Values to mask in every message (keys from the environment).
+    :param stream: Output stream (default: stdout).
+    :param queue_size: Records buffered before new ones are dropped.
+    :return: The running QueueListener.
+    """
+    global _listener
+    for secret in secrets:
+        add_secret(secret)
+
+    output = logging.StreamHandler(stream or sys.stdout)
+    output.setFormatter(JsonFormatter() if json_format else TextFormatter())
+
+    handler = _NonBlockingQueueHandler(queue.Queue(queue_size))
+    handler.addFilter(RateLimitFilter(rate_limit_seconds))
+    handler.addFilter(RedactingFilter())
+
+    root = logging.getLogger()
+    for existing in list(root.handlers):
+        root.removeHandler(existing)
+    root.addHandler(handler)
+    root.setLevel(level.upper() if isinstance(level, str) else level)
+    for name, module_level in (module_levels or {}).items():
+        logging.getLogger(name).setLevel(module_level)
+
+    if _listener is not None:
+        _listener.stop()
+    _listener = QueueListener(handler.queue, output)
+    _listener.start()
+    atexit.register(stop_logging)
+    return _listener
+
+
+def stop_logging():
+    """
+    Flushes queued records and stops the writer thread.
+    """
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
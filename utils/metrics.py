@@ -0,0 +1,349 @@
+import functools
+import logging
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+logger = logging.getLogger(__name__)
+
+# Process-wide switch; every recording helper returns immediately while it is False
+_enabled = False
+_registry_lock = threading.Lock()
+_counters = {}
+_histograms = {}
+
+# Histogram resolution: 2**SUB_BUCKET_BITS linear sub-buckets per power of two (< 1% error)
+SUB_BUCKET_BITS = 7
+SUB_BUCKET_COUNT = 1 << SUB_BUCKET_BITS
+# Largest trackable value: 2**MAX_EXPONENT microseconds (~4.7 hours); larger values are clamped
+MAX_EXPONENT = 34
+QUANTILES = (0.5, 0.9, 0.99, 0.999)
+
+
+def enable(on=True):
+    global _enabled
+    _enabled = on
+
+
+def enabled():
+    return _enabled
+
+
+def reset():
+    with _registry_lock:
+        _counters.clear()
+        _histograms.clear()
+
+
+class Counter:
+    __slots__ = ('value', '_lock')
+
+    def __init__(self):
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1):
+        with self._lock:
+            self.value += amount
+
+
+class Histogram:
+    def __init__(self):
+        """
+        HDR-style latency histogram over microseconds: log-linear buckets give a constant
+        relative error (< 1%) from 1us to hours in a fixed few thousand counters.
+        """
+        self.counts = [0] * ((MAX_EXPONENT - SUB_BUCKET_BITS + 2) * SUB_BUCKET_COUNT)
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _index(micros):
+        if micros < 2 * SUB_BUCKET_COUNT:
+            return micros
+        micros = min(micros, (1 << (MAX_EXPONENT + 1)) - 1)
+        shift = micros.bit_length() - SUB_BUCKET_BITS - 1
+        return (shift + 1) * SUB_BUCKET_COUNT + (micros >> shift) - SUB_BUCKET_COUNT
+
+    @staticmethod
+    def _bucket_value(index):
+        if index < 2 * SUB_BUCKET_COUNT:
+            return index
+        shift = index // SUB_BUCKET_COUNT - 1
+        mantissa = index % SUB_BUCKET_COUNT + SUB_BUCKET_COUNT
+        # Upper edge of the bucket, so quantiles never under-report
+        return ((mantissa + 1) << shift) - 1
+
+    def record(self, seconds):
+        micros = max(0, int(seconds * 1_000_000))
+        index = self._index(micros)
+        with self._lock:
+            self.counts[index] += 1
+            self.count += 1
+            self.total += seconds
+            if self.min is None or seconds < self.min:
+                self.min = seconds
+            if self.max is None or seconds > self.max:
+                self.max = seconds
+
+    def quantile(self, q):
+        """
+        Returns the q-quantile in seconds, or None if nothing was recorded.
+        """
+        with self._lock:
+            if not self.count:
+                return None
+            target = max(1, int(q * self.count + 0.5))
+            seen = 0
+            for index, count in enumerate(self.counts):
+                seen += count
+                if seen >= target:
+                    return min(self._bucket_value(index) / 1_000_000, self.max)
+        return self.max
+
+    def state(self):
+        """
+        Picklable copy of the recorded data (non-empty buckets only).
+        """
+        with self._lock:
+            return {'counts': {index: count for index, count in enumerate(self.counts) if count},
+                    'count': self.count, 'total': self.total, 'min': self.min, 'max': self.max}
+
+    def merge(self, state):
+        """
+        Adds data returned by state() on another histogram (e.g. in another process).
+        """
+        with self._lock:
+            for index, count in state['counts'].items():
+                self.counts[index] += count
+            self.count += state['count']
+            self.total += state['total']
+            if state['min'] is not None and (self.min is None or state['min'] < self.min):
+                self.min = state['min']
+            if state['max'] is not None and (self.max is None or state['max'] > self.max):
+                self.max = state['max']
+
+    def summary(self):
+        summary = {f"p{str(q * 100).rstrip('0').rstrip('.')}": self.quantile(q) for q in QUANTILES}
+        summary.update({'count': self.count, 'sum': self.total, 'min': self.min, 'max': self.max})
+        return summary
+
+
+def _key(name, labels):
+    return name, tuple(sorted(labels.items()))
+
+
+def counter(name, **labels):
+    key = _key(name, labels)
+    metric = _counters.get(key)
+    if metric is None:
+        with _registry_lock:
+            metric = _counters.setdefault(key, Counter())
+    return metric
+
+
+def histogram(name, **labels):
+    key = _key(name, labels)
+    metric = _histograms.get(key)
+    if metric is None:
+        with _registry_lock:
+            metric = _histograms.setdefault(key, Histogram())
+    return metric
+
+
+def inc(name, amount=1, **labels):
+    if _enabled:
+        counter(name, **labels).inc(amount)
+
+
+def observe(name, seconds, **labels):
+    if _enabled:
+        histogram(name, **labels).record(seconds)
+
+
+class _Timer:
+    __slots__ = ('histogram', 'started')
+
+    def __init__(self, histogram):
+        self.histogram = histogram
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.histogram.record(time.perf_counter() - self.started)
+        return False
+
+
+class _NoopTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NOOP = _NoopTimer()
+
+
+def timed(name, **labels):
+    """
+    Context manager recording the block's duration into histogram `name`:
+
+        with metrics.timed("hyperliquid_request_seconds", endpoint="all_mids"):
+            ...
+
+    Returns a shared no-op object while metrics are disabled.
+    """
+    if not _enabled:
+        return _NOOP
+    return _Timer(histogram(name, **labels))
+
+
+def timed_function(name, **labels):
+    """
+    Decorator form of timed(); the enabled check happens on every call.
+    """
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return fn(*args, **kwargs)
+            with _Timer(histogram(name, **labels)):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def drain():
+    """
+    Returns everything recorded since the last drain as picklable data and starts a fresh
+    registry; merge() adds it to another process's registry (shard workers -> coordinator).
+    """
+    global _counters, _histograms
+    with _registry_lock:
+        counters, _counters = _counters, {}
+        histograms, _histograms = _histograms, {}
+    return {
+        'counters': {key: metric.value for key, metric in counters.items()},
+        'histograms': {key: metric.state() for key, metric in histograms.items()}
+    }
+
+
+def merge(data):
+    """
+    Adds the output of drain() from another process to this registry.
+    """
+    if not _enabled or not data:
+        return
+    for (name, labels), value in data['counters'].items():
+        counter(name, **dict(labels)).inc(value)
+    for (name, labels), state in data['histograms'].items():
+        histogram(name, **dict(labels)).merge(state)
+
+
+def snapshot():
+    """
+    Returns {'counters': {...}, 'histograms': {...}} keyed by name{labels}.
+    """
+    with _registry_lock:
+        counters = list(_counters.items())
+        histograms = list(_histograms.items())
+    return {
+        'counters': {_series_name(name, labels): metric.value for (name, labels), metric in counters},
+        'histograms': {_series_name(name, labels): metric.summary() for (name, labels), metric in histograms}
+    }
+
+
+def _series_name(name, labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return name
+    rendered = ",".join(f'{key}="{str(value)}"' for key, value in pairs)
+    return f"{name}{{{rendered}}}"
+
+
+def render_prometheus():
+    """
+    Prometheus text exposition: counters as *_total, histograms as summaries with quantiles.
+    """
+    with _registry_lock:
+        counters = sorted(_counters.items())
+        histograms = sorted(_histograms.items())
+    lines = []
+    declared = set()
+    for (name, labels), metric in counters:
+        metric_name = name if name.endswith('_total') else f"{name}_total"
+        if metric_name not in declared:
+            lines.append(f"# TYPE {metric_name} counter")
+            declared.add(metric_name)
+        lines.append(f"{_series_name(metric_name, labels)} {metric.value}")
+    for (name, labels), metric in histograms:
+        if name not in declared:
+            lines.append(f"# TYPE {name} summary")
+            declared.add(name)
+        for q in QUANTILES:
+            value = metric.quantile(q)
+            if value is not None:
+                lines.append(f"{_series_name(name, labels, [('quantile', q)])} {value:.6f}")
+        lines.append(f"{_series_name(name + '_sum', labels)} {metric.total:.6f}")
+        lines.append(f"{_series_name(name + '_count', labels)} {metric.count}")
+        if metric.max is not None:
+            lines.append(f"{_series_name(name + '_max', labels)} {metric.max:.6f}")
+    return "\n".join(lines) + "\n"
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split('?')[0] not in ('/', '/metrics'):
+            self.send_error(404)
+            return
+        body = render_prometheus().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_http_server(port, host="127.0.0.1"):
+    """
+    Serves /metrics in Prometheus text format from a daemon thread.
+    """
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    logger.info("Metrics available at http://%s:%d/metrics", host, server.server_port)
+    return server
+
+
+def start_dump(interval, path=None):
+    """
+    Periodically writes the Prometheus text to `path`, or prints p50/p99/max per histogram.
+    """
+    def dump():
+        while True:
+            time.sleep(interval)
+            if path:
+                with open(path, 'w') as f:
+                    f.write(render_prometheus())
+                continue
+            for series, summary in sorted(snapshot()['histograms'].items()):
+                logger.info("%s: n=%d p50=%s p99=%s max=%s", series, summary['count'], _ms(summary['p50']),
+                            _ms(summary['p99']), _ms(summary['max']))
+
+    thread = threading.Thread(target=dump, name="metrics-dump", daemon=True)
+    thread.start()
+    return thread
+
+
+def _ms(seconds):
+    return "-" if seconds is None else f"{seconds * 1000:.1f}ms"
@@ -1,3 +1,4 @@
+import logging
 import eth_account
 from hyperliquid.info import Info
 from hyperliquid.exchange import Exchange
@@ -5,14 +6,17 @@ from utils.helpers import convert_percentage_to_decimal
 from utils.env_loader import EnvLoader
 from dotenv import load_dotenv
 from utils.constants import TESTNET_API_URL, MAINNET_API_URL
+from utils.logging_setup import add_secret
+import json
 import os
 
+logger = logging.getLogger(__name__)
+
 
 def setup():
     # Load configuration from environment
     env_loader = EnvLoader()
     config = env_loader.get_config()
-    print(config)
     account = eth_account.Account.from_key(config["secret_key"])
     address = config["account_address"] or account.address
     vault = config["vault"]
@@ -27,16 +31,17 @@ def setup():
     price_gap = convert_percentage_to_decimal(config["price_gap"])
 
     if vault != "":
-        print(f"Running with vault: {vault}")
+        logger.info("Running with vault: %s", vault)
     else:
-        print("Running with account address:", hl_master_address)
+        logger.info("Running with account address: %s", hl_master_address)
 
     if mainnet == "True":
         base_url = MAINNET_API_URL
     else:
         base_url = TESTNET_API_URL
 
-    info = Info(base_url, skip_ws=True)
+    # Websocket market data is opt-in; without it every read is a REST poll
+    info = Info(base_url, skip_ws=not config["ws_market_data"])
     if vault != "":
         exchange = Exchange(account, base_url, account_address=address, vault_address=vault)
         return (address, info, exchange, vault, allora_upshot_key, deepseek_api_key, check_for_trades,
@@ -47,3 +52,56 @@ def setup():
                 check_for_trades, price_gap, allowed_amount_per_trade, max_leverage, allora_topics)
 
 
+
+
+def setup_accounts():
+    """
+    Multi-account setup: one shared Info client plus an Exchange for every entry of the
+    JSON list in ACCOUNTS_FILE. Each entry needs "secret_key_env" (name of the env var
+    holding its key) or "secret_key", and may set "name", "account_address",
+    "master_address", "vault", "allowed_amount_per_trade", "max_leverage",
+    "max_open_positions", "max_new_trades_per_cycle" and "tokens"; trading parameters
+    default to the environment values.
+    """
+    env_loader = EnvLoader()
+    config = env_loader.get_config()
+    base_url = MAINNET_API_URL if config["mainnet"] == "True" else TESTNET_API_URL
+    info = Info(base_url, skip_ws=not config["ws_market_data"])
+
+    with open(config["accounts_file"]) as f:
+        entries = json.load(f)
+
+    accounts = []
+    for index, entry in enumerate(entries):
+        name = entry.get("name", f"account-{index + 1}")
+        secret_key = entry.get("secret_key") or os.getenv(entry.get("secret_key_env", ""))
+        if not secret_key:
+            raise ValueError(f"No secret key configured for account {name}")
+        add_secret(secret_key)
+        account = eth_account.Account.from_key(secret_key)
+        address = entry.get("account_address") or account.address
+        vault = entry.get("vault", "")
+        if vault != "":
+            logger.info("Account %s: running with vault %s", name, vault)
+            exchange = Exchange(account, base_url, account_address=address, vault_address=vault)
+            trading_address = vault
+        else:
+            trading_address = entry.get("master_address") or address
+            logger.info("Account %s: running with account address %s", name, trading_address)
+            exchange = Exchange(account, base_url, account_address=trading_address)
+
+        tokens = entry.get("tokens")
+        accounts.append({
+            "name": name,
+            "exchange": exchange,
+            "address": trading_address,
+            "allowed_amount_per_trade": float(entry.get("allowed_amount_per_trade",
+                                                        config["allowed_amount_per_trade"])),
+            "max_leverage": int(entry.get("max_leverage", config["max_leverage"])),
+            "max_open_positions": entry.get("max_open_positions", config["max_open_positions"]),
+            "max_new_trades_per_cycle": entry.get("max_new_trades_per_cycle", config["max_new_trades_per_cycle"]),
+            "allora_topics": {token: topic for token, topic in config["allora_topics"].items()
+                              if tokens is None or token in tokens}
+        })
+
+    return config, info, accounts